@@ -226,6 +226,61 @@ class BattleQueue:
         
         return new_battle_queue
     
+    def get_state(self) -> tuple:
+        """
+        Return a hashable snapshot of this BattleQueue: the states of both
+        players followed by who acts in what order (1 for the first player
+        added, 2 for their enemy).
+
+        BattleQueues with equal states play out the same way, so the state can
+        be used to cache the results of searching from a BattleQueue. A
+        Sorcerer's state includes a key of its skill decision tree (see
+        Sorcerer.get_state), so Sorcerers with different trees don't share
+        cached results.
+
+        >>> bq = BattleQueue()
+        >>> from characters import Rogue
+        >>> from playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.add(c2)
+        >>> bq.peek().attack()
+        >>> bq.get_state()
+        (('r', 'rogue', 100, 97), ('r2', 'rogue', 95, 100), (1, 2, 1))
+        """
+        return (self._p1.get_state(), self._p2.get_state(),
+                tuple(1 if character == self._p1 else 2
+                      for character in self._content))
+
+    def set_state(self, state: tuple) -> None:
+        """
+        Restore the HP and SP of both players and the order they act in from
+        state, as returned by get_state. Only the HP and SP of each player's
+        state are used.
+
+        >>> bq = BattleQueue()
+        >>> from characters import Rogue
+        >>> from playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.add(c2)
+        >>> bq.set_state((('r', 'rogue', 40, 7), ('r2', 'rogue', 55, 90),
+        ...               (2, 1, 2)))
+        >>> bq
+        r2 (Rogue): 55/90 -> r (Rogue): 40/7 -> r2 (Rogue): 55/90
+        """
+        for player, player_state in zip([self._p1, self._p2], state[:2]):
+            player.set_hp(player_state[2])
+            player.set_sp(player_state[3])
+        self._content = [self._p1 if who == 1 else self._p2
+                         for who in state[2]]
+
     def __repr__(self) -> str:
         """
         Return a representation of this BattleQueue.
@@ -316,6 +371,16 @@ class RestrictedBattleQueue(BattleQueue):
             self._content.append(character)
             self._restriction_lst.append("N")
 
+    def _clean_queue(self) -> None:
+        """
+        Remove all characters from the front of the Queue that don't have
+        any actions available to them, along with whether they can add, so
+        the two lists stay in step.
+        """
+        while self._content and self._content[0].get_available_actions() == []:
+            self._content.pop(0)
+            self._restriction_lst.pop(0)
+
     def remove(self) -> 'Character':
         """
         Remove and return the character at the front of this BattleQueue.
@@ -328,6 +393,26 @@ class RestrictedBattleQueue(BattleQueue):
     def clear_seen(self):
         self._seen.clear()
 
+    def get_state(self) -> tuple:
+        """
+        Return a hashable snapshot of this RestrictedBattleQueue, including
+        which characters are able to add and which have been seen.
+        """
+        return super().get_state() + (
+            tuple(self._restriction_lst),
+            tuple(sorted(1 if character == self._p1 else 2
+                         for character in self._seen)))
+
+    def set_state(self, state: tuple) -> None:
+        """
+        Restore this RestrictedBattleQueue from state, as returned by
+        get_state.
+        """
+        super().set_state(state[:3])
+        self._restriction_lst = list(state[3])
+        self._seen = {self._p1 if who == 1 else self._p2: 1
+                      for who in state[4]}
+
     def copy(self) -> 'BattleQueue':
         """
         Return a copy of this BattleQueue. The copy contains copies of the
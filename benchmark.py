@@ -0,0 +1,142 @@
+"""
+Benchmarks for the hot paths of the game.
+
+Run this file to print the timings.
+"""
+import subprocess
+import sys
+import timeit
+from battle_queue import BattleQueue
+from playstyle import ManualPlaystyle
+from characters import Rogue
+from skill_decision_tree import create_default_tree, \
+    CompiledSkillDecisionTree, ThresholdLookupTable
+
+NUMBER = 20000
+
+
+def _sample_characters() -> list:
+    """
+    Return a list of (caster, target) pairs covering the HP and SP ranges
+    checked by the default SkillDecisionTree.
+    """
+    bq = BattleQueue()
+    pairs = []
+    for caster_hp, caster_sp, target_hp, target_sp in [(100, 100, 100, 100),
+                                                       (80, 40, 20, 50),
+                                                       (100, 40, 50, 30),
+                                                       (20, 10, 90, 60),
+                                                       (60, 15, 25, 35)]:
+        caster = Rogue("Caster", bq, ManualPlaystyle(bq))
+        target = Rogue("Target", bq, ManualPlaystyle(bq))
+        caster.set_hp(caster_hp)
+        caster.set_sp(caster_sp)
+        target.set_hp(target_hp)
+        target.set_sp(target_sp)
+        pairs.append((caster, target))
+    return pairs
+
+
+def benchmark_skill_decision_tree(number: int = NUMBER) -> dict:
+    """
+    Return the seconds taken to pick number skills from the default
+    SkillDecisionTree for each of its evaluation strategies.
+    """
+    tree = create_default_tree()
+    rules = CompiledSkillDecisionTree(tree)
+    table = ThresholdLookupTable(rules)
+    pairs = _sample_characters()
+
+    def run(pick_skill):
+        """
+        Pick a skill for every sample pair.
+        """
+        for caster, target in pairs:
+            pick_skill(caster, target)
+
+    rounds = max(number // len(pairs), 1)
+    return {'recursive': timeit.timeit(lambda: run(tree.pick_skill),
+                                       number=rounds),
+            'rules': timeit.timeit(lambda: run(rules.pick_skill),
+                                   number=rounds),
+            'lookup': timeit.timeit(lambda: run(table.pick_skill),
+                                    number=rounds)}
+
+
+def benchmark_batch_pick_skill(step: int = 5) -> dict:
+    """
+    Return the seconds taken to pick a skill from the default
+    SkillDecisionTree for every state in a grid of HP and SP from 0 to 100
+    with the given step, in one batch and one state at a time.
+    """
+    import numpy as np
+
+    tree = create_default_tree()
+    values = np.arange(0, 101, step)
+    grid = np.meshgrid(values, values, values, values, indexing='ij',
+                       sparse=True)
+    bq = BattleQueue()
+    caster = Rogue("Caster", bq, ManualPlaystyle(bq))
+    target = Rogue("Target", bq, ManualPlaystyle(bq))
+
+    def run_each():
+        """
+        Pick a skill for every state in the grid.
+        """
+        for caster_hp in values:
+            caster.set_hp(int(caster_hp))
+            for caster_sp in values:
+                caster.set_sp(int(caster_sp))
+                for target_hp in values:
+                    target.set_hp(int(target_hp))
+                    for target_sp in values:
+                        target.set_sp(int(target_sp))
+                        tree.pick_skill(caster, target)
+
+    return {'batch': timeit.timeit(lambda: tree.pick_skill_indices(*grid),
+                                   number=1),
+            'pick_skill': timeit.timeit(run_each, number=1)}
+
+
+def benchmark_import_time(modules: tuple = ('game', 'playstyle', 'ui'),
+                          number: int = 5) -> dict:
+    """
+    Return the fewest seconds taken to import each of modules in a fresh
+    interpreter, over number tries.
+
+    Raise an AssertionError if importing any of them imports pygame, which
+    only ui.init_pygame should do.
+    """
+    script = ("import sys, time\n"
+              "start = time.perf_counter()\n"
+              "import {}\n"
+              "print(time.perf_counter() - start)\n"
+              "assert 'pygame' not in sys.modules, 'pygame was imported'\n")
+    results = {}
+    for module in modules:
+        results[module] = min(
+            float(subprocess.run([sys.executable, '-c',
+                                  script.format(module)],
+                                 check=True, stdout=subprocess.PIPE,
+                                 universal_newlines=True).stdout)
+            for _ in range(number))
+    return results
+
+
+def print_results(name: str, results: dict) -> None:
+    """
+    Print the timings in results under the heading name.
+    """
+    print(name)
+    fastest = min(results.values())
+    for strategy, seconds in results.items():
+        print("  {:<12} {:8.4f}s  x{:.2f}".format(strategy, seconds,
+                                                  seconds / fastest))
+
+
+if __name__ == '__main__':
+    print_results("SkillDecisionTree.pick_skill",
+                  benchmark_skill_decision_tree())
+    print_results("SkillDecisionTree.pick_skill_indices (21^4 grid)",
+                  benchmark_batch_pick_skill())
+    print_results("import (fresh interpreter)", benchmark_import_time())
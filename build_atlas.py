@@ -0,0 +1,73 @@
+"""
+Pack every image in sprites/ into one atlas image.
+
+Run this file after adding or changing a sprite. It writes sprites/atlas.png
+and sprites/atlas.json, which maps every image's name (its file name without
+'.png') to its [x, y, width, height] rectangle in the atlas. ui.py loads the
+atlas instead of the separate images when it exists.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+import pygame
+
+SPRITE_DIRECTORY = 'sprites'
+ATLAS_NAME = 'atlas'
+MAX_WIDTH = 2048
+
+
+def pack(sizes: Dict[str, Tuple[int, int]],
+         max_width: int = MAX_WIDTH) -> Dict[str, List[int]]:
+    """
+    Return an [x, y, width, height] rectangle for every name in sizes, a dict
+    of (width, height) sizes, so that no two rectangles overlap and none
+    goes past max_width.
+
+    Images are placed in rows from the tallest to the shortest, and in name
+    order when they're as tall, so the same images always pack the same way.
+
+    >>> pack({'a': (4, 2), 'b': (4, 2), 'c': (3, 5)}, 8)
+    {'c': [0, 0, 3, 5], 'a': [3, 0, 4, 2], 'b': [0, 5, 4, 2]}
+    """
+    rectangles = {}
+    x, y, row_height = 0, 0, 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], name)):
+        width, height = sizes[name]
+        if x + width > max_width:
+            x, y, row_height = 0, y + row_height, 0
+        rectangles[name] = [x, y, width, height]
+        x += width
+        row_height = max(row_height, height)
+    return rectangles
+
+
+def build_atlas(directory: str = SPRITE_DIRECTORY) -> Dict[str, List[int]]:
+    """
+    Pack every PNG image in directory (other than the atlas itself) into the
+    atlas image and index in directory, and return the index.
+    """
+    images = {}
+    for file_name in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(file_name)
+        if extension == '.png' and name != ATLAS_NAME:
+            images[name] = pygame.image.load(os.path.join(directory,
+                                                          file_name))
+
+    index = pack({name: image.get_size() for name, image in images.items()})
+    width = max(x + w for x, _, w, _ in index.values())
+    height = max(y + h for _, y, _, h in index.values())
+
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+    for name, rectangle in index.items():
+        atlas.blit(images[name], rectangle[:2])
+
+    pygame.image.save(atlas, os.path.join(directory, ATLAS_NAME + '.png'))
+    with open(os.path.join(directory, ATLAS_NAME + '.json'), 'w') as output:
+        json.dump(index, output, separators=(',', ':'), sort_keys=True)
+    return index
+
+
+if __name__ == '__main__':
+    INDEX = build_atlas()
+    print("Packed {} images into {}".format(
+        len(INDEX), os.path.join(SPRITE_DIRECTORY, ATLAS_NAME + '.png')))
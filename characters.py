@@ -3,10 +3,25 @@ The Character classes.
 
 """
 from typing import List
+import events
 from skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial, \
     VampireAttack, VampireSpecial, SorcererAttack, SorcererSpecial
 from skill_decision_tree import create_default_tree
 
+# The animation states of a character, as indices into SPRITE_STATES, and the
+# number of frames in each.
+IDLE, ATTACK, SPECIAL = range(3)
+SPRITE_STATES = ('idle', 'attack', 'special')
+SPRITE_FRAMES = 10
+
+# The name of every sprite frame of every character type, indexed by state
+# and frame, so advancing an animation never builds a new string.
+SPRITE_TABLES = {
+    character_type: tuple(tuple("{}_{}_{}".format(character_type, state, frame)
+                                for frame in range(SPRITE_FRAMES))
+                          for state in SPRITE_STATES)
+    for character_type in ['mage', 'rogue', 'vampire', 'sorcerer']}
+
 class Character:
     """
     An abstract superclass for all Characters.
@@ -32,7 +47,7 @@ class Character:
         self.enemy = None
         
         self._character_type = ''
-        self._current_state = 'idle'
+        self._current_state = IDLE
         self._current_frame = 0
         
         self._skills = {'A': None,
@@ -57,18 +72,48 @@ class Character:
         """
         return self._sp
     
+    def get_state(self) -> tuple:
+        """
+        Return a hashable snapshot of this Character's name, type, HP and SP,
+        followed by anything else subclasses play out differently with.
+
+        >>> from battle_queue import BattleQueue
+        >>> from playstyle import ManualPlaystyle
+        >>> bq = BattleQueue()
+        >>> Mage("m", bq, ManualPlaystyle(bq)).get_state()
+        ('m', 'mage', 100, 100)
+        """
+        return (self._name, self._character_type, self._hp, self._sp)
+
     def get_next_sprite(self) -> str:
         """
         Return the next sprite that needs to be drawn for this Character.
-        """
-        sprite_to_return = "{}_{}_{}".format(self._character_type,
-                                             self._current_state,
-                                             self._current_frame)
+
+        >>> from battle_queue import BattleQueue
+        >>> from playstyle import ManualPlaystyle
+        >>> bq = BattleQueue()
+        >>> rogue = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> rogue.get_next_sprite(), rogue.get_next_sprite()
+        ('rogue_idle_0', 'rogue_idle_1')
+
+        The names come from SPRITE_TABLES rather than being built each time,
+        and every animation goes back to idle after its last frame.
+
+        >>> rogue.enemy = Rogue("e", bq, ManualPlaystyle(bq))
+        >>> rogue.attack()
+        >>> all(rogue.get_next_sprite() is SPRITE_TABLES['rogue'][ATTACK][i]
+        ...     for i in range(SPRITE_FRAMES))
+        True
+        >>> rogue.get_next_sprite() is SPRITE_TABLES['rogue'][IDLE][0]
+        True
+        """
+        sprite_to_return = SPRITE_TABLES[self._character_type][
+            self._current_state][self._current_frame]
         
         self._current_frame += 1
         
-        if self._current_frame == 10:
-            self._current_state = 'idle'
+        if self._current_frame == SPRITE_FRAMES:
+            self._current_state = IDLE
             self._current_frame = 0
         
         return sprite_to_return
@@ -86,6 +131,18 @@ class Character:
                 available.append(skill)
         
         return available
+
+    def get_skill(self, action: str) -> 'Skill':
+        """
+        Return the Skill this Character uses for action ('A' or 'S').
+        """
+        return self._skills[action]
+
+    def get_defense(self) -> int:
+        """
+        Return the defense of this Character.
+        """
+        return self._defense
     
     def is_valid_action(self, action: str) -> bool:
         """
@@ -103,17 +160,23 @@ class Character:
         """
         Perform an attack on this Character's enemy.
         """
-        self._current_state = 'attack'
+        self._current_state = ATTACK
         self._current_frame = 0
-        self._skills['A'].use(self, self.enemy)
+        if events.CONTEXT.turn is None:
+            self._skills['A'].use(self, self.enemy)
+        else:
+            events.log_skill(self._skills['A'], self, self.enemy)
     
     def special_attack(self) -> None:
         """
         Perform a special attack on this Character's enemy.
         """
-        self._current_state = 'special'
+        self._current_state = SPECIAL
         self._current_frame = 0
-        self._skills['S'].use(self, self.enemy)
+        if events.CONTEXT.turn is None:
+            self._skills['S'].use(self, self.enemy)
+        else:
+            events.log_skill(self._skills['S'], self, self.enemy)
         
     def reduce_sp(self, cost: int) -> None:
         """
@@ -155,6 +218,9 @@ class Character:
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Character':
         """
         Return a copy of this Character whose BattleQueue is new_battle_queue.
+
+        The copy shares this Character's playstyle, since Playstyles are
+        stateless.
         """
         raise NotImplementedError
     
@@ -224,9 +290,10 @@ class Mage(Character):
         m2 (Mage): 100/100
         >>> c2_copy
         m2 (Mage): 88/100
+        >>> c_copy.playstyle is c.playstyle
+        True
         """
-        copy = Mage(self._name, new_battle_queue, 
-                    self.playstyle.copy(new_battle_queue))
+        copy = Mage(self._name, new_battle_queue, self.playstyle)
         self._set_copy_attributes(copy)
         return copy
     
@@ -290,8 +357,7 @@ class Rogue(Character):
         >>> c2_copy
         r2 (Rogue): 95/100
         """
-        copy = Rogue(self._name, new_battle_queue, 
-                     self.playstyle.copy(new_battle_queue))
+        copy = Rogue(self._name, new_battle_queue, self.playstyle)
         self._set_copy_attributes(copy)
         return copy
 
@@ -359,8 +425,7 @@ class Vampire(Character):
         >>> c2_copy
         v2 (Vampire): 83/100
         """
-        copy = Vampire(self._name, new_battle_queue,
-                       self.playstyle.copy(new_battle_queue))
+        copy = Vampire(self._name, new_battle_queue, self.playstyle)
         self._set_copy_attributes(copy)
         return copy
 
@@ -396,7 +461,7 @@ class Sorcerer(Character):
         self._skills['A'] = SorcererAttack()
         self._skills['S'] = SorcererSpecial()
         self._defense = 10
-        self._skill_decision_tree = create_default_tree()
+        self.set_skill_decision_tree(create_default_tree())
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Sorcerer':
         """
@@ -425,8 +490,7 @@ class Sorcerer(Character):
         >>> c2_copy
         s2 (Sorcerer): 90/100
         """
-        copy = Sorcerer(self._name, new_battle_queue,
-                        self.playstyle.copy(new_battle_queue))
+        copy = Sorcerer(self._name, new_battle_queue, self.playstyle)
         self._set_copy_attributes(copy)
         return copy
 
@@ -435,16 +499,32 @@ class Sorcerer(Character):
             -> None:
         """
         Set skill decision tree for each Sorcerer.
+
+        The tree is compiled here (see SkillDecisionTree.compile), and
+        pick_skill uses that snapshot: changes made to the tree afterwards
+        are ignored until it is set again. Copies of this Sorcerer share its
+        tree and snapshot.
+
         >>> from battle_queue import BattleQueue
         >>> from playstyle import ManualPlaystyle
         >>> bq = BattleQueue()
         >>> c = Sorcerer("s", bq, ManualPlaystyle(bq))
+        >>> c2 = Sorcerer("s2", bq, ManualPlaystyle(bq))
         >>> sdt = create_default_tree()
         >>> c.set_skill_decision_tree(sdt)
         >>> print(c.get_skill_decision_tree())
         SDT(5, MageAttack)
+        >>> sdt.children = []
+        >>> c.pick_skill(c2).__class__.__name__
+        'RogueSpecial'
+        >>> c.set_skill_decision_tree(sdt)
+        >>> c.pick_skill(c2).__class__.__name__
+        'MageAttack'
         """
         self._skill_decision_tree = skill_decision_tree
+        self._compiled_skill_decision_tree = skill_decision_tree.compile()
+        self._skill_decision_tree_key = \
+            self._compiled_skill_decision_tree.get_key()
 
     def get_skill_decision_tree(self) -> 'SkillDecisionTree':
         """
@@ -459,6 +539,50 @@ class Sorcerer(Character):
         SDT(5, MageAttack)
         """
         return self._skill_decision_tree
+
+    def pick_skill(self, target: 'Character') -> 'Skill':
+        """
+        Return the skill this Sorcerer's skill decision tree picks against
+        target.
+
+        Uses the compiled form of the tree installed by
+        set_skill_decision_tree.
+
+        >>> from battle_queue import BattleQueue
+        >>> from playstyle import ManualPlaystyle
+        >>> bq = BattleQueue()
+        >>> c = Sorcerer("s", bq, ManualPlaystyle(bq))
+        >>> c2 = Sorcerer("s2", bq, ManualPlaystyle(bq))
+        >>> c.pick_skill(c2).__class__.__name__
+        'RogueSpecial'
+        """
+        return self._compiled_skill_decision_tree.pick_skill(self, target)
+
+    def get_state(self) -> tuple:
+        """
+        Return a hashable snapshot of this Sorcerer's name, type, HP and SP,
+        followed by a key of the skills its skill decision tree picks, since
+        Sorcerers with different trees play out differently.
+
+        >>> from battle_queue import BattleQueue
+        >>> from playstyle import ManualPlaystyle
+        >>> bq = BattleQueue()
+        >>> Sorcerer("s", bq, ManualPlaystyle(bq)).get_state()[:4]
+        ('s', 'sorcerer', 100, 100)
+        """
+        return (self._name, self._character_type, self._hp, self._sp,
+                self._skill_decision_tree_key)
+
+    def _set_copy_attributes(self, other: 'Sorcerer') -> None:
+        """
+        Set other's attributes to match this Sorcerer's, sharing this
+        Sorcerer's skill decision tree.
+        """
+        super()._set_copy_attributes(other)
+        other._skill_decision_tree = self._skill_decision_tree
+        other._compiled_skill_decision_tree = \
+            self._compiled_skill_decision_tree
+        other._skill_decision_tree_key = self._skill_decision_tree_key
     
 if __name__ == '__main__':
     import python_ta
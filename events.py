@@ -0,0 +1,215 @@
+"""
+A structured log of what happens on every turn of a game, for analytics.
+
+While SINK is set, every move performed in a GameSession sends events to it:
+    - a 'skill' event for every skill used, with its actor, target, the
+      damage it dealt, the HP the actor stole, the SP it spent and the
+      characters it added to the end of the queue (the whole queue for a
+      skill that rebuilds it). The skill a Sorcerer's attack picks gets its
+      own 'skill' event, sent before the attack's, with 'via' set to
+      'SorcererAttack'.
+    - a 'turn' event once the move is over, with its actor and action, both
+      players' HP and SP and whether the game is over.
+Every event also has the game_id of its GameSession and the turn number.
+
+Only moves performed by GameSessions are logged; skills used while searching
+copies of a game are not. When SINK is None, the only cost on the hot path
+is checking CONTEXT.turn in Character.attack, Character.special_attack and
+SorcererAttack.use.
+
+The turn being logged is kept per thread, so sessions playing moves on
+different threads (as server.py's may) log each skill under its own
+session's game_id and turn. Every thread shares SINK.
+"""
+import json
+import threading
+from typing import List, TextIO, Tuple, Union
+
+# The EventSink that events are sent to, or None to log nothing.
+SINK = None
+
+
+class _Context(threading.local):
+    """
+    The state of event logging in one thread.
+
+    turn - the (game_id, turn) of the move this thread is performing while
+           SINK is set, or None.
+    """
+    turn = None
+
+
+CONTEXT = _Context()
+
+
+class EventSink:
+    """
+    An abstract superclass for everything events can be sent to.
+    """
+
+    def emit(self, event: dict) -> None:
+        """
+        Take event.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """
+        Finish handling every event taken so far.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Flush this EventSink and release anything it holds.
+        """
+        self.flush()
+
+
+class ListSink(EventSink):
+    """
+    An EventSink that keeps events in a list.
+
+    events - every event taken, in order.
+    """
+    events: List[dict]
+
+    def __init__(self) -> None:
+        """
+        Initialize this ListSink with no events.
+        """
+        self.events = []
+
+    def emit(self, event: dict) -> None:
+        """
+        Add event to events.
+        """
+        self.events.append(event)
+
+
+class JsonlSink(EventSink):
+    """
+    An EventSink that writes events to a file as JSON lines, batch_size
+    events at a time. Events may be sent from several threads at once.
+
+    batch_size - the number of events held before they are written.
+    """
+    batch_size: int
+
+    def __init__(self, output: Union[str, TextIO],
+                 batch_size: int = 1024) -> None:
+        """
+        Initialize this JsonlSink writing to the file object output, or
+        appending to the file at the path output.
+        """
+        self._owns_output = isinstance(output, str)
+        self._output = open(output, 'a') if self._owns_output else output
+        self._buffer = []
+        self._lock = threading.Lock()
+        self.batch_size = batch_size
+
+    def emit(self, event: dict) -> None:
+        """
+        Add event to the batch, writing the batch once it is full.
+        """
+        with self._lock:
+            self._buffer.append(event)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write every event in the batch.
+
+        >>> import io
+        >>> output = io.StringIO()
+        >>> sink = JsonlSink(output)
+        >>> sink.emit({'event': 'turn', 'turn': 1})
+        >>> output.getvalue()
+        ''
+        >>> sink.flush()
+        >>> output.getvalue()
+        '{"event": "turn", "turn": 1}\\n'
+        """
+        with self._lock:
+            if self._buffer:
+                self._output.write(''.join(json.dumps(event) + '\n'
+                                           for event in self._buffer))
+                self._buffer = []
+            self._output.flush()
+
+    def close(self) -> None:
+        """
+        Write every event in the batch and close the file if this JsonlSink
+        opened it.
+        """
+        self.flush()
+        if self._owns_output:
+            self._output.close()
+
+
+def set_sink(sink: Union[EventSink, None]) -> Union[EventSink, None]:
+    """
+    Send events to sink from now on (or stop logging if sink is None) and
+    return the previous sink, flushed.
+    """
+    global SINK
+    previous = SINK
+    if previous is not None:
+        previous.flush()
+    SINK = sink
+    return previous
+
+
+def _get_queue_names(battle_queue: 'BattleQueue') -> Tuple[str, ...]:
+    """
+    Return the names of the characters in battle_queue, in order.
+    """
+    state = battle_queue.get_state()
+    return tuple(state[who - 1][0] for who in state[2])
+
+
+def log_skill(skill: 'Skill', caster: 'Character', target: 'Character',
+              via: 'Skill' = None) -> None:
+    """
+    Make caster use skill on target and send a 'skill' event about it to
+    SINK.
+
+    via is the skill that used skill on caster's behalf, if any.
+    """
+    caster_hp, caster_sp, target_hp = \
+        caster.get_hp(), caster.get_sp(), target.get_hp()
+    queue = _get_queue_names(caster.battle_queue)
+
+    skill.use(caster, target)
+
+    after = _get_queue_names(caster.battle_queue)
+    queued = after[len(queue):] if after[:len(queue)] == queue else after
+    game_id, turn = CONTEXT.turn
+    event = {'event': 'skill', 'game': game_id, 'turn': turn,
+             'actor': caster.get_name(), 'target': target.get_name(),
+             'skill': type(skill).__name__,
+             'damage': target_hp - target.get_hp(),
+             'lifesteal': max(0, caster.get_hp() - caster_hp),
+             'sp_spent': caster_sp - caster.get_sp(),
+             'queued': list(queued)}
+    if via is not None:
+        event['via'] = type(via).__name__
+    SINK.emit(event)
+
+
+def log_turn(session: 'GameSession', actor: 'Character', action: str) -> None:
+    """
+    Send a 'turn' event to SINK about actor performing action in session,
+    and stop logging skills in this thread until the next move.
+    """
+    game_id, turn = CONTEXT.turn
+    SINK.emit({'event': 'turn', 'game': game_id, 'turn': turn,
+               'actor': actor.get_name(), 'action': action,
+               'p1_hp': session.p1.get_hp(), 'p1_sp': session.p1.get_sp(),
+               'p2_hp': session.p2.get_hp(), 'p2_sp': session.p2.get_sp(),
+               'is_over': session.is_over,
+               'winner': session.winner.get_name() if session.winner
+                         else None})
+    CONTEXT.turn = None
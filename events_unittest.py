@@ -0,0 +1,178 @@
+"""
+Basic Unittests for the turn event log.
+
+"""
+import io
+import json
+import threading
+import unittest
+from unittest import mock
+
+import events
+from events import JsonlSink, ListSink, set_sink
+from game import create_session
+from playstyle import create_rng
+
+
+class EventsUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up a ListSink to send events to.
+        """
+        self.sink = ListSink()
+        set_sink(self.sink)
+
+    def tearDown(self):
+        """
+        Stop logging events.
+        """
+        set_sink(None)
+
+    def test_vampire_events(self):
+        """
+        Test to make sure a Vampire's special attack logs its damage,
+        lifesteal and queue additions, followed by the turn.
+        """
+        session = create_session('n', 'v', 'V', 'm', 'm', 'M', 'm')
+        session.perform_attack('S')
+
+        skill, turn = self.sink.events
+        self.assertEqual({'event': 'skill', 'game': session.game_id,
+                          'turn': 1, 'actor': 'V', 'target': 'M',
+                          'skill': 'VampireSpecial', 'damage': 22,
+                          'lifesteal': 22, 'sp_spent': 20,
+                          'queued': ['V', 'V', 'M']}, skill)
+        self.assertEqual('turn', turn['event'])
+        self.assertEqual(('V', 'S', 78, 122),
+                         (turn['actor'], turn['action'], turn['p2_hp'],
+                          turn['p1_hp']))
+
+    def test_sorcerer_picked_skill(self):
+        """
+        Test to make sure the skill a Sorcerer's attack picks is logged
+        before the attack itself.
+        """
+        session = create_session('n', 's', 'S', 'm', 'v', 'V', 'm')
+        session.perform_attack('A')
+
+        picked, attack, _ = self.sink.events
+        self.assertEqual('SorcererAttack', picked['via'])
+        self.assertEqual('SorcererAttack', attack['skill'])
+        self.assertNotIn('via', attack)
+        self.assertEqual(picked['damage'], attack['damage'])
+
+    def test_search_is_not_logged(self):
+        """
+        Test to make sure skills used while a Minimax playstyle searches
+        aren't logged, so a whole game logs one skill per turn plus the
+        skills Sorcerers pick.
+        """
+        session = create_session('n', 'm', 'M', 'mr', 's', 'S', 'r')
+        while not session.is_over and session.perform_attack():
+            pass
+
+        turns = [event for event in self.sink.events
+                 if event['event'] == 'turn']
+        skills = [event for event in self.sink.events
+                  if event['event'] == 'skill' and 'via' not in event]
+        self.assertEqual(session.turns, len(turns))
+        self.assertEqual(session.turns, len(skills))
+        self.assertTrue(turns[-1]['is_over'])
+
+    def test_restricted_vampire_and_sorcerer(self):
+        """
+        Test to make sure a logged Vampire vs Sorcerer game on a restricted
+        queue plays to the end and logs every turn.
+        """
+        session = create_session('r', 'v', 'V', 'r', 's', 'S', 'r',
+                                 create_rng(0, 6))
+        while not session.is_over and session.perform_attack():
+            pass
+
+        turns = [event for event in self.sink.events
+                 if event['event'] == 'turn']
+        self.assertEqual(list(range(1, session.turns + 1)),
+                         [turn['turn'] for turn in turns])
+        self.assertEqual(session.is_over, turns[-1]['is_over'])
+
+    def test_failed_move_stops_logging(self):
+        """
+        Test to make sure a move whose skill raises leaves no turn set, so
+        later searches aren't logged as part of it.
+        """
+        session = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+        with mock.patch.object(session.p1, 'attack',
+                               side_effect=IndexError):
+            with self.assertRaises(IndexError):
+                session.perform_attack('A')
+        self.assertIsNone(events.CONTEXT.turn)
+
+        session.battle_queue.copy().peek().attack()
+        self.assertEqual([], self.sink.events)
+
+    def test_threads_log_their_own_turns(self):
+        """
+        Test to make sure moves performed on two threads at once are each
+        logged under their own session.
+        """
+        first = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+        second = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+        second.perform_attack('A')
+        started, resume = threading.Event(), threading.Event()
+        attack = first.p1.get_skill('A')
+        use = attack.use
+
+        def wait_and_use(caster, target):
+            started.set()
+            resume.wait(5)
+            use(caster, target)
+
+        with mock.patch.object(attack, 'use', side_effect=wait_and_use):
+            thread = threading.Thread(target=first.perform_attack,
+                                      args=('A',))
+            thread.start()
+            started.wait(5)
+            second.perform_attack('A')
+            resume.set()
+            thread.join(5)
+
+        logged = [(event['event'], event['game'], event['turn'])
+                  for event in self.sink.events]
+        self.assertEqual(
+            [('skill', second.game_id, 1), ('turn', second.game_id, 1),
+             ('skill', second.game_id, 2), ('turn', second.game_id, 2),
+             ('skill', first.game_id, 1), ('turn', first.game_id, 1)],
+            logged)
+
+    def test_disabled(self):
+        """
+        Test to make sure nothing is logged without a sink.
+        """
+        set_sink(None)
+        session = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+        session.perform_attack('A')
+
+        self.assertEqual([], self.sink.events)
+        self.assertIsNone(events.CONTEXT.turn)
+
+    def test_jsonl_sink_batches(self):
+        """
+        Test to make sure a JsonlSink writes whole batches of JSON lines.
+        """
+        output = io.StringIO()
+        set_sink(JsonlSink(output, batch_size=4))
+        session = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+        session.perform_attack('A')
+        self.assertEqual('', output.getvalue())
+
+        session.perform_attack('A')
+        self.assertEqual(4, len(output.getvalue().splitlines()))
+        session.perform_attack('A')
+        set_sink(None)
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([1, 1, 2, 2, 3, 3], [line['turn'] for line in lines])
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
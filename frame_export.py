@@ -0,0 +1,121 @@
+"""
+Export replays as sequences of PNG frames, with no display.
+
+Every frame is drawn by the same code as ui.py (see ui.get_layers and
+ui.draw_frame) on an off-screen surface, using SDL's dummy video driver. A
+replay is drawn like a game watched in ui.py: frames_per_turn animation
+frames before the first move and after every move.
+
+Replays are drawn in parallel worker processes. The sprites are loaded once
+in this process before the workers start, so on platforms that fork the
+workers share them; elsewhere each worker loads them once.
+
+Run this file to export every replay in an archive (see replay.py).
+"""
+import argparse
+import multiprocessing
+import os
+from typing import Iterable, Iterator, Tuple
+
+# Draw without a display, and let SDL leave SIGTERM to the worker pool.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+
+import pygame
+import ui
+from game import create_session
+from replay import Replay, read_archive
+
+FRAMES_PER_TURN = ui.AI_MOVE_TIME // ui.GAME_SPEED
+
+
+def load_assets() -> None:
+    """
+    Load the sprites, background and font of ui.py for off-screen drawing,
+    unless they are loaded already.
+    """
+    if ui.BACKGROUND is None:
+        ui.init_pygame().display.set_mode((1, 1))
+        ui.load_assets()
+
+
+def get_frame_size() -> Tuple[int, int]:
+    """
+    Return the (width, height) of a frame, the size of the ui.py window.
+    """
+    return (ui.NUMBER_OF_CHARACTERS * ui.CHARACTER_SIZE,
+            ui.CHARACTER_SIZE + ui.PADDING * 2)
+
+
+def export_replay(task: Tuple[Replay, str, int]) -> Tuple[str, int]:
+    """
+    Draw the replay of a (replay, directory, frames_per_turn) task as
+    frame_00000.png, frame_00001.png, ... in directory, creating it if
+    needed, and return the directory and the number of frames written.
+    """
+    replay, directory, frames_per_turn = task
+    load_assets()
+    os.makedirs(directory, exist_ok=True)
+
+    session = create_session(**replay.setup)
+    surface = pygame.Surface(get_frame_size())
+    frame = 0
+    for turn in range(len(replay.moves) + 1):
+        if turn:
+            session.apply_move(replay.moves[turn - 1])
+        for _ in range(frames_per_turn):
+            ui.draw_frame(surface, ui.get_layers(session.ui_state(), session))
+            pygame.image.save(surface, os.path.join(
+                directory, 'frame_{:05d}.png'.format(frame)))
+            frame += 1
+    return directory, frame
+
+
+def export_replays(replays: Iterable[Replay], directory: str,
+                   processes: int = None,
+                   frames_per_turn: int = FRAMES_PER_TURN) \
+        -> Iterator[Tuple[str, int]]:
+    """
+    Draw every replay in replays into its own directory in directory,
+    named game_00000, game_00001, ... in order, across processes worker
+    processes (one per CPU by default), and yield the (directory, number of
+    frames) of each replay as it finishes, in order.
+
+    If processes is 1, the replays are drawn in this process.
+    """
+    tasks = ((replay, os.path.join(directory, 'game_{:05d}'.format(i)),
+              frames_per_turn)
+             for i, replay in enumerate(replays))
+
+    load_assets()
+    pool = None
+    try:
+        if processes == 1:
+            results = map(export_replay, tasks)
+        else:
+            pool = multiprocessing.Pool(processes)
+            results = pool.imap(export_replay, tasks)
+
+        for result in results:
+            yield result
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    PARSER.add_argument('archive', help="replay archive to export")
+    PARSER.add_argument('output', help="directory to write frames to")
+    PARSER.add_argument('--processes', type=int, default=None)
+    PARSER.add_argument('--frames-per-turn', type=int,
+                        default=FRAMES_PER_TURN)
+    ARGS = PARSER.parse_args()
+
+    TOTAL = 0
+    for DIRECTORY, FRAMES in export_replays(read_archive(ARGS.archive),
+                                            ARGS.output, ARGS.processes,
+                                            ARGS.frames_per_turn):
+        TOTAL += FRAMES
+        print("{}: {} frames".format(DIRECTORY, FRAMES))
+    print("Wrote {} frames".format(TOTAL))
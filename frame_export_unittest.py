@@ -0,0 +1,71 @@
+"""
+Basic Unittests for exporting replays as PNG frames.
+
+"""
+import os
+import tempfile
+import unittest
+
+import pygame
+
+import frame_export
+import ui
+from game import create_session
+from replay import ReplayRecorder
+from simulation import GameSpec, create_spec_session
+
+
+class FrameExportUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up replays of two finished games.
+        """
+        self.replays = []
+        for p1, p2 in [('m', 'v'), ('s', 'r')]:
+            session = create_spec_session(GameSpec(p1, p2, seed=2))
+            recorder = ReplayRecorder(session, seed=2)
+            while not session.is_over and session.perform_attack():
+                pass
+            self.replays.append(recorder.replay)
+
+    def test_frames_written_for_every_turn(self):
+        """
+        Test to make sure every replay gets frames_per_turn frames for its
+        start and each of its moves, from worker processes.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            results = list(frame_export.export_replays(
+                self.replays, directory, processes=2, frames_per_turn=2))
+
+            self.assertEqual([os.path.join(directory, 'game_00000'),
+                              os.path.join(directory, 'game_00001')],
+                             [result[0] for result in results])
+            for replay, (game_directory, frames) in zip(self.replays,
+                                                        results):
+                self.assertEqual(2 * (len(replay.moves) + 1), frames)
+                self.assertEqual(frames, len(os.listdir(game_directory)))
+
+    def test_last_frame_matches_ui(self):
+        """
+        Test to make sure the last frame is the final state of the game as
+        ui.py draws it.
+        """
+        replay = self.replays[0]
+        with tempfile.TemporaryDirectory() as directory:
+            _, frames = frame_export.export_replay((replay, directory, 1))
+            image = pygame.image.load(os.path.join(
+                directory, 'frame_{:05d}.png'.format(frames - 1)))
+
+        session = create_session(**replay.setup)
+        session.ui_state()
+        for move in replay.moves:
+            session.apply_move(move)
+            layers = ui.get_layers(session.ui_state(), session)
+        expected = pygame.Surface(frame_export.get_frame_size())
+        ui.draw_frame(expected, layers)
+        self.assertEqual(pygame.image.tostring(expected, 'RGB'),
+                         pygame.image.tostring(image, 'RGB'))
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
@@ -1,9 +1,12 @@
 
 # Import classes as needed
+import argparse
+import itertools
+from typing import Any, Iterator, Union
+import events
 from battle_queue import BattleQueue, RestrictedBattleQueue
 from playstyle import ManualPlaystyle, RandomPlaystyle, MinimaxRecursive, MinimaxIterative
 from characters import Mage, Rogue, Vampire, Sorcerer
-from skill_decision_tree import create_default_tree
 
 # v map to your class for your Vampire
 # s map to your class for your Sorcerer
@@ -25,6 +28,242 @@ BATTLE_QUEUE_CLASSES = {'n': BattleQueue,
                         'r': RestrictedBattleQueue
                         }
 
+_GAME_IDS = itertools.count()
+
+
+class GameSession:
+    """
+    A single game: its battle queue, players and progress.
+
+    Any number of GameSessions can run in one process.
+
+    battle_queue - the BattleQueue the game is played in.
+    p1, p2 - the two characters.
+    last_key_pressed - the last key passed to a manual playstyle.
+    is_over - whether the game is over.
+    winner - the character that won, or None.
+    turns - the number of actions performed so far.
+    setup - the arguments of create_session the game was created with, or
+            None.
+    recorder - an object whose record method is called with this
+               GameSession and every move performed, or None.
+    game_id - the number that identifies this game in events.
+    """
+    battle_queue: 'BattleQueue'
+    p1: 'Character'
+    p2: 'Character'
+    last_key_pressed: Union[str, None]
+    is_over: bool
+    winner: Union['Character', None]
+    turns: int
+    setup: Union[dict, None]
+    recorder: Any
+    game_id: int
+
+    def __init__(self, battle_queue: 'BattleQueue', p1: 'Character',
+                 p2: 'Character') -> None:
+        """
+        Initialize this GameSession with p1 and p2 already added to
+        battle_queue.
+        """
+        self.battle_queue = battle_queue
+        self.p1 = p1
+        self.p2 = p2
+        self.last_key_pressed = None
+        self.is_over = battle_queue.is_over()
+        self.winner = battle_queue.get_winner()
+        self.turns = 0
+        self.setup = None
+        self.recorder = None
+        self.game_id = next(_GAME_IDS)
+
+    def perform_attack(self, key: str = None) -> bool:
+        """
+        Uses the next character's playstyle to decide on and perform an
+        attack. key is the key pressed for a manual playstyle, if any.
+
+        Return whether an attack was performed.
+        """
+        if key is not None:
+            self.last_key_pressed = key
+
+        # Get the next character in the battle queue, but don't remove them.
+        next_character = self.battle_queue.peek()
+        playstyle = next_character.playstyle
+
+        # Uses the next character's playstyle to select an attack
+        if playstyle.is_manual:
+            move_to_make = playstyle.select_attack(self.last_key_pressed,
+                                                   self.battle_queue)
+        else:
+            move_to_make = playstyle.select_attack(
+                battle_queue=self.battle_queue)
+
+        return self.apply_move(move_to_make)
+
+    def can_fast_forward(self) -> bool:
+        """
+        Return whether neither player uses a manual playstyle.
+        """
+        return not (self.p1.playstyle.is_manual or
+                    self.p2.playstyle.is_manual)
+
+    def fast_forward(self, every: int = 0) -> Iterator[int]:
+        """
+        Perform the moves both players' playstyles pick until the game is
+        over, yielding the number of turns played after every every turns
+        (if every isn't 0) and once more when the game is over.
+
+        Nothing waits between moves, so a caller drawing only the turns
+        yielded plays the game as fast as it can be simulated.
+
+        >>> from random import Random
+        >>> session = create_session('n', 'm', 'M', 'r', 'r', 'R', 'r',
+        ...                          Random(0))
+        >>> turns = list(session.fast_forward(5))
+        >>> turns[-1] == session.turns and session.is_over
+        True
+        >>> all(turn % 5 == 0 for turn in turns[:-1])
+        True
+        """
+        if not self.can_fast_forward():
+            raise ValueError("Only games between computer-controlled "
+                             "players can be fast-forwarded")
+        if every < 0:
+            raise ValueError("Can't fast-forward every {} turns".format(
+                every))
+        while not self.is_over:
+            self.perform_attack()
+            if every and self.turns % every == 0 and not self.is_over:
+                yield self.turns
+        yield self.turns
+
+    def apply_move(self, move_to_make: str) -> bool:
+        """
+        Make the next character perform move_to_make ('A' or 'S'), whatever
+        their playstyle would pick.
+
+        Return whether an attack was performed.
+        """
+        next_character = self.battle_queue.peek()
+
+        # Check if the next_character can make that action ('A' represents
+        # a normal attack, 'S' represents a special attack.)
+        # If a move that is not 'A' or 'S' is passed in, this should return
+        # False.
+        performed = next_character.is_valid_action(move_to_make)
+
+        # Stop logging skills once the move is over, even if it fails, so
+        # moves searched afterwards aren't logged as this one
+        try:
+            if performed:
+                if events.SINK is not None:
+                    events.CONTEXT.turn = (self.game_id, self.turns + 1)
+                if move_to_make == 'A':
+                    next_character.attack()
+                else:
+                    next_character.special_attack()
+                self.turns += 1
+
+                # Call remove() to remove the next_character from the
+                # battle_queue (if they still have SP; otherwise the next call
+                # to remove() should skip them)
+                if next_character.get_available_actions() != []:
+                    self.battle_queue.remove()
+
+                if self.recorder is not None:
+                    self.recorder.record(self, move_to_make)
+
+            # Check if the game is over.
+            self.is_over = self.battle_queue.is_over()
+
+            # Get the winner of the game. If the game is not over yet,
+            # get_winner() should return None. Otherwise, it should return the
+            # character that won.
+            self.winner = self.battle_queue.get_winner()
+
+            if events.CONTEXT.turn is not None:
+                events.log_turn(self, next_character, move_to_make)
+        finally:
+            events.CONTEXT.turn = None
+        return performed
+
+    def ui_state(self) -> dict:
+        """
+        Return the parameters to update the UI for this game.
+
+        This advances both characters' sprite animations by one frame.
+        """
+        if not self.battle_queue.is_over():
+            # Get the actions that the current player can make (this should
+            # be a list containing 'A' and/or 'S', or be empty if there are
+            # no actions.)
+            current = self.battle_queue.peek()
+            current_available_actions = current.get_available_actions()
+            current_player = current.get_name()
+        else:
+            current_available_actions = []
+            current_player = None
+
+        return {'p1_sprite': self.p1.get_next_sprite(),
+                'p2_sprite': self.p2.get_next_sprite(),
+                'p1_hp': self.p1.get_hp(),
+                'p2_hp': self.p2.get_hp(),
+                'p1_sp': self.p1.get_sp(),
+                'p2_sp': self.p2.get_sp(),
+                'p1_name': self.p1.get_name(),
+                'p2_name': self.p2.get_name(),
+                'actions': current_available_actions,
+                'current_player': current_player}
+
+
+def create_session(queue: str, p1: str, p1_name: str, p1_playstyle: str,
+                   p2: str, p2_name: str, p2_playstyle: str,
+                   rng: 'Random' = None) -> GameSession:
+    """
+    Return a new GameSession using the keys of BATTLE_QUEUE_CLASSES,
+    CHARACTER_CLASSES and PLAYSTYLE_CLASSES.
+
+    If rng is given, both players' RandomPlaystyles pick their moves with it
+    instead of the global random generator.
+
+    >>> session = create_session('n', 'm', 'Merlin', 'r', 'r', 'Robin', 'r')
+    >>> session.battle_queue
+    Merlin (Mage): 100/100 -> Robin (Rogue): 100/100
+    """
+    battle_queue = BATTLE_QUEUE_CLASSES[queue]()
+
+    # Call the corresponding __init__ for each player's character class
+    # The parameters passed in are: their name, the battle queue and an
+    # instance of their playstyle
+    player_1 = CHARACTER_CLASSES[p1](
+        p1_name, battle_queue, PLAYSTYLE_CLASSES[p1_playstyle](battle_queue))
+    player_2 = CHARACTER_CLASSES[p2](
+        p2_name, battle_queue, PLAYSTYLE_CLASSES[p2_playstyle](battle_queue))
+
+    if rng is not None:
+        for player in (player_1, player_2):
+            if isinstance(player.playstyle, RandomPlaystyle):
+                player.playstyle.rng = rng
+
+    # Set the enemy attribute of the characters
+    player_1.enemy = player_2
+    player_2.enemy = player_1
+
+    # Add the characters to the Battle Queue
+    battle_queue.add(player_1)
+    battle_queue.add(player_2)
+
+    session = GameSession(battle_queue, player_1, player_2)
+    session.setup = {'queue': queue, 'p1': p1, 'p1_name': p1_name,
+                     'p1_playstyle': p1_playstyle, 'p2': p2,
+                     'p2_name': p2_name, 'p2_playstyle': p2_playstyle}
+    return session
+
+
+# The session driven by the module-level functions below, which ui.py and
+# ui_nonpygame.py use. Its state is mirrored in the globals after each call.
+DEFAULT_SESSION = None
 BATTLE_QUEUE = None
 LAST_KEY_PRESSED = None
 P1 = None
@@ -32,49 +271,61 @@ P2 = None
 GAME_IS_OVER = False
 GAME_WINNER = None
 
+
+def _sync_globals() -> None:
+    """
+    Copy the state of DEFAULT_SESSION into the module globals.
+    """
+    global BATTLE_QUEUE, P1, P2, GAME_IS_OVER, GAME_WINNER
+
+    BATTLE_QUEUE = DEFAULT_SESSION.battle_queue
+    P1 = DEFAULT_SESSION.p1
+    P2 = DEFAULT_SESSION.p2
+    GAME_IS_OVER = DEFAULT_SESSION.is_over
+    GAME_WINNER = DEFAULT_SESSION.winner
+
+
 def perform_attack():
     """
-    Uses the next character's playstyle to decide on and perform an attack.
+    Uses the next character's playstyle in DEFAULT_SESSION to decide on and
+    perform an attack, using LAST_KEY_PRESSED for manual playstyles.
     """
-    global BATTLE_QUEUE, GAME_IS_OVER, GAME_WINNER, LAST_KEY_PRESSED
-    
-    # Get the next character in the battle queue, but don't remove them.
-    next_character = BATTLE_QUEUE.peek()
-    playstyle = next_character.playstyle
-    
-    # Uses the next character's playstyle to select an attack
-    if playstyle.is_manual:
-        move_to_make = playstyle.select_attack(LAST_KEY_PRESSED)
-    else:
-        move_to_make = playstyle.select_attack()
-    
-    # Check if the next_character can make that action ('A' represents
-    # a normal attack, 'S' represents a special attack.)
-    # If a move that is not 'A' or 'S' is passed in, this should return False.
-    if next_character.is_valid_action(move_to_make):
-        if move_to_make == 'A':
-            next_character.attack()
-        else:
-            next_character.special_attack()
+    DEFAULT_SESSION.perform_attack(LAST_KEY_PRESSED)
+    _sync_globals()
 
-        # Call remove() to remove the next_character from the battle_queue
-        # (if they still have SP; otherwise the next call to remove()
-        # should skip them)
-        if next_character.get_available_actions() != []:
-            BATTLE_QUEUE.remove()
-    
-    # Check if the game is over.
-    GAME_IS_OVER = BATTLE_QUEUE.is_over()
-    
-    # Get the winner of the game. If the game is not over yet, get_winner()
-    # should return None. Otherwise, it should return the character that won.
-    GAME_WINNER = BATTLE_QUEUE.get_winner()
+def fast_forward_every(text: str) -> int:
+    """
+    Return text as the N of a --fast-forward N flag: the number of turns
+    between the turns drawn, or 0 to draw only the end of the game.
+
+    >>> fast_forward_every('0')
+    0
+    >>> fast_forward_every('-1')
+    Traceback (most recent call last):
+    ...
+    argparse.ArgumentTypeError: must be at least 0, not -1
+    """
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(
+            "must be at least 0, not {}".format(value))
+    return value
+
+def fast_forward(every: int = 0) -> Iterator[int]:
+    """
+    Fast-forward DEFAULT_SESSION (see GameSession.fast_forward), copying its
+    state into the module globals at every turn yielded.
+    """
+    for turns in DEFAULT_SESSION.fast_forward(every):
+        _sync_globals()
+        yield turns
 
-def set_up_game():
+def set_up_game() -> GameSession:
     """
-    Sets up the battle queue and characters for the game.
+    Sets up the battle queue and characters for the game in DEFAULT_SESSION,
+    and return it.
     """
-    global P1, P2, BATTLE_QUEUE
+    global DEFAULT_SESSION
     
     # Create a new battle queue
     bq = ''
@@ -82,8 +333,6 @@ def set_up_game():
         bq = input("Select a Battle Queue type (n for a Normal Battle Queue, " +
                    "r for a Restricted Battle Queue): ").strip()
     
-    BATTLE_QUEUE = BATTLE_QUEUE_CLASSES[bq]()
-    
     # Get the parameters for the first character
     player_1 = ''
     player_1_playstyle = ''
@@ -120,81 +369,19 @@ def set_up_game():
                                    "mi for Minimax (Iterative)): ")
         player_2_playstyle = player_2_playstyle.strip()
     
-    # Store the classes in other variable names for convenience
-    P1_Character = CHARACTER_CLASSES[player_1]
-    P2_Character = CHARACTER_CLASSES[player_2]
-    p1_playstyle = PLAYSTYLE_CLASSES[player_1_playstyle](BATTLE_QUEUE)
-    p2_playstyle = PLAYSTYLE_CLASSES[player_2_playstyle](BATTLE_QUEUE)
-    
-    # Call the corresponding __init__ for each player's character class
-    # The parameters passed in are: their name, the battle queue and an 
-    # instance of their playstyle
-    P1 = P1_Character(player_1_name, BATTLE_QUEUE, p1_playstyle)
-    P2 = P2_Character(player_2_name, BATTLE_QUEUE, p2_playstyle)
-    
-    if player_1 == 's':
-        default_tree = create_default_tree()
-        P1.set_skill_decision_tree(default_tree)
-    
-    if player_2 == 's':
-        default_tree = create_default_tree()
-        P2.set_skill_decision_tree(default_tree)        
-    
-    # Set the enemy attribute of the characters
-    # You can assume this will be called before any attacks are performed
-    P1.enemy = P2
-    P2.enemy = P1
-    
-    # Add the characters to the Battle Queue
-    BATTLE_QUEUE.add(P1)
-    BATTLE_QUEUE.add(P2)
+    DEFAULT_SESSION = create_session(bq, player_1, player_1_name,
+                                     player_1_playstyle, player_2,
+                                     player_2_name, player_2_playstyle)
+    _sync_globals()
+    return DEFAULT_SESSION
+
 
 def update_ui():
     """
-    Return the parameters to update the UI for the game.
+    Return the parameters to update the UI for DEFAULT_SESSION.
     
     Note: This function is a bit silly, but the alternative was either calling
     pygame methods here, or having you read through a1_ui.py to find client
     code. Silly is the better option, in this case. :)
     """
-    global P1, P2, BATTLE_QUEUE
-    
-    # Get the names
-    p1_name = P1.get_name()
-    p2_name = P2.get_name()
-    
-    # Get the sprite to draw
-    p1_current_sprite = P1.get_next_sprite()
-    p2_current_sprite = P2.get_next_sprite()
-    
-    # Get the character HPs
-    p1_current_hp = P1.get_hp()
-    p2_current_hp = P2.get_hp()
-    
-    # Get the character SPs
-    p1_current_sp = P1.get_sp()
-    p2_current_sp = P2.get_sp()
-    
-    if not BATTLE_QUEUE.is_over():
-        # Get the actions that the current player can make (this should be a 
-        # list containing 'A' and/or 'S', or be empty if there are no actions.)
-        current_available_actions = BATTLE_QUEUE.peek().get_available_actions()
-        
-        # Get the current player's name
-        current_player = BATTLE_QUEUE.peek().get_name()
-    else:
-        current_available_actions = []
-        current_player = None
-        
-    ui_to_draw = {'p1_sprite': p1_current_sprite,
-                  'p2_sprite': p2_current_sprite,
-                  'p1_hp': p1_current_hp,
-                  'p2_hp': p2_current_hp,
-                  'p1_sp': p1_current_sp,
-                  'p2_sp': p2_current_sp,
-                  'p1_name': p1_name,
-                  'p2_name': p2_name,
-                  'actions': current_available_actions,
-                  'current_player': current_player}
-    
-    return ui_to_draw
+    return DEFAULT_SESSION.ui_state()
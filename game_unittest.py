@@ -0,0 +1,101 @@
+"""
+Basic Unittests for GameSession.
+
+"""
+import unittest
+
+import game
+from game import create_session
+
+
+class GameSessionUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up two independent manual sessions.
+        """
+        self.session_1 = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+        self.session_2 = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+
+    def tearDown(self):
+        """
+        Delete the attributes that were created in setUp.
+        """
+        del self.session_1
+        del self.session_2
+
+    def test_sessions_are_independent(self):
+        """
+        Test to make sure attacking in one session doesn't change another.
+        """
+        self.assertTrue(self.session_1.perform_attack('A'))
+
+        self.assertEqual(90, self.session_1.ui_state()['p2_hp'])
+        self.assertEqual(1, self.session_1.turns)
+        self.assertEqual(100, self.session_2.ui_state()['p2_hp'])
+        self.assertEqual(0, self.session_2.turns)
+
+    def test_invalid_key_does_nothing(self):
+        """
+        Test to make sure an invalid key doesn't perform an attack.
+        """
+        self.assertFalse(self.session_1.perform_attack('X'))
+        self.assertEqual('M', self.session_1.ui_state()['current_player'])
+
+    def test_game_over(self):
+        """
+        Test to make sure a session reports its winner once the game ends.
+        """
+        self.session_1.p2.set_hp(10)
+        self.session_1.perform_attack('S')
+
+        self.assertTrue(self.session_1.is_over)
+        self.assertIs(self.session_1.p1, self.session_1.winner)
+        self.assertEqual([], self.session_1.ui_state()['actions'])
+
+    def test_module_functions_use_default_session(self):
+        """
+        Test to make sure the module-level functions drive DEFAULT_SESSION
+        and mirror it in the globals.
+        """
+        game.DEFAULT_SESSION = self.session_1
+        game.LAST_KEY_PRESSED = 'A'
+        game.perform_attack()
+
+        self.assertIs(self.session_1.battle_queue, game.BATTLE_QUEUE)
+        self.assertFalse(game.GAME_IS_OVER)
+        self.assertEqual(90, game.update_ui()['p2_hp'])
+
+    def test_fast_forward_needs_computer_players(self):
+        """
+        Test to make sure only games without manual players can be
+        fast-forwarded.
+        """
+        self.assertFalse(self.session_1.can_fast_forward())
+        with self.assertRaises(ValueError):
+            next(self.session_1.fast_forward())
+
+    def test_fast_forward_rejects_negative_interval(self):
+        """
+        Test to make sure a game can't be fast-forwarded every -1 turns.
+        """
+        session = create_session('n', 'm', 'M', 'r', 'r', 'R', 'r')
+        with self.assertRaises(ValueError):
+            next(session.fast_forward(-1))
+        self.assertEqual(0, session.turns)
+
+    def test_fast_forward_yields_every_nth_turn(self):
+        """
+        Test to make sure fast-forwarding plays the whole game, yielding
+        every nth turn and the end, and keeps the globals in step.
+        """
+        game.DEFAULT_SESSION = create_session('n', 'v', 'V', 'r',
+                                              's', 'S', 'r')
+        turns = list(game.fast_forward(3))
+
+        self.assertTrue(game.GAME_IS_OVER)
+        self.assertEqual(game.DEFAULT_SESSION.turns, turns[-1])
+        self.assertEqual(list(range(3, turns[-1], 3)), turns[:-1])
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
@@ -247,6 +247,20 @@ class RecursiveMinimaxUnitTests(unittest.TestCase):
                                                         expected,
                                                         actual)) 
     
+    def test_cached_scores_match(self):
+        """
+        Test to make sure get_state_score gives the same scores with a cache,
+        both when filling it and when reading from it.
+        """
+        self.p1.set_hp(30)
+        self.p2.set_hp(25)
+        expected = get_state_score(self.battle_queue)
+        cache = {}
+
+        self.assertEqual(expected, get_state_score(self.battle_queue, cache))
+        self.assertIn(self.battle_queue.get_state(), cache)
+        self.assertEqual(expected, get_state_score(self.battle_queue, cache))
+        
         
 if __name__ == "__main__":
     unittest.main(exit = False)
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+Play games from the command line, with no prompts.
+
+Every choice game.set_up_game asks for is a flag instead, and manual players
+take their moves from a move script instead of the keyboard, so games can be
+scripted without piping stdin. --count N plays N games with the same setup
+in this one process and reports the results of all of them. For example:
+
+    python play.py --p1 v --p1-playstyle mr --p2 s --count 1000 --seed 0
+
+Run this file with --help for every flag.
+"""
+import argparse
+import json
+import time
+from typing import List
+from game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES, \
+    BATTLE_QUEUE_CLASSES, GameSession, create_session
+from playstyle import Minimax, create_rng
+
+
+def play_game(session: GameSession, moves: str = '',
+              cache: dict = None) -> GameSession:
+    """
+    Play session to completion and return it.
+
+    Manual players perform the moves in moves ('A's and 'S's) in order,
+    whichever of them is acting; other players pick their own moves. If
+    cache is given, session's Minimax playstyles share it (see
+    Minimax.cache).
+
+    Raise a ValueError if a manual player has to act after moves runs out,
+    or a move in it can't be performed.
+
+    >>> session = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+    >>> play_game(session, 'A' * 19).winner.get_name()
+    'M'
+    >>> play_game(create_session('n', 'm', 'M', 'm', 'r', 'R', 'r'), 'AX')
+    Traceback (most recent call last):
+    ...
+    ValueError: Move 2 of the script ('X') can't be performed
+    """
+    for character in (session.p1, session.p2):
+        if isinstance(character.playstyle, Minimax):
+            character.playstyle.cache = cache
+
+    script = iter(moves.upper())
+    used = 0
+    while not session.is_over:
+        if session.battle_queue.peek().playstyle.is_manual:
+            move = next(script, None)
+            if move is None:
+                raise ValueError("The move script ran out on turn {}".format(
+                    session.turns + 1))
+            used += 1
+            if not session.apply_move(move):
+                raise ValueError("Move {} of the script ({!r}) can't be "
+                                 "performed".format(used, move))
+        elif not session.perform_attack():
+            # A playstyle that can't find a valid move would otherwise stall
+            # the game forever.
+            break
+    return session
+
+
+def play_games(setup: dict, count: int = 1, moves: str = '',
+               seed: int = None) -> dict:
+    """
+    Play count games created with the create_session arguments in setup,
+    each with the move script moves (see play_game), and return their
+    results.
+
+    Raise a ValueError if count is less than 1.
+
+    If seed is given, game number i picks its random moves with
+    create_rng(seed, i). The games share one Minimax cache.
+
+    The results have the number of games, p1_wins, p2_wins and draws, the
+    total turns and the seconds taken.
+
+    >>> results = play_games({'queue': 'n', 'p1': 'm', 'p1_name': 'M',
+    ...                       'p1_playstyle': 'r', 'p2': 'v', 'p2_name': 'V',
+    ...                       'p2_playstyle': 'r'}, 20, seed=0)
+    >>> results['games'], results['p1_wins'] + results['p2_wins'] + \\
+    ...     results['draws']
+    (20, 20)
+    """
+    if count < 1:
+        raise ValueError("At least one game must be played, not {}".format(
+            count))
+    results = {'games': count, 'p1_wins': 0, 'p2_wins': 0, 'draws': 0,
+               'turns': 0}
+    cache = {}
+    start = time.perf_counter()
+    for i in range(count):
+        rng = None if seed is None else create_rng(seed, i)
+        session = play_game(create_session(rng=rng, **setup), moves, cache)
+        if session.winner is None:
+            results['draws'] += 1
+        elif session.winner is session.p1:
+            results['p1_wins'] += 1
+        else:
+            results['p2_wins'] += 1
+        results['turns'] += session.turns
+    results['seconds'] = time.perf_counter() - start
+    return results
+
+
+def format_results(setup: dict, results: dict) -> List[str]:
+    """
+    Return the lines reporting results of games created with setup.
+
+    >>> setup = {'p1_name': 'M', 'p2_name': 'V'}
+    >>> for line in format_results(setup, {'games': 4, 'p1_wins': 1,
+    ...                                    'p2_wins': 3, 'draws': 0,
+    ...                                    'turns': 50, 'seconds': 0.5}):
+    ...     print(line)
+    M wins: 1 (25.0%)
+    V wins: 3 (75.0%)
+    Draws: 0 (0.0%)
+    Average turns: 12.5
+    4 games in 0.50s (8 games/s)
+    """
+    games = results['games']
+    lines = ["{} wins: {} ({:.1%})".format(setup['p1_name'],
+                                           results['p1_wins'],
+                                           results['p1_wins'] / games),
+             "{} wins: {} ({:.1%})".format(setup['p2_name'],
+                                           results['p2_wins'],
+                                           results['p2_wins'] / games),
+             "Draws: {} ({:.1%})".format(results['draws'],
+                                         results['draws'] / games),
+             "Average turns: {:.1f}".format(results['turns'] / games)]
+    lines.append("{} games in {:.2f}s ({:.0f} games/s)".format(
+        games, results['seconds'],
+        games / results['seconds'] if results['seconds'] else 0))
+    return lines
+
+
+def positive_int(text: str) -> int:
+    """
+    Return text as an int, for a flag that must be at least 1.
+
+    >>> positive_int('3')
+    3
+    >>> positive_int('0')
+    Traceback (most recent call last):
+    ...
+    argparse.ArgumentTypeError: must be at least 1, not 0
+    """
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(
+            "must be at least 1, not {}".format(value))
+    return value
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """
+    Return the parser of this file's command-line flags.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--queue', choices=list(BATTLE_QUEUE_CLASSES),
+                        default='n', help="n for a Normal Battle Queue, r "
+                                          "for a Restricted Battle Queue")
+    for player, default in [('p1', 'm'), ('p2', 'r')]:
+        parser.add_argument('--' + player, choices=list(CHARACTER_CLASSES),
+                            default=default,
+                            help="m for Mage, r for Rogue, v for Vampire, s "
+                                 "for Sorcerer")
+        parser.add_argument('--{}-name'.format(player),
+                            default=player.upper())
+        parser.add_argument('--{}-playstyle'.format(player),
+                            choices=list(PLAYSTYLE_CLASSES), default='r',
+                            help="m for Manual (moves from --moves), r for "
+                                 "Random, mr for Minimax (Recursive), mi "
+                                 "for Minimax (Iterative)")
+    parser.add_argument('--moves', default='',
+                        help="moves for manual players, e.g. ASSA")
+    parser.add_argument('--count', type=positive_int, default=1,
+                        help="number of games to play")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="root seed of the random moves")
+    parser.add_argument('--json', action='store_true',
+                        help="print the results as JSON")
+    return parser
+
+
+if __name__ == '__main__':
+    PARSER = create_parser()
+    ARGS = PARSER.parse_args()
+    SETUP = {'queue': ARGS.queue,
+             'p1': ARGS.p1, 'p1_name': ARGS.p1_name,
+             'p1_playstyle': ARGS.p1_playstyle,
+             'p2': ARGS.p2, 'p2_name': ARGS.p2_name,
+             'p2_playstyle': ARGS.p2_playstyle}
+
+    try:
+        RESULTS = play_games(SETUP, ARGS.count, ARGS.moves, ARGS.seed)
+    except ValueError as error:
+        PARSER.error(str(error))
+    if ARGS.json:
+        print(json.dumps(RESULTS))
+    else:
+        print("\n".join(format_results(SETUP, RESULTS)))
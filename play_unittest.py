@@ -0,0 +1,75 @@
+"""
+Basic Unittests for scripted games from the command line.
+
+"""
+import contextlib
+import io
+import unittest
+
+from game import create_session
+from play import create_parser, play_game, play_games
+
+
+class PlayUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up the create_session arguments of a game between a manual Mage
+        and a random Rogue.
+        """
+        self.setup = {'queue': 'n', 'p1': 'm', 'p1_name': 'M',
+                      'p1_playstyle': 'm', 'p2': 'r', 'p2_name': 'R',
+                      'p2_playstyle': 'r'}
+
+    def test_script_drives_manual_players(self):
+        """
+        Test to make sure a manual player performs the moves of the script
+        in order while the other player picks its own.
+        """
+        session = create_session(**self.setup)
+        with self.assertRaises(ValueError):
+            play_game(session, 'SA')
+        self.assertEqual(65, session.p1.get_sp())
+        self.assertFalse(session.is_over)
+
+    def test_seeded_counts_repeat(self):
+        """
+        Test to make sure games played from the same seed give the same
+        results, and every game is counted once.
+        """
+        self.setup['p1_playstyle'] = 'mr'
+        first = play_games(self.setup, 30, seed=4)
+        second = play_games(self.setup, 30, seed=4)
+
+        self.assertEqual(30, first['p1_wins'] + first['p2_wins'] +
+                         first['draws'])
+        for key in ['p1_wins', 'p2_wins', 'draws', 'turns']:
+            self.assertEqual(first[key], second[key])
+
+    def test_flags_match_setup(self):
+        """
+        Test to make sure every create_session argument has a flag.
+        """
+        args = create_parser().parse_args(
+            ['--queue', 'r', '--p1', 'v', '--p1-name', 'Vlad',
+             '--p1-playstyle', 'mi', '--p2', 's', '--p2-playstyle', 'm',
+             '--moves', 'AS', '--count', '3'])
+        self.assertEqual(('r', 'v', 'Vlad', 'mi', 's', 'P2', 'm', 'AS', 3),
+                         (args.queue, args.p1, args.p1_name,
+                          args.p1_playstyle, args.p2, args.p2_name,
+                          args.p2_playstyle, args.moves, args.count))
+
+    def test_count_must_be_positive(self):
+        """
+        Test to make sure a count below 1 is a usage error, not a crash.
+        """
+        parser = create_parser()
+        for count in ['0', '-2', 'x']:
+            with self.assertRaises(SystemExit), \
+                    contextlib.redirect_stderr(io.StringIO()):
+                parser.parse_args(['--count', count])
+        with self.assertRaises(ValueError):
+            play_games(self.setup, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
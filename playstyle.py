@@ -1,7 +1,7 @@
 """
 The Playstyle classes.
 """
-from typing import Any
+from typing import Any, Union
 import random
 from state_stack import StateStack
 
@@ -9,45 +9,59 @@ class Playstyle:
     """
     The Playstyle superclass.
     
+    Playstyles are stateless: the BattleQueue to decide on is passed to
+    select_attack, so a single Playstyle can be shared by every copy of a
+    character.
+
     is_manual - Whether the class is a manual Playstyle or not.
-    battle_queue - The BattleQueue corresponding to the game this Playstyle is
-                   being used in.
+    battle_queue - The default BattleQueue used by select_attack when none
+                   is passed in, or None.
     """
     is_manual: bool
-    battle_queue: 'BattleQueue'
+    battle_queue: Union['BattleQueue', None]
     
-    def __init__(self, battle_queue: 'BattleQueue') -> None:
+    def __init__(self, battle_queue: 'BattleQueue' = None) -> None:
         """
-        Initialize this Playstyle with BattleQueue as its battle queue.
+        Initialize this Playstyle with BattleQueue as its default battle queue.
         """
         self.battle_queue = battle_queue
         self.is_manual = True
     
-    def select_attack(self, parameter: Any = None) -> str:
+    def select_attack(self, parameter: Any = None,
+                      battle_queue: 'BattleQueue' = None) -> str:
         """
-        Return the attack for the next character in this Playstyle's
-        battle_queue to perform.
+        Return the attack for the next character in battle_queue (or in this
+        Playstyle's default battle_queue if none is given) to perform.
         
         Return 'X' if a valid move cannot be found.
         """
         raise NotImplementedError
     
-    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
+    def copy(self, new_battle_queue: 'BattleQueue' = None) -> 'Playstyle':
         """
-        Return a copy of this Playstyle which uses the BattleQueue 
-        new_battle_queue.
+        Return this Playstyle.
+
+        Playstyles hold no per-game state, so every copy of a character can
+        share the same instance. new_battle_queue is ignored.
         """
-        raise NotImplementedError
+        return self
+
+    def _get_queue(self, battle_queue: 'BattleQueue') -> 'BattleQueue':
+        """
+        Return battle_queue, or this Playstyle's default battle_queue if
+        battle_queue is None.
+        """
+        return self.battle_queue if battle_queue is None else battle_queue
 
 class ManualPlaystyle(Playstyle):
     """
     The ManualPlaystyle. Inherits from Playstyle.
     """
     
-    def select_attack(self, parameter: Any = None) -> str:
+    def select_attack(self, parameter: Any = None,
+                      battle_queue: 'BattleQueue' = None) -> str:
         """
-        Return the attack for the next character in this Playstyle's
-        battle_queue to perform.
+        Return the attack for the next character in battle_queue to perform.
         
         parameter represents a key pressed by a player.
 
@@ -57,52 +71,68 @@ class ManualPlaystyle(Playstyle):
             return parameter
 
         return 'X'
-    
-    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
-        """
-        Return a copy of this ManualPlaystyle which uses the 
-        BattleQueue new_battle_queue.
-        """
-        return ManualPlaystyle(new_battle_queue)
+
+def create_rng(seed: int, index: int = 0) -> random.Random:
+    """
+    Return the random.Random for game number index of a batch played from
+    the root seed seed.
+
+    Every (seed, index) pair gets its own stream, which is the same in every
+    process, so any game of a batch can be replayed on its own.
+
+    >>> create_rng(7, 3).random() == create_rng(7, 3).random()
+    True
+    >>> create_rng(7, 3).random() == create_rng(7, 4).random()
+    False
+    """
+    return random.Random("{}:{}".format(seed, index))
+
 
 class RandomPlaystyle(Playstyle):
     """
     The Random playstyle. Inherits from Playstyle.
+
+    rng - the random.Random moves are picked with, or the random module to
+          use its global generator.
     """
-    def __init__(self, battle_queue: 'BattleQueue') -> None:
+    rng: Union[random.Random, Any]
+
+    def __init__(self, battle_queue: 'BattleQueue' = None,
+                 rng: random.Random = None) -> None:
         """
-        Initialize this RandomPlaystyle with BattleQueue as its battle queue.
+        Initialize this RandomPlaystyle with BattleQueue as its default
+        battle queue, picking moves with rng (the global random generator
+        by default).
         """
         super().__init__(battle_queue)
         self.is_manual = False
-    
-    def select_attack(self, parameter: Any = None) -> str:
+        self.rng = random if rng is None else rng
+
+    def select_attack(self, parameter: Any = None,
+                      battle_queue: 'BattleQueue' = None) -> str:
         """
-        Return the attack for the next character in this Playstyle's
-        battle_queue to perform.
+        Return the attack for the next character in battle_queue to perform.
 
         Return 'X' if a valid move cannot be found.
         """
-        actions = self.battle_queue.peek().get_available_actions()
+        battle_queue = self._get_queue(battle_queue)
+        actions = battle_queue.peek().get_available_actions()
         
         if not actions:
             return 'X'
         
-        return random.choice(actions)
-    
-    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
-        """
-        Return a copy of this RandomPlaystyle which uses the 
-        BattleQueue new_battle_queue.
-        """
-        return RandomPlaystyle(new_battle_queue)
+        return self.rng.choice(actions)
 
 
-def get_state_score(battle_queue: 'BattleQueue') -> int:
+def get_state_score(battle_queue: 'BattleQueue', cache: dict = None) -> int:
     """
     Return an int corresponding to the highest score that the next player in
     battle_queue can guarantee.
 
+    If cache is given, it maps the states (BattleQueue.get_state) of queues
+    already searched to their scores; it is read before searching a queue and
+    updated with every queue searched.
+
     For a state that's over, the score is the HP of the character who still has
     HP if the next player who was supposed to act is the winner. If the next
     player who was supposed to act is the loser, then the score is -1 * the
@@ -134,34 +164,44 @@ def get_state_score(battle_queue: 'BattleQueue') -> int:
     """
     if battle_queue.is_over():
         return get_score_when_is_over(battle_queue)
-    else:
-        score_1, score_2 = None, None
-        curr_player = battle_queue.peek()
-        actions = curr_player.get_available_actions()
-        bq1, bq2 = battle_queue.copy(), battle_queue.copy()
-        curr_player1, curr_player2 = bq1.remove(), bq2.remove()
 
-        if 'A' in actions:
-            curr_player1.attack()
-            score_1 = get_state_score(bq1)
-        if 'S' in actions:
-            curr_player2.special_attack()
-            score_2 = get_state_score(bq2)
+    if cache is not None:
+        state = battle_queue.get_state()
+        if state in cache:
+            return cache[state]
 
-        max_ = True if curr_player1.get_name() == bq1.peek().get_name() else False
-        if max_:
-            if score_1 and score_2:
-                return max(score_1, score_2)
-            else:
-                return score_1 if score_1 else score_2 if score_2 else None
+    score_1, score_2 = None, None
+    curr_player = battle_queue.peek()
+    actions = curr_player.get_available_actions()
+    bq1, bq2 = battle_queue.copy(), battle_queue.copy()
+    curr_player1, curr_player2 = bq1.remove(), bq2.remove()
+
+    if 'A' in actions:
+        curr_player1.attack()
+        score_1 = get_state_score(bq1, cache)
+    if 'S' in actions:
+        curr_player2.special_attack()
+        score_2 = get_state_score(bq2, cache)
+
+    max_ = True if curr_player1.get_name() == bq1.peek().get_name() else False
+    if max_:
+        if score_1 and score_2:
+            score = max(score_1, score_2)
         else:
-            if score_1 and score_2:
-                return -min(score_1, score_2)
-            else:
-                return -score_1 if score_1 else -score_2 if score_2 else None
+            score = score_1 if score_1 else score_2 if score_2 else None
+    else:
+        if score_1 and score_2:
+            score = -min(score_1, score_2)
+        else:
+            score = -score_1 if score_1 else -score_2 if score_2 else None
+
+    if cache is not None:
+        cache[state] = score
+    return score
 
 
-def get_state_score_iterative(battle_queue: 'BattleQueue') -> int:
+def get_state_score_iterative(battle_queue: 'BattleQueue',
+                              cache: dict = None) -> int:
     """
     Same as get_state_score but without recursion.
 
@@ -190,6 +230,8 @@ def get_state_score_iterative(battle_queue: 'BattleQueue') -> int:
     """
     if battle_queue.is_over():
         return get_score_when_is_over(battle_queue)
+    if cache is not None and battle_queue.get_state() in cache:
+        return cache[battle_queue.get_state()]
 
     s = StateStack()
     count = 1
@@ -213,6 +255,10 @@ def get_state_score_iterative(battle_queue: 'BattleQueue') -> int:
                 else:
                     score = -min(scores)
             parent_state.score = score
+            if cache is not None:
+                cache[battle_queue.get_state()] = score
+        elif cache is not None and battle_queue.get_state() in cache:
+            parent_state.score = cache[battle_queue.get_state()]
         else:
             s.add(parent_state)
             curr_player = battle_queue.peek()
@@ -265,25 +311,38 @@ class State:
 
 
 class Minimax(Playstyle):
-    def __init__(self, battle_queue):
+    """
+    The Minimax playstyle. Inherits from Playstyle.
+
+    cache - a dict of the scores of BattleQueue states already searched,
+            shared with get_state_score_function, or None to search every
+            move from scratch. Scores only depend on the state, so a cache
+            can be shared between Minimax playstyles and games.
+    """
+    cache: Union[dict, None]
+
+    def __init__(self, battle_queue=None, cache=None):
         super().__init__(battle_queue)
         self.is_manual = False
         self.get_state_score_function = None
+        self.cache = cache
 
-    def select_attack(self, parameter: Any = None):
-        curr_player = self.battle_queue.peek()
+    def select_attack(self, parameter: Any = None,
+                      battle_queue: 'BattleQueue' = None):
+        battle_queue = self._get_queue(battle_queue)
+        curr_player = battle_queue.peek()
 
         score_1, score_2 = None, None
         actions = curr_player.get_available_actions()
-        bq1, bq2 = self.battle_queue.copy(), self.battle_queue.copy()
+        bq1, bq2 = battle_queue.copy(), battle_queue.copy()
         curr_player1, curr_player2 = bq1.remove(), bq2.remove()
 
         if 'A' in actions:
             curr_player1.attack()
-            score_1 = self.get_state_score_function(bq1)
+            score_1 = self.get_state_score_function(bq1, self.cache)
         if 'S' in actions:
             curr_player2.special_attack()
-            score_2 = self.get_state_score_function(bq2)
+            score_2 = self.get_state_score_function(bq2, self.cache)
 
         max_ = True if curr_player1 == bq1.peek() else False
         if max_:
@@ -297,39 +356,18 @@ class Minimax(Playstyle):
             else:
                 return 'A' if score_1 else 'S'
 
-    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
-        """
-        Return a copy of this Minimax Playstyle which uses the
-        BattleQueue new_battle_queue.
-        """
-        raise NotImplementedError
-
 
 class MinimaxRecursive(Minimax):
-    def __init__(self, battle_queue):
-        super().__init__(battle_queue)
+    def __init__(self, battle_queue=None, cache=None):
+        super().__init__(battle_queue, cache)
         self.get_state_score_function = get_state_score
 
-    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
-        """
-        Return a copy of this MinimaxRecursive Playstyle which uses the
-        BattleQueue new_battle_queue.
-        """
-        return MinimaxRecursive(new_battle_queue)
-
 
 class MinimaxIterative(Minimax):
-    def __init__(self, battle_queue):
-        super().__init__(battle_queue)
+    def __init__(self, battle_queue=None, cache=None):
+        super().__init__(battle_queue, cache)
         self.get_state_score_function = get_state_score_iterative
 
-    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
-        """
-        Return a copy of this MinimaxIterative Playstyle which uses the
-        BattleQueue new_battle_queue.
-        """
-        return MinimaxIterative(new_battle_queue)
-
 
 if __name__ == '__main__':
     import doctest
@@ -0,0 +1,273 @@
+"""
+A compact binary format for replaying games.
+
+A replay holds the create_session arguments of a game, the seed and index it
+was played with (see create_rng), one bit per move (0 for 'A', 1 for 'S') and
+a keyframe of the full HP, SP and queue state every keyframe_interval moves.
+Loading a replay at any turn starts from the keyframe before it, so seeking
+never replays more than keyframe_interval moves.
+
+Replays are written as:
+    - the magic bytes b'BGRP' and the format version,
+    - the seven create_session arguments as UTF-8 strings, each preceded by
+      its length in bytes,
+    - whether there is a seed, the seed, the index and keyframe_interval,
+    - the number of moves and the moves packed 8 to a byte,
+    - the number of keyframes, then each keyframe's turn, both players' HP
+      and SP, the length of the queue, a bit per queue entry (0 for the
+      first player, 1 for their enemy) and, for restricted queues, the
+      number of entries that can or can't add (which can differ from the
+      length of the queue), a bit per such entry that can add and a byte of
+      the players seen.
+An archive is a file of replays each preceded by its length, so any number
+of games can be appended to it and read back one at a time.
+"""
+import struct
+from typing import Iterable, Iterator, List, Tuple, Union
+from game import GameSession, create_session
+
+MAGIC = b'BGRP'
+VERSION = 3
+SETUP_KEYS = ['queue', 'p1', 'p1_name', 'p1_playstyle', 'p2', 'p2_name',
+              'p2_playstyle']
+KEYFRAME_INTERVAL = 32
+
+_HEADER = struct.Struct('<?qQH')
+_KEYFRAME = struct.Struct('<I4hH')
+_LENGTH = struct.Struct('<I')
+_RESTRICTIONS = struct.Struct('<H')
+
+
+def _pack_bits(bits: List[int]) -> bytes:
+    """
+    Return bits packed 8 to a byte, lowest bit first.
+
+    >>> _pack_bits([1, 0, 0, 0, 0, 0, 0, 0, 1, 1])
+    b'\\x01\\x03'
+    """
+    packed = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            packed[i // 8] |= 1 << (i % 8)
+    return bytes(packed)
+
+
+def _unpack_bits(data: bytes, count: int, offset: int = 0) -> List[int]:
+    """
+    Return the first count bits packed in data from byte offset on.
+
+    >>> _unpack_bits(b'\\x01\\x03', 10)
+    [1, 0, 0, 0, 0, 0, 0, 0, 1, 1]
+    >>> _unpack_bits(b'\\x01\\x03', 2, 1)
+    [1, 1]
+    """
+    return [(data[offset + i // 8] >> (i % 8)) & 1 for i in range(count)]
+
+
+class Replay:
+    """
+    A recorded game.
+
+    setup - the create_session arguments of the game, by name.
+    seed, index - the seed (or None) and index the game was played with.
+    keyframe_interval - the number of moves between keyframes.
+    moves - the moves performed, as a string of 'A's and 'S's.
+    keyframes - (turn, state) pairs, where state is the game's
+                BattleQueue.get_state() after turn moves, with only the
+                HP and SP of each player.
+    """
+    setup: dict
+    seed: Union[int, None]
+    index: int
+    keyframe_interval: int
+    moves: str
+    keyframes: List[Tuple[int, tuple]]
+
+    def __init__(self, setup: dict, seed: int = None, index: int = 0,
+                 keyframe_interval: int = KEYFRAME_INTERVAL) -> None:
+        """
+        Initialize this Replay of a game with no moves yet.
+        """
+        self.setup = {key: setup[key] for key in SETUP_KEYS}
+        self.seed = seed
+        self.index = index
+        self.keyframe_interval = keyframe_interval
+        self.moves = ''
+        self.keyframes = []
+
+    def load(self, turn: int = None) -> GameSession:
+        """
+        Return a new GameSession of this game after turn moves (all of them
+        by default).
+
+        >>> session = create_session('n', 'm', 'M', 'r', 'r', 'R', 'r')
+        >>> recorder = ReplayRecorder(session, keyframe_interval=2)
+        >>> for move in 'ASA':
+        ...     _ = session.apply_move(move)
+        >>> replay = recorder.replay
+        >>> replay.load(1).battle_queue
+        R (Rogue): 90/100 -> M (Mage): 100/95
+        >>> replay.load().battle_queue
+        R (Rogue): 80/90 -> R (Rogue): 80/90 -> M (Mage): 88/90
+        """
+        turn = len(self.moves) if turn is None else turn
+        if not 0 <= turn <= len(self.moves):
+            raise ValueError("Turn {} is not in this replay".format(turn))
+
+        session = create_session(**self.setup)
+        start = 0
+        for keyframe_turn, state in self.keyframes:
+            if keyframe_turn > turn:
+                break
+            start, keyframe = keyframe_turn, state
+
+        if start:
+            session.battle_queue.set_state(
+                (session.p1.get_state()[:2] + keyframe[0],
+                 session.p2.get_state()[:2] + keyframe[1]) + keyframe[2:])
+            session.turns = start
+            session.is_over = session.battle_queue.is_over()
+            session.winner = session.battle_queue.get_winner()
+
+        for move in self.moves[start:turn]:
+            session.apply_move(move)
+        return session
+
+    def to_bytes(self) -> bytes:
+        """
+        Return this Replay in the binary replay format.
+        """
+        parts = [MAGIC, bytes([VERSION])]
+        for key in SETUP_KEYS:
+            value = self.setup[key].encode()
+            parts.append(_LENGTH.pack(len(value)) + value)
+        parts.append(_HEADER.pack(self.seed is not None, self.seed or 0,
+                                  self.index, self.keyframe_interval))
+
+        parts.append(_LENGTH.pack(len(self.moves)))
+        parts.append(_pack_bits([move == 'S' for move in self.moves]))
+
+        parts.append(_LENGTH.pack(len(self.keyframes)))
+        for turn, state in self.keyframes:
+            order = state[2]
+            parts.append(_KEYFRAME.pack(turn, state[0][0], state[0][1],
+                                        state[1][0], state[1][1],
+                                        len(order)))
+            parts.append(_pack_bits([who == 2 for who in order]))
+            if self.setup['queue'] == 'r':
+                parts.append(_RESTRICTIONS.pack(len(state[3])))
+                parts.append(_pack_bits([flag == 'Y' for flag in state[3]]))
+                parts.append(bytes([sum(who for who in state[4])]))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        """
+        Return the Replay stored in data in the binary replay format.
+
+        >>> session = create_session('r', 's', 'S', 'r', 'v', 'V', 'r')
+        >>> recorder = ReplayRecorder(session, seed=5, index=2)
+        >>> for move in 'SAS':
+        ...     _ = session.apply_move(move)
+        >>> replay = Replay.from_bytes(recorder.replay.to_bytes())
+        >>> replay.moves, replay.seed, replay.index
+        ('SAS', 5, 2)
+        >>> replay.load().battle_queue.get_state() == \\
+        ...     session.battle_queue.get_state()
+        True
+        """
+        if data[:4] != MAGIC or data[4] != VERSION:
+            raise ValueError("Not a version {} replay".format(VERSION))
+
+        offset = 5
+        setup = {}
+        for key in SETUP_KEYS:
+            length = _LENGTH.unpack_from(data, offset)[0]
+            offset += _LENGTH.size
+            setup[key] = data[offset:offset + length].decode()
+            offset += length
+
+        has_seed, seed, index, interval = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        replay = cls(setup, seed if has_seed else None, index, interval)
+
+        moves = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        replay.moves = ''.join('S' if bit else 'A' for bit in
+                               _unpack_bits(data, moves, offset))
+        offset += (moves + 7) // 8
+
+        keyframes = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        for _ in range(keyframes):
+            turn, hp_1, sp_1, hp_2, sp_2, length = \
+                _KEYFRAME.unpack_from(data, offset)
+            offset += _KEYFRAME.size
+            order = tuple(bit + 1 for bit in
+                          _unpack_bits(data, length, offset))
+            offset += (length + 7) // 8
+            state = ((hp_1, sp_1), (hp_2, sp_2), order)
+            if setup['queue'] == 'r':
+                count = _RESTRICTIONS.unpack_from(data, offset)[0]
+                offset += _RESTRICTIONS.size
+                restrictions = tuple('Y' if bit else 'N' for bit in
+                                     _unpack_bits(data, count, offset))
+                offset += (count + 7) // 8
+                seen = tuple(who for who in [1, 2] if data[offset] & who)
+                offset += 1
+                state += (restrictions, seen)
+            replay.keyframes.append((turn, state))
+        return replay
+
+
+class ReplayRecorder:
+    """
+    Records every move performed in a GameSession into a Replay.
+
+    replay - the Replay being recorded.
+    """
+    replay: Replay
+
+    def __init__(self, session: GameSession, seed: int = None,
+                 index: int = 0,
+                 keyframe_interval: int = KEYFRAME_INTERVAL) -> None:
+        """
+        Initialize this ReplayRecorder and start recording session, which
+        must have been created by create_session and not be started yet.
+        """
+        self.replay = Replay(session.setup, seed, index, keyframe_interval)
+        session.recorder = self
+
+    def record(self, session: GameSession, move: str) -> None:
+        """
+        Record that move was just performed in session.
+        """
+        self.replay.moves += move
+        if session.turns % self.replay.keyframe_interval == 0:
+            state = session.battle_queue.get_state()
+            self.replay.keyframes.append(
+                (session.turns, (state[0][2:4], state[1][2:4]) + state[2:]))
+
+
+def append_to_archive(path: str, replays: Iterable[Replay]) -> None:
+    """
+    Append every replay in replays to the archive at path, creating it if
+    needed.
+    """
+    with open(path, 'ab') as archive:
+        for replay in replays:
+            data = replay.to_bytes()
+            archive.write(_LENGTH.pack(len(data)) + data)
+
+
+def read_archive(path: str) -> Iterator[Replay]:
+    """
+    Yield every replay in the archive at path, in the order they were
+    added.
+    """
+    with open(path, 'rb') as archive:
+        while True:
+            header = archive.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            yield Replay.from_bytes(archive.read(_LENGTH.unpack(header)[0]))
@@ -0,0 +1,127 @@
+"""
+Basic Unittests for game replays.
+
+"""
+import os
+import tempfile
+import unittest
+
+from game import create_session
+from playstyle import create_rng
+from replay import Replay, ReplayRecorder, append_to_archive, read_archive
+from simulation import GameSpec, create_spec_session, run_games
+
+
+class ReplayUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up GameSpecs covering every character and both queue types.
+        """
+        self.specs = []
+        for p1 in ['m', 'r', 'v', 's']:
+            for p2 in ['m', 'r', 'v', 's']:
+                for queue in ['n', 'r']:
+                    self.specs.append(GameSpec(p1, p2, queue=queue, seed=3,
+                                               index=len(self.specs)))
+
+    def test_seeking_matches_playing_from_start(self):
+        """
+        Test to make sure loading a replay at any turn from a keyframe gives
+        the same state as playing its moves from the start.
+        """
+        for spec in self.specs:
+            session = create_spec_session(spec)
+            recorder = ReplayRecorder(session, keyframe_interval=3)
+            while not session.is_over and session.perform_attack():
+                pass
+
+            replay = Replay.from_bytes(recorder.replay.to_bytes())
+            self.assertEqual(session.turns, len(replay.moves))
+            for turn in range(len(replay.moves) + 1):
+                expected = create_spec_session(spec)
+                for move in replay.moves[:turn]:
+                    expected.apply_move(move)
+                actual = replay.load(turn)
+
+                self.assertEqual(expected.battle_queue.get_state(),
+                                 actual.battle_queue.get_state())
+                self.assertEqual(expected.is_over, actual.is_over)
+                self.assertEqual(turn, actual.turns)
+
+    def test_restricted_keyframes_round_trip(self):
+        """
+        Test to make sure every keyframe of a restricted queue replay read
+        back from bytes restores the state the live game had at that turn,
+        including restrictions past the end of the queue.
+        """
+        for index in range(20):
+            session = create_session('r', 'v', 'A', 'r', 'r', 'B', 'r',
+                                     create_rng(0, index))
+            recorder = ReplayRecorder(session, keyframe_interval=1)
+            states = [session.battle_queue.get_state()]
+            while not session.is_over and session.perform_attack():
+                states.append(session.battle_queue.get_state())
+
+            replay = Replay.from_bytes(recorder.replay.to_bytes())
+            self.assertEqual(recorder.replay.keyframes, replay.keyframes)
+            for turn, state in enumerate(states):
+                self.assertEqual(state,
+                                 replay.load(turn).battle_queue.get_state())
+
+    def test_long_names_round_trip(self):
+        """
+        Test to make sure names longer than 255 bytes of UTF-8 are written
+        and read back whole.
+        """
+        names = ['A' * 300, '\u00e9' * 200]
+        session = create_session('n', 'm', names[0], 'r', 'r', names[1], 'r',
+                                 create_rng(0))
+        recorder = ReplayRecorder(session)
+        session.perform_attack()
+
+        replay = Replay.from_bytes(recorder.replay.to_bytes())
+        self.assertEqual(names, [replay.setup['p1_name'],
+                                 replay.setup['p2_name']])
+        self.assertEqual(recorder.replay.moves, replay.moves)
+
+    def test_archive_round_trip(self):
+        """
+        Test to make sure simulated games appended to an archive read back
+        with the same final results.
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'games.replays')
+        results = {}
+        for part in [self.specs[:10], self.specs[10:]]:
+            batch = list(run_games(part, processes=2, chunksize=4,
+                                   record=True))
+            results.update((result.index, result) for result in batch)
+            append_to_archive(path, [result.replay for result in batch])
+
+        replays = list(read_archive(path))
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+        self.assertEqual(len(self.specs), len(replays))
+        for replay in replays:
+            result = results[replay.index]
+            session = replay.load()
+            self.assertEqual(3, replay.seed)
+            self.assertEqual(result.turns, session.turns)
+            self.assertEqual([result.p1_hp, result.p1_sp],
+                             [session.p1.get_hp(), session.p1.get_sp()])
+            self.assertEqual([result.p2_hp, result.p2_sp],
+                             [session.p2.get_hp(), session.p2.get_sp()])
+
+    def test_invalid_turn(self):
+        """
+        Test to make sure loading a turn past the end of a replay fails.
+        """
+        session = create_session('n', 'm', 'M', 'm', 'r', 'R', 'm')
+        recorder = ReplayRecorder(session)
+        session.perform_attack('A')
+
+        self.assertRaises(ValueError, recorder.replay.load, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
@@ -286,6 +286,19 @@ class RestrictedBattleQueueUnitTests(unittest.TestCase):
                                                         self.p2,
                                                         expected,
                                                         actual))    
+
+    def test_skipped_characters_lose_restrictions(self):
+        """
+        Test to make sure characters skipped for having no SP take their
+        restrictions with them, so the remaining characters keep theirs.
+        """
+        self.battle_queue.add(self.p2)
+        self.p1.set_sp(1)
+
+        self.assertEqual(self.p2, self.battle_queue.remove())
+        self.assertEqual(self.p2, self.battle_queue.remove())
+        self.assertTrue(self.battle_queue.is_empty())
+        self.assertEqual((), self.battle_queue.get_state()[3])
         
 if __name__ == "__main__":
     unittest.main(exit = False)
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+An asyncio game server and a load generator for it.
+
+Each TCP connection plays its own GameSession using a line-based protocol:
+    1. The client sends a JSON object with any of the arguments of
+       game.create_session (queue, p1, p1_name, p1_playstyle, p2, p2_name,
+       p2_playstyle). Missing arguments take the values in DEFAULT_SETUP.
+    2. The server replies with the session's ui_state() as compact JSON,
+       plus 'is_over' and 'winner' (a name or null).
+    3. The client sends 'A' or 'S' for each manual move (or 'U' to just
+       redraw, or 'Q' to quit) and gets the updated state back after any
+       computer-controlled moves that follow it.
+Errors are sent as {"error": message} and close the connection.
+
+Minimax moves are computed in worker processes so that one slow search
+doesn't stall every other session.
+
+Run this file with "serve" to start the server, or "load" to measure turn
+latency with many concurrent simulated clients.
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List
+from game import create_session
+from playstyle import Minimax
+
+DEFAULT_SETUP = {'queue': 'n',
+                 'p1': 'm', 'p1_name': 'P1', 'p1_playstyle': 'm',
+                 'p2': 'r', 'p2_name': 'P2', 'p2_playstyle': 'r'}
+
+
+def encode_state(session: 'GameSession') -> bytes:
+    """
+    Return the JSON line sent to a client for session.
+    """
+    state = session.ui_state()
+    state['is_over'] = session.is_over
+    state['winner'] = session.winner.get_name() if session.winner else None
+    return json.dumps(state, separators=(',', ':')).encode() + b'\n'
+
+
+def select_attack(battle_queue: 'BattleQueue') -> str:
+    """
+    Return the move the next character in battle_queue's playstyle picks.
+
+    This runs in a worker process for searching playstyles.
+    """
+    return battle_queue.peek().playstyle.select_attack(
+        battle_queue=battle_queue)
+
+
+async def play_computer_moves(session: 'GameSession',
+                              executor: Executor) -> None:
+    """
+    Perform moves in session until the game is over or a character with a
+    manual playstyle is next.
+    """
+    loop = asyncio.get_running_loop()
+
+    while not session.is_over:
+        playstyle = session.battle_queue.peek().playstyle
+        if playstyle.is_manual:
+            return
+
+        if isinstance(playstyle, Minimax):
+            move = await loop.run_in_executor(executor, select_attack,
+                                              session.battle_queue)
+        else:
+            move = select_attack(session.battle_queue)
+
+        if not session.apply_move(move):
+            return
+
+
+async def handle_connection(reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter,
+                            executor: Executor) -> None:
+    """
+    Play one GameSession with the client on the other end of reader and
+    writer.
+    """
+    try:
+        setup = dict(DEFAULT_SETUP)
+        setup.update(json.loads(await reader.readline() or b'{}'))
+        session = create_session(**setup)
+    except (ValueError, KeyError, TypeError) as error:
+        writer.write(json.dumps({'error': str(error)}).encode() + b'\n')
+        writer.close()
+        return
+
+    try:
+        await play_computer_moves(session, executor)
+        writer.write(encode_state(session))
+        await writer.drain()
+
+        while True:
+            key = (await reader.readline()).strip().upper().decode()
+            if not key or key == 'Q':
+                break
+            if key != 'U' and not session.is_over:
+                session.perform_attack(key)
+                await play_computer_moves(session, executor)
+            writer.write(encode_state(session))
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(host: str = '127.0.0.1', port: int = 8765,
+                       executor: Executor = None) -> asyncio.AbstractServer:
+    """
+    Return a server accepting game connections on host and port, using
+    executor (a new ProcessPoolExecutor by default) for Minimax moves.
+    """
+    executor = executor or ProcessPoolExecutor()
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(reader, writer, executor),
+        host, port)
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765) -> None:
+    """
+    Accept game connections on host and port until cancelled.
+    """
+    server = await start_server(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def _play_client(host: str, port: int, setup: dict,
+                       latencies: List[float]) -> None:
+    """
+    Play a game on the server as a client that always picks the first
+    available action, adding the time of every turn to latencies.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(json.dumps(setup).encode() + b'\n')
+    state = json.loads(await reader.readline())
+
+    while 'error' not in state and not state['is_over'] and state['actions']:
+        start = time.perf_counter()
+        writer.write(state['actions'][0].encode() + b'\n')
+        state = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+
+    writer.write(b'Q\n')
+    writer.close()
+
+
+async def run_load_test(sessions: int, host: str = '127.0.0.1',
+                        port: int = 8765, setup: dict = None) -> dict:
+    """
+    Play sessions games on the server at once and return the number of
+    turns played and the p50 and p99 turn latencies in milliseconds.
+    """
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[_play_client(host, port, setup or {}, latencies)
+                           for _ in range(sessions)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    if not latencies:
+        return {'turns': 0, 'seconds': elapsed}
+    return {'turns': len(latencies),
+            'seconds': elapsed,
+            'p50_ms': 1000 * latencies[len(latencies) // 2],
+            'p99_ms': 1000 * latencies[min(len(latencies) - 1,
+                                           len(latencies) * 99 // 100)]}
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    PARSER.add_argument('mode', choices=['serve', 'load'])
+    PARSER.add_argument('--host', default='127.0.0.1')
+    PARSER.add_argument('--port', type=int, default=8765)
+    PARSER.add_argument('--sessions', type=int, default=1000,
+                        help="concurrent clients for the load test")
+    ARGS = PARSER.parse_args()
+
+    if ARGS.mode == 'serve':
+        asyncio.run(serve(ARGS.host, ARGS.port))
+    else:
+        print(asyncio.run(run_load_test(ARGS.sessions, ARGS.host,
+                                        ARGS.port)))
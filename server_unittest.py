@@ -0,0 +1,85 @@
+"""
+Basic Unittests for the game server.
+
+"""
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from server import start_server, run_load_test
+
+
+class ServerUnitTests(unittest.TestCase):
+    async def request_lines(self, port, lines):
+        """
+        Send lines to the server on port and return its decoded replies.
+        """
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        replies = []
+        for line in lines:
+            writer.write(line.encode() + b'\n')
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        return replies
+
+    def run_with_server(self, client):
+        """
+        Start a server on a free port, run the coroutine returned by
+        client(port) and return its result.
+        """
+        async def run():
+            with ThreadPoolExecutor(2) as executor:
+                server = await start_server(port=0, executor=executor)
+                port = server.sockets[0].getsockname()[1]
+                async with server:
+                    return await client(port)
+
+        return asyncio.run(run())
+
+    def test_manual_moves(self):
+        """
+        Test to make sure a manual move is applied and followed by the
+        computer's move.
+        """
+        setup = json.dumps({'p1': 'm', 'p1_playstyle': 'm',
+                            'p2': 'r', 'p2_playstyle': 'r'})
+        start, after = self.run_with_server(
+            lambda port: self.request_lines(port, [setup, 'A']))
+
+        self.assertEqual(100, start['p2_hp'])
+        self.assertEqual(90, after['p2_hp'])
+        self.assertEqual('P1', after['current_player'])
+        self.assertLess(after['p1_hp'], 100)
+
+    def test_minimax_game(self):
+        """
+        Test to make sure a game between computer playstyles is played to
+        the end before the first reply.
+        """
+        setup = json.dumps({'p1': 'r', 'p1_playstyle': 'r',
+                            'p2': 'm', 'p2_playstyle': 'mi'})
+        state, = self.run_with_server(
+            lambda port: self.request_lines(port, [setup]))
+        self.assertTrue(state['is_over'])
+
+    def test_invalid_setup(self):
+        """
+        Test to make sure an invalid setup gets an error.
+        """
+        state, = self.run_with_server(
+            lambda port: self.request_lines(port, ['{"p1": "x"}']))
+        self.assertIn('error', state)
+
+    def test_load_test(self):
+        """
+        Test to make sure the load generator plays every session to the end.
+        """
+        report = self.run_with_server(
+            lambda port: run_load_test(20, port=port))
+        self.assertGreater(report['turns'], 20)
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
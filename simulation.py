@@ -0,0 +1,383 @@
+"""
+Headless batch simulation of games.
+
+Games are described by GameSpecs, played to completion without any UI or
+input() calls, and summarized as GameResults. run_games plays many games
+across a pool of worker processes and yields each result as soon as its game
+finishes. estimate_win_rates instead plays each matchup only until its win
+rate is known to a given precision.
+"""
+import functools
+import math
+import multiprocessing
+from queue import Queue
+from typing import Iterable, Iterator, List, Tuple, Union
+from game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES, \
+    BATTLE_QUEUE_CLASSES, GameSession, create_session
+from playstyle import Minimax, create_rng
+from replay import ReplayRecorder
+
+
+class GameSpec:
+    """
+    The setup of a single game.
+
+    p1, p2 - the keys in CHARACTER_CLASSES of the two characters.
+    p1_playstyle, p2_playstyle - the keys in PLAYSTYLE_CLASSES of the
+                                 characters' playstyles.
+    queue - the key in BATTLE_QUEUE_CLASSES of the battle queue.
+    seed - the root seed of the batch this game belongs to.
+    index - an identifier for this game, copied into its GameResult.
+
+    RandomPlaystyles pick the game's moves with create_rng(seed, index), so
+    the same seed and index always replay the same game.
+    """
+    p1: str
+    p2: str
+    p1_playstyle: str
+    p2_playstyle: str
+    queue: str
+    seed: int
+    index: int
+
+    def __init__(self, p1: str, p2: str, p1_playstyle: str = 'r',
+                 p2_playstyle: str = 'r', queue: str = 'n', seed: int = 0,
+                 index: int = 0) -> None:
+        """
+        Initialize this GameSpec.
+
+        >>> GameSpec('m', 'r', seed=3)
+        GameSpec(m/r vs r/r, queue n, seed 3)
+        """
+        for key, classes in [(p1, CHARACTER_CLASSES),
+                             (p2, CHARACTER_CLASSES),
+                             (p1_playstyle, PLAYSTYLE_CLASSES),
+                             (p2_playstyle, PLAYSTYLE_CLASSES),
+                             (queue, BATTLE_QUEUE_CLASSES)]:
+            if key not in classes:
+                raise ValueError("Unknown key {!r}".format(key))
+        if PLAYSTYLE_CLASSES[p1_playstyle](None).is_manual or \
+                PLAYSTYLE_CLASSES[p2_playstyle](None).is_manual:
+            raise ValueError("Manual playstyles cannot be simulated")
+
+        self.p1 = p1
+        self.p2 = p2
+        self.p1_playstyle = p1_playstyle
+        self.p2_playstyle = p2_playstyle
+        self.queue = queue
+        self.seed = seed
+        self.index = index
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this GameSpec.
+        """
+        return "GameSpec({}/{} vs {}/{}, queue {}, seed {})".format(
+            self.p1, self.p1_playstyle, self.p2, self.p2_playstyle,
+            self.queue, self.seed)
+
+
+class GameResult:
+    """
+    The outcome of a finished game.
+
+    index - the index of the GameSpec the game was played from.
+    winner - 1 or 2 for the winning player, or None for a tie.
+    p1_hp, p1_sp, p2_hp, p2_sp - the final HP and SP of each player.
+    turns - the number of actions performed.
+    replay - the game's Replay if it was recorded, or None.
+    """
+    index: int
+    winner: Union[int, None]
+    p1_hp: int
+    p1_sp: int
+    p2_hp: int
+    p2_sp: int
+    turns: int
+    replay: Union['Replay', None]
+
+    def __init__(self, index: int, winner: Union[int, None], p1_hp: int,
+                 p1_sp: int, p2_hp: int, p2_sp: int, turns: int,
+                 replay: 'Replay' = None) -> None:
+        """
+        Initialize this GameResult.
+        """
+        self.index = index
+        self.winner = winner
+        self.p1_hp = p1_hp
+        self.p1_sp = p1_sp
+        self.p2_hp = p2_hp
+        self.p2_sp = p2_sp
+        self.turns = turns
+        self.replay = replay
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this GameResult.
+
+        >>> GameResult(0, 1, 40, 10, 0, 55, 12)
+        GameResult(0: winner 1, 40/10 vs 0/55, 12 turns)
+        """
+        return "GameResult({}: winner {}, {}/{} vs {}/{}, {} turns)".format(
+            self.index, self.winner, self.p1_hp, self.p1_sp, self.p2_hp,
+            self.p2_sp, self.turns)
+
+
+def create_spec_session(spec: GameSpec) -> GameSession:
+    """
+    Return a new GameSession for the game described by spec.
+
+    >>> create_spec_session(GameSpec('m', 'v')).battle_queue
+    P1 (Mage): 100/100 -> P2 (Vampire): 100/100
+    """
+    return create_session(spec.queue, spec.p1, "P1", spec.p1_playstyle,
+                          spec.p2, "P2", spec.p2_playstyle,
+                          create_rng(spec.seed, spec.index))
+
+
+def run_game(spec: GameSpec, cache: dict = None,
+             record: bool = False) -> GameResult:
+    """
+    Play the game described by spec to completion and return its result,
+    with its Replay if record is True.
+
+    If cache is given, the game's Minimax playstyles share it to look up the
+    scores of states searched in earlier games (see Minimax.cache).
+
+    >>> result = run_game(GameSpec('r', 'm', seed=1))
+    >>> result.winner in (1, 2, None) and result.turns > 0
+    True
+    """
+    session = create_spec_session(spec)
+    recorder = ReplayRecorder(session, spec.seed, spec.index) \
+        if record else None
+    for character in (session.p1, session.p2):
+        if isinstance(character.playstyle, Minimax):
+            character.playstyle.cache = cache
+
+    # A playstyle that can't find a valid move would otherwise stall the
+    # game forever.
+    while not session.is_over and session.perform_attack():
+        pass
+
+    if session.winner is None:
+        winner = None
+    else:
+        winner = 1 if session.winner is session.p1 else 2
+
+    return GameResult(spec.index, winner, session.p1.get_hp(),
+                      session.p1.get_sp(), session.p2.get_hp(),
+                      session.p2.get_sp(), session.turns,
+                      recorder.replay if record else None)
+
+
+def run_games(specs: Iterable[GameSpec], processes: int = None,
+              chunksize: int = 64, record: bool = False) \
+        -> Iterator[GameResult]:
+    """
+    Play every game in specs across processes worker processes (one per CPU
+    by default) and yield their results in the order they finish, with
+    their Replays if record is True.
+
+    Use GameResult.index to match results to specs. If processes is 1, the
+    games are played in this process. To archive many games, pass the
+    results' replays to replay.append_to_archive as they arrive.
+    """
+    play = functools.partial(run_game, record=record)
+    if processes == 1:
+        for spec in specs:
+            yield play(spec)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(play, specs, chunksize):
+            yield result
+
+
+class MatchupEstimate:
+    """
+    A running estimate of how often p1 wins the games of one matchup.
+
+    spec - the GameSpec every game of the matchup copies, except that game i
+           has the index i.
+    games - the number of games played.
+    wins, draws - the number of games p1 won, and the number of ties.
+    """
+    spec: GameSpec
+    games: int
+    wins: int
+    draws: int
+
+    def __init__(self, spec: GameSpec) -> None:
+        """
+        Initialize this MatchupEstimate with no games played.
+        """
+        self.spec = spec
+        self.games = 0
+        self.wins = 0
+        self.draws = 0
+
+    def add(self, winners: Iterable[Union[int, None]]) -> None:
+        """
+        Add games won by each of winners (1, 2 or None for a tie).
+
+        >>> estimate = MatchupEstimate(GameSpec('m', 'r'))
+        >>> estimate.add([1, 1, 2, None])
+        >>> estimate
+        MatchupEstimate(m/r vs r/r: 0.500 in [0.150, 0.850] after 4 games)
+        """
+        for winner in winners:
+            self.games += 1
+            if winner == 1:
+                self.wins += 1
+            elif winner is None:
+                self.draws += 1
+
+    def get_win_rate(self) -> float:
+        """
+        Return the fraction of games played that p1 won.
+        """
+        return self.wins / self.games if self.games else 0.0
+
+    def get_interval(self, z: float = 1.96) -> Tuple[float, float]:
+        """
+        Return the Wilson score interval of p1's win rate for the normal
+        quantile z (1.96 for 95% confidence).
+
+        >>> estimate = MatchupEstimate(GameSpec('m', 'r'))
+        >>> estimate.get_interval()
+        (0.0, 1.0)
+        >>> estimate.add([1] * 90 + [2] * 10)
+        >>> ['{:.3f}'.format(bound) for bound in estimate.get_interval()]
+        ['0.826', '0.945']
+        """
+        if not self.games:
+            return 0.0, 1.0
+
+        rate = self.get_win_rate()
+        denominator = 1 + z * z / self.games
+        centre = (rate + z * z / (2 * self.games)) / denominator
+        margin = z * math.sqrt(rate * (1 - rate) / self.games +
+                               z * z / (4 * self.games * self.games)) \
+            / denominator
+        return max(0.0, centre - margin), min(1.0, centre + margin)
+
+    def is_decided(self, width: float, z: float = 1.96) -> bool:
+        """
+        Return whether the interval of p1's win rate is narrower than width.
+        """
+        low, high = self.get_interval(z)
+        return high - low < width
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this MatchupEstimate.
+        """
+        return "MatchupEstimate({}/{} vs {}/{}: {:.3f} in [{:.3f}, {:.3f}] " \
+            "after {} games)".format(self.spec.p1, self.spec.p1_playstyle,
+                                     self.spec.p2, self.spec.p2_playstyle,
+                                     self.get_win_rate(),
+                                     *self.get_interval(), self.games)
+
+
+def run_batch(task: Tuple[int, GameSpec, int, int]) \
+        -> Tuple[int, List[Union[int, None]]]:
+    """
+    Play games start to stop of the matchup of an (index, spec, start, stop)
+    task and return index and the winners of the games.
+
+    >>> index, winners = run_batch((7, GameSpec('m', 'r'), 0, 3))
+    >>> index, len(winners)
+    (7, 3)
+    """
+    index, spec, start, stop = task
+    winners = []
+    for game in range(start, stop):
+        winners.append(run_game(GameSpec(spec.p1, spec.p2, spec.p1_playstyle,
+                                         spec.p2_playstyle, spec.queue,
+                                         spec.seed, game)).winner)
+    return index, winners
+
+
+def estimate_win_rates(specs: List[GameSpec], width: float = 0.05,
+                       z: float = 1.96, batch: int = 50,
+                       max_games: int = 100000, processes: int = None) \
+        -> Iterator[MatchupEstimate]:
+    """
+    Play games of the matchup of each of specs in batches of batch games
+    until the interval of its win rate (see MatchupEstimate.get_interval) is
+    narrower than width or it has played max_games games, and yield its
+    MatchupEstimate after every batch.
+
+    Batches are played across processes worker processes (one per CPU by
+    default), and only undecided matchups get new batches, so workers freed
+    by decided matchups move on to the ones that are left. Batches already
+    started when a matchup is decided still count towards its estimate. If
+    processes is 1, the games are played in this process.
+    """
+    estimates = [MatchupEstimate(spec) for spec in specs]
+    started = [0] * len(specs)
+
+    def next_task() -> Union[tuple, None]:
+        """
+        Return the next batch of the undecided matchup with the fewest games
+        started, or None if every matchup is decided.
+        """
+        undecided = [index for index, estimate in enumerate(estimates)
+                     if started[index] < max_games and
+                     not estimate.is_decided(width, z)]
+        if not undecided:
+            return None
+        index = min(undecided, key=lambda i: started[i])
+        start = started[index]
+        started[index] = min(start + batch, max_games)
+        return index, specs[index], start, started[index]
+
+    if processes == 1:
+        task = next_task()
+        while task is not None:
+            index, winners = run_batch(task)
+            estimates[index].add(winners)
+            yield estimates[index]
+            task = next_task()
+        return
+
+    workers = processes or multiprocessing.cpu_count()
+    finished = Queue()
+    with multiprocessing.Pool(workers) as pool:
+        in_flight = 0
+        while True:
+            # Keep every worker busy with one batch queued behind it.
+            while in_flight < 2 * workers:
+                task = next_task()
+                if task is None:
+                    break
+                pool.apply_async(run_batch, (task,), callback=finished.put,
+                                 error_callback=finished.put)
+                in_flight += 1
+            if not in_flight:
+                return
+
+            reply = finished.get()
+            in_flight -= 1
+            if isinstance(reply, BaseException):
+                raise reply
+            index, winners = reply
+            estimates[index].add(winners)
+            yield estimates[index]
+
+
+if __name__ == '__main__':
+    SPECS = [GameSpec(p1, p2)
+             for p1 in CHARACTER_CLASSES for p2 in CHARACTER_CLASSES]
+    ESTIMATES = {}
+    for ESTIMATE in estimate_win_rates(SPECS):
+        ESTIMATES[(ESTIMATE.spec.p1, ESTIMATE.spec.p2)] = ESTIMATE
+    for KEY in sorted(ESTIMATES):
+        ESTIMATE = ESTIMATES[KEY]
+        print("{} vs {}: {} wins, {} losses, {} ties, win rate {:.3f} "
+              "[{:.3f}, {:.3f}]".format(
+                  KEY[0], KEY[1], ESTIMATE.wins,
+                  ESTIMATE.games - ESTIMATE.wins - ESTIMATE.draws,
+                  ESTIMATE.draws, ESTIMATE.get_win_rate(),
+                  *ESTIMATE.get_interval()))
@@ -0,0 +1,131 @@
+"""
+Basic Unittests for the headless simulator.
+
+"""
+import random
+import unittest
+
+from simulation import GameSpec, estimate_win_rates, run_game, run_games
+
+
+class SimulationUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up GameSpecs covering every character and both queue types.
+        """
+        self.specs = []
+        for p1 in ['m', 'r', 'v', 's']:
+            for p2 in ['m', 'r', 'v', 's']:
+                for queue in ['n', 'r']:
+                    self.specs.append(GameSpec(p1, p2, queue=queue,
+                                               seed=len(self.specs),
+                                               index=len(self.specs)))
+
+    def test_games_finish(self):
+        """
+        Test to make sure every simulated game ends with a consistent winner.
+        """
+        for spec in self.specs:
+            result = run_game(spec)
+            self.assertEqual(spec.index, result.index)
+            if result.winner == 1:
+                self.assertEqual(0, result.p2_hp)
+            elif result.winner == 2:
+                self.assertEqual(0, result.p1_hp)
+            else:
+                self.assertNotEqual(0, result.p1_hp)
+                self.assertNotEqual(0, result.p2_hp)
+
+    def test_restricted_vampire_and_sorcerer_batch(self):
+        """
+        Test to make sure a batch of Vampire vs Sorcerer games on restricted
+        queues, in both seats, plays every game to the end.
+        """
+        specs = [GameSpec(p1, p2, queue='r', index=index)
+                 for p1, p2 in [('v', 's'), ('s', 'v')]
+                 for index in range(100)]
+        results = list(run_games(specs, processes=2, chunksize=16))
+
+        self.assertEqual(sorted(spec.index for spec in specs),
+                         sorted(result.index for result in results))
+        # Games that used to end in an IndexError from the queue.
+        for spec in [GameSpec('v', 's', queue='r', index=6),
+                     GameSpec('s', 'v', queue='r', index=58)]:
+            result = run_game(spec)
+            self.assertIn(result.winner, [1, 2, None])
+            self.assertGreater(result.turns, 0)
+
+    def test_seed_reproduces_game(self):
+        """
+        Test to make sure playing a GameSpec twice gives the same result.
+        """
+        for spec in self.specs:
+            self.assertEqual(repr(run_game(spec)), repr(run_game(spec)))
+
+    def test_game_replays_from_root_seed_and_index(self):
+        """
+        Test to make sure any game of a batch played in worker processes
+        can be replayed on its own from the batch's seed and its index,
+        whatever the global random state is.
+        """
+        specs = [GameSpec('m', 'r', seed=11, index=index)
+                 for index in range(40)]
+        pooled = {result.index: repr(result)
+                  for result in run_games(specs, processes=2, chunksize=3)}
+
+        random.seed(0)
+        self.assertEqual(pooled[17], repr(run_game(specs[17])))
+        random.seed(1)
+        self.assertEqual(pooled[17], repr(run_game(specs[17])))
+        self.assertGreater(len(set(pooled.values())), 1)
+
+    def test_worker_processes_match_local_games(self):
+        """
+        Test to make sure games played in worker processes give the same
+        results as games played in this process.
+        """
+        local = {result.index: repr(result)
+                 for result in run_games(self.specs, processes=1)}
+        pooled = {result.index: repr(result)
+                  for result in run_games(self.specs, processes=2,
+                                          chunksize=4)}
+        self.assertEqual(local, pooled)
+
+    def test_adaptive_sampling_stops_decided_matchups(self):
+        """
+        Test to make sure estimate_win_rates stops every matchup once its
+        interval is narrow enough, so one-sided matchups play fewer games.
+        """
+        specs = [GameSpec('s', 'm'), GameSpec('m', 'm')]
+        for processes in [1, 2]:
+            estimates = {}
+            for estimate in estimate_win_rates(specs, width=0.1, batch=20,
+                                               processes=processes):
+                estimates[estimate.spec] = estimate
+
+            one_sided, even = estimates[specs[0]], estimates[specs[1]]
+            self.assertTrue(one_sided.is_decided(0.1))
+            self.assertTrue(even.is_decided(0.1))
+            self.assertLess(one_sided.games, even.games)
+
+    def test_adaptive_sampling_stops_at_max_games(self):
+        """
+        Test to make sure estimate_win_rates never plays more than max_games
+        games of a matchup.
+        """
+        games = [estimate.games
+                 for estimate in estimate_win_rates([GameSpec('m', 'm')],
+                                                    width=0.01, batch=30,
+                                                    max_games=50,
+                                                    processes=1)]
+        self.assertEqual([30, 50], games)
+
+    def test_manual_playstyle_rejected(self):
+        """
+        Test to make sure a game with a manual playstyle can't be simulated.
+        """
+        self.assertRaises(ValueError, GameSpec, 'm', 'r', 'm', 'r')
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
@@ -4,6 +4,8 @@ The SkillDecisionTree class.
 
 This tree will be used during the gameplay of game.py.
 """
+from bisect import bisect_right
+from itertools import product
 from typing import Callable, List, Union
 from skills import RogueAttack, RogueSpecial, MageAttack, MageSpecial
 
@@ -118,63 +120,536 @@ class SkillDecisionTree:
             result += child.get_satisfied_sdt(caster, target)
         return result
 
+    def compile(self) -> Union['CompiledSkillDecisionTree',
+                               'ThresholdLookupTable']:
+        """
+        Return an object whose pick_skill picks the same skills as this
+        SkillDecisionTree.
 
-def create_default_tree() -> SkillDecisionTree:
+        If every condition that can be checked is a Threshold (or
+        no_condition), this is a ThresholdLookupTable. Otherwise it is a
+        CompiledSkillDecisionTree.
+
+        The compiled tree is a snapshot: compile again after changing this
+        SkillDecisionTree or any of its subtrees.
+
+        >>> sdt = create_default_tree()
+        >>> sdt.compile()
+        ThresholdLookupTable(3 x 2 x 2 x 2)
+        >>> SkillDecisionTree(MageAttack(), lambda c, t: True, 1,
+        ...                   [SkillDecisionTree(RogueAttack(), None, 2)]
+        ...                   ).compile()
+        CompiledSDT([1, 2])
+        """
+        rules = CompiledSkillDecisionTree(self)
+        if ThresholdLookupTable.supports(rules):
+            return ThresholdLookupTable(rules)
+        return rules
+
+    def get_ranked_skills(self) -> List['Skill']:
+        """
+        Return the skills in this SkillDecisionTree from the highest priority
+        to the lowest.
+
+        >>> [skill.__class__.__name__
+        ...  for skill in create_default_tree().get_ranked_skills()[:2]]
+        ['RogueAttack', 'MageSpecial']
+        """
+        return [skill for skill, _, _ in CompiledSkillDecisionTree(self).rules]
+
+    def pick_skill_indices(self, caster_hp: 'ndarray', caster_sp: 'ndarray',
+                           target_hp: 'ndarray', target_sp: 'ndarray') \
+            -> 'ndarray':
+        """
+        Return the index in get_ranked_skills() of the skill picked for every
+        state given by the NumPy arrays caster_hp, caster_sp, target_hp and
+        target_sp, which are broadcast against each other.
+
+        >>> import numpy as np
+        >>> sdt = create_default_tree()
+        >>> indices = sdt.pick_skill_indices(np.array([100, 80]), 40,
+        ...                                  np.array([50, 20]),
+        ...                                  np.array([30, 50]))
+        >>> [sdt.get_ranked_skills()[i].__class__.__name__ for i in indices]
+        ['MageSpecial', 'RogueAttack']
+        """
+        return CompiledSkillDecisionTree(self).pick_skill_indices(
+            caster_hp, caster_sp, target_hp, target_sp)
+
+
+class CompiledSkillDecisionTree:
     """
-    Return a SkillDecisionTree.
+    A SkillDecisionTree flattened into a table of rules ordered by priority.
 
-    >>> sdt = create_default_tree()
-    >>> from battle_queue import BattleQueue
-    >>> bq = BattleQueue()
-    >>> from playstyle import ManualPlaystyle
-    >>> from characters import Rogue, Mage, Vampire, Sorcerer
-    >>> caster = Vampire("Caster", bq, ManualPlaystyle(bq))
-    >>> target = Vampire("Target", bq, ManualPlaystyle(bq))
-    >>> caster.set_hp(80)
-    >>> caster.set_sp(40)
-    >>> target.set_hp(20)
-    >>> target.set_sp(50)
-    >>> sdt.get_satisfied_sdt(caster, target)
-    [SDT(6, RogueAttack), SDT(8, RogueAttack), SDT(1, RogueAttack)]
-    >>> sdt.pick_skill(caster, target).__class__.__name__
-    'RogueAttack'
+    A node of the tree is satisfied when every condition on the path to it is
+    True and it is either a leaf or its own condition is False. The rules are
+    checked in priority order and the first satisfied one is returned, so
+    conditions are only evaluated until a skill is found and each condition
+    is evaluated at most once per pick.
+
+    rules - (skill, path, own) for every node, in priority order. path is the
+            tuple of condition indices that must all be True and own is the
+            index of the node's condition that must be False, or None for a
+            leaf.
+    conditions - the conditions of every internal node, indexed by the rules.
+    """
+    rules: List[tuple]
+    conditions: List[Callable[['Character', 'Character'], bool]]
+
+    def __init__(self, tree: SkillDecisionTree) -> None:
+        """
+        Initialize this CompiledSkillDecisionTree from the SkillDecisionTree
+        tree.
+        """
+        self.conditions = []
+        ordered = []
+        stack = [(tree, ())]
+
+        while stack:
+            node, path = stack.pop()
+            if not node.children:
+                ordered.append((node.priority, len(ordered), node.value,
+                                path, None))
+            else:
+                own = len(self.conditions)
+                self.conditions.append(node.condition)
+                ordered.append((node.priority, len(ordered), node.value,
+                                path, own))
+                for child in reversed(node.children):
+                    stack.append((child, path + (own,)))
+
+        # Ties are broken by pre-order position, matching get_satisfied_sdt.
+        ordered.sort(key=lambda rule: (rule[0], rule[1]))
+        self._priorities = [rule[0] for rule in ordered]
+        self.rules = [rule[2:] for rule in ordered]
+
+    def __repr__(self) -> str:
+        """
+        Return the representation of this CompiledSkillDecisionTree.
+        """
+        return "CompiledSDT({})".format(self._priorities)
+
+    def get_key(self) -> 'CompiledSkillDecisionTree':
+        """
+        Return a hashable key that is equal for compiled trees that pick the
+        same skills. Arbitrary conditions can't be compared, so this is this
+        CompiledSkillDecisionTree itself.
+        """
+        return self
+
+    def pick_skill(self, caster: 'Character', target: 'Character') \
+            -> Union['Skill', None]:
+        """
+        Pick the skill with the highest priority, and fulfills the conditions.
+
+        >>> sdt = create_default_tree().compile()
+        >>> from battle_queue import BattleQueue
+        >>> bq = BattleQueue()
+        >>> from playstyle import ManualPlaystyle
+        >>> from characters import Vampire
+        >>> caster = Vampire("Caster", bq, ManualPlaystyle(bq))
+        >>> target = Vampire("Target", bq, ManualPlaystyle(bq))
+        >>> caster.set_sp(40)
+        >>> target.set_hp(50)
+        >>> target.set_sp(30)
+        >>> sdt.pick_skill(caster, target).__class__.__name__
+        'MageSpecial'
+        """
+        conditions = self.conditions
+        results = [None] * len(conditions)
+
+        for skill, path, own in self.rules:
+            for index in path:
+                result = results[index]
+                if result is None:
+                    result = bool(conditions[index](caster, target))
+                    results[index] = result
+                if not result:
+                    break
+            else:
+                if own is None:
+                    return skill
+                result = results[own]
+                if result is None:
+                    result = bool(conditions[own](caster, target))
+                    results[own] = result
+                if not result:
+                    return skill
+        return None
+
+    def pick_skill_indices(self, caster_hp: 'ndarray', caster_sp: 'ndarray',
+                           target_hp: 'ndarray', target_sp: 'ndarray') \
+            -> 'ndarray':
+        """
+        Return the index in rules of the skill picked for every state given
+        by the NumPy arrays caster_hp, caster_sp, target_hp and target_sp,
+        which are broadcast against each other. The index is -1 where no
+        skill is picked.
+
+        Thresholds and no_condition are evaluated as masks over whole arrays;
+        any other condition is called once per state.
+        """
+        # NumPy is only needed for batch evaluation, not to play the game.
+        import numpy as np
+
+        stats = [np.asarray(caster_hp), np.asarray(caster_sp),
+                 np.asarray(target_hp), np.asarray(target_sp)]
+        shape = np.broadcast_shapes(*[stat.shape for stat in stats])
+        masks = [None] * len(self.conditions)
+
+        def get_mask(index):
+            """
+            Return the mask of states where the condition at index holds.
+            """
+            if masks[index] is None:
+                condition = self.conditions[index]
+                if condition is no_condition:
+                    masks[index] = np.True_
+                elif isinstance(condition, Threshold):
+                    masks[index] = condition.compare(*stats)
+                else:
+                    masks[index] = np.vectorize(
+                        lambda c_hp, c_sp, t_hp, t_sp: bool(condition(
+                            CharacterStats(c_hp, c_sp),
+                            CharacterStats(t_hp, t_sp))),
+                        otypes=[bool])(*stats)
+            return masks[index]
+
+        result = np.full(shape, -1, dtype=np.int16)
+        undecided = np.ones(shape, dtype=bool)
+
+        for rule_index, (_, path, own) in enumerate(self.rules):
+            picked = undecided
+            for index in path:
+                picked = picked & get_mask(index)
+            if own is not None:
+                picked = picked & ~get_mask(own)
+            if picked is undecided:
+                picked = undecided.copy()
+
+            result[picked] = rule_index
+            undecided &= ~picked
+            if not undecided.any():
+                break
+        return result
+
+
+class Threshold:
+    """
+    A condition comparing one of the caster's or target's stats against a
+    constant, e.g. Threshold('caster', 'hp', '>', 90) is True if the caster's
+    HP is > 90.
+
+    Unlike an arbitrary function, a Threshold can be inspected, which lets a
+    ThresholdLookupTable precompute the skills picked by a tree.
+
+    character - 'caster' or 'target'.
+    stat - 'hp' or 'sp'.
+    comparison - '>' or '<'.
+    value - the int the stat is compared against.
+    """
+    character: str
+    stat: str
+    comparison: str
+    value: int
+
+    def __init__(self, character: str, stat: str, comparison: str,
+                 value: int) -> None:
+        """
+        Initialize this Threshold.
+
+        >>> Threshold('caster', 'hp', '>', 90)
+        Threshold(caster hp > 90)
+        """
+        if character not in ('caster', 'target') or \
+                stat not in ('hp', 'sp') or comparison not in ('>', '<'):
+            raise ValueError("Invalid threshold: {} {} {}".format(
+                character, stat, comparison))
+        self.character = character
+        self.stat = stat
+        self.comparison = comparison
+        self.value = value
+
+    def __call__(self, caster: 'Character', target: 'Character') -> bool:
+        """
+        Return whether this Threshold holds for caster and target.
+
+        >>> from battle_queue import BattleQueue
+        >>> from playstyle import ManualPlaystyle
+        >>> from characters import Rogue
+        >>> bq = BattleQueue()
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> r2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> r2.set_sp(30)
+        >>> Threshold('target', 'sp', '<', 40)(r, r2)
+        True
+        """
+        character = caster if self.character == 'caster' else target
+        if self.stat == 'hp':
+            stat = character.get_hp()
+        else:
+            stat = character.get_sp()
+
+        if self.comparison == '>':
+            return stat > self.value
+        return stat < self.value
+
+    def compare(self, caster_hp: int, caster_sp: int, target_hp: int,
+                target_sp: int) -> bool:
+        """
+        Return whether this Threshold holds for a caster and target with the
+        given stats. The stats may also be NumPy arrays, in which case the
+        result is an array.
+
+        >>> Threshold('target', 'hp', '<', 30).compare(100, 100, 20, 100)
+        True
+        """
+        return self(CharacterStats(caster_hp, caster_sp),
+                    CharacterStats(target_hp, target_sp))
+
+    def __repr__(self) -> str:
+        """
+        Return the representation of this Threshold.
+        """
+        return "Threshold({} {} {} {})".format(self.character, self.stat,
+                                               self.comparison, self.value)
+
+    def get_boundary(self) -> int:
+        """
+        Return the int b such that this Threshold holds exactly for the stats
+        >= b if its comparison is '>', or exactly for the stats < b if it
+        is '<'.
+
+        >>> Threshold('caster', 'hp', '>', 90).get_boundary()
+        91
+        >>> Threshold('caster', 'hp', '<', 30).get_boundary()
+        30
+        """
+        if self.comparison == '>':
+            return self.value + 1
+        return self.value
+
+    def implies(self, other: Callable) -> bool:
+        """
+        Return whether other is always True when this Threshold is True.
+
+        >>> gt_90 = Threshold('caster', 'hp', '>', 90)
+        >>> gt_90.implies(Threshold('caster', 'hp', '>', 50))
+        True
+        >>> gt_90.implies(Threshold('target', 'hp', '>', 50))
+        False
+        """
+        return isinstance(other, Threshold) and \
+            self._same_stat(other) and \
+            self.comparison == other.comparison and \
+            (self.value >= other.value if self.comparison == '>'
+             else self.value <= other.value)
+
+    def contradicts(self, other: Callable) -> bool:
+        """
+        Return whether other is always False when this Threshold is True.
+
+        >>> gt_90 = Threshold('caster', 'hp', '>', 90)
+        >>> gt_90.contradicts(Threshold('caster', 'hp', '<', 50))
+        True
+        >>> gt_90.contradicts(Threshold('caster', 'hp', '<', 95))
+        False
+        """
+        if not isinstance(other, Threshold) or not self._same_stat(other) \
+                or self.comparison == other.comparison:
+            return False
+        if self.comparison == '>':
+            return self.get_boundary() >= other.get_boundary()
+        return other.get_boundary() >= self.get_boundary()
+
+    def _same_stat(self, other: 'Threshold') -> bool:
+        """
+        Return whether other compares the same character's same stat.
+        """
+        return self.character == other.character and self.stat == other.stat
+
+
+def no_condition(_, __) -> bool:
+    """
+    By default, return True.
+    """
+    return True
+
+
+# The stats a ThresholdLookupTable is indexed by, in order.
+_TABLE_STATS = [('caster', 'hp'), ('caster', 'sp'),
+                ('target', 'hp'), ('target', 'sp')]
+
+
+class CharacterStats:
     """
-    def caster_hp_gt_90(caster, _):
+    A stand-in for a Character with only an HP and SP, used to evaluate
+    conditions without setting up a game.
+    """
+
+    def __init__(self, hp: int, sp: int) -> None:
         """
-        Return True if the caster's HP is > 90
+        Initialize these CharacterStats with the HP hp and SP sp.
+
+        >>> Threshold('caster', 'sp', '>', 20)(CharacterStats(10, 30), None)
+        True
         """
-        return caster.get_hp() > 90
+        self._hp = hp
+        self._sp = sp
 
-    def target_sp_gt_40(_, target):
+    def get_hp(self) -> int:
+        """
+        Return the HP of these CharacterStats.
         """
-        Return True if the target's SP is >40
+        return self._hp
+
+    def get_sp(self) -> int:
         """
-        return target.get_sp() > 40
+        Return the SP of these CharacterStats.
+        """
+        return self._sp
+
+
+class ThresholdLookupTable:
+    """
+    The skills picked by a SkillDecisionTree whose conditions are all
+    Thresholds, precomputed for every combination of threshold intervals.
+
+    The thresholds split each of the caster's HP, caster's SP, target's HP
+    and target's SP into intervals in which no condition changes, so picking
+    a skill only needs to find each stat's interval and index the table.
 
-    def caster_sp_gt_20(caster, _):
+    boundaries - for each stat in _TABLE_STATS, the sorted boundaries of its
+                 Thresholds.
+    skills - the skill picked for each combination of intervals, flattened
+             with the target's SP varying fastest.
+    """
+    boundaries: List[List[int]]
+    skills: List['Skill']
+
+    def __init__(self, rules: CompiledSkillDecisionTree) -> None:
         """
-        Return True if the caster's SP is > 20
+        Initialize this ThresholdLookupTable from the rules of a compiled
+        tree that ThresholdLookupTable.supports.
         """
-        return caster.get_sp() > 20
+        boundaries = {stat: set() for stat in _TABLE_STATS}
+        for condition in rules.conditions:
+            if condition is not no_condition:
+                key = (condition.character, condition.stat)
+                boundaries[key].add(condition.get_boundary())
+        self.boundaries = [sorted(boundaries[stat]) for stat in _TABLE_STATS]
+
+        # Every stat in an interval picks the same skill, so evaluate the
+        # rules once at the lowest stat of each interval.
+        representatives = []
+        for stat_boundaries in self.boundaries:
+            if stat_boundaries:
+                representatives.append([stat_boundaries[0] - 1] +
+                                       stat_boundaries)
+            else:
+                representatives.append([0])
 
-    def target_hp_lt_30(_, target):
+        self.skills = []
+        for caster_hp, caster_sp, target_hp, target_sp in \
+                product(*representatives):
+            caster = CharacterStats(caster_hp, caster_sp)
+            target = CharacterStats(target_hp, target_sp)
+            self.skills.append(rules.pick_skill(caster, target))
+
+        self._sizes = [len(stat_boundaries) + 1
+                       for stat_boundaries in self.boundaries]
+        self._key = (tuple(tuple(stat_boundaries)
+                           for stat_boundaries in self.boundaries),
+                     tuple(skill.__class__.__name__ for skill in self.skills))
+
+    def __repr__(self) -> str:
         """
-        Return True if the target's HP is < 30
+        Return the representation of this ThresholdLookupTable.
         """
-        return target.get_hp() < 30
+        return "ThresholdLookupTable({})".format(
+            " x ".join(str(size) for size in self._sizes))
 
-    def caster_hp_gt_50(caster, _):
+    def get_key(self) -> tuple:
         """
-        Return True if the caster's HP is > 50
+        Return a hashable key that is equal for ThresholdLookupTables that
+        pick the same skills: the boundaries and the class of every skill.
+
+        >>> create_default_tree().compile().get_key() == \\
+        ...     create_default_tree().compile().get_key()
+        True
         """
-        return caster.get_hp() > 50
+        return self._key
 
-    def no_condition(_, __):
+    @staticmethod
+    def supports(rules: CompiledSkillDecisionTree) -> bool:
         """
-        By default, return True.
+        Return whether every condition in rules is no_condition or a
+        Threshold on an int.
         """
+        for condition in rules.conditions:
+            if condition is not no_condition and \
+                    not (isinstance(condition, Threshold) and
+                         isinstance(condition.value, int)):
+                return False
         return True
 
+    def pick_skill(self, caster: 'Character', target: 'Character') \
+            -> Union['Skill', None]:
+        """
+        Pick the skill with the highest priority, and fulfills the conditions.
+
+        >>> sdt = ThresholdLookupTable(
+        ...     CompiledSkillDecisionTree(create_default_tree()))
+        >>> from battle_queue import BattleQueue
+        >>> bq = BattleQueue()
+        >>> from playstyle import ManualPlaystyle
+        >>> from characters import Vampire
+        >>> caster = Vampire("Caster", bq, ManualPlaystyle(bq))
+        >>> target = Vampire("Target", bq, ManualPlaystyle(bq))
+        >>> caster.set_sp(40)
+        >>> target.set_hp(50)
+        >>> target.set_sp(30)
+        >>> sdt.pick_skill(caster, target).__class__.__name__
+        'MageSpecial'
+        """
+        boundaries = self.boundaries
+        sizes = self._sizes
+        index = bisect_right(boundaries[0], caster.get_hp())
+        index = index * sizes[1] + bisect_right(boundaries[1],
+                                                caster.get_sp())
+        index = index * sizes[2] + bisect_right(boundaries[2],
+                                                target.get_hp())
+        index = index * sizes[3] + bisect_right(boundaries[3],
+                                                target.get_sp())
+        return self.skills[index]
+
+
+def create_default_tree() -> SkillDecisionTree:
+    """
+    Return a SkillDecisionTree.
+
+    >>> sdt = create_default_tree()
+    >>> from battle_queue import BattleQueue
+    >>> bq = BattleQueue()
+    >>> from playstyle import ManualPlaystyle
+    >>> from characters import Rogue, Mage, Vampire, Sorcerer
+    >>> caster = Vampire("Caster", bq, ManualPlaystyle(bq))
+    >>> target = Vampire("Target", bq, ManualPlaystyle(bq))
+    >>> caster.set_hp(80)
+    >>> caster.set_sp(40)
+    >>> target.set_hp(20)
+    >>> target.set_sp(50)
+    >>> sdt.get_satisfied_sdt(caster, target)
+    [SDT(6, RogueAttack), SDT(8, RogueAttack), SDT(1, RogueAttack)]
+    >>> sdt.pick_skill(caster, target).__class__.__name__
+    'RogueAttack'
+    """
+    caster_hp_gt_90 = Threshold('caster', 'hp', '>', 90)
+    target_sp_gt_40 = Threshold('target', 'sp', '>', 40)
+    caster_sp_gt_20 = Threshold('caster', 'sp', '>', 20)
+    target_hp_lt_30 = Threshold('target', 'hp', '<', 30)
+    caster_hp_gt_50 = Threshold('caster', 'hp', '>', 50)
+
     priority_1 = SkillDecisionTree(RogueAttack(), caster_hp_gt_90, 1)
     priority_2 = SkillDecisionTree(MageSpecial(), target_sp_gt_40, 2)
     priority_3 = SkillDecisionTree(MageAttack(), caster_sp_gt_20, 3)
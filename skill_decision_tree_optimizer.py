@@ -0,0 +1,195 @@
+"""
+A static optimization pass for SkillDecisionTrees.
+
+optimize_tree returns a SkillDecisionTree that picks the same skills as the
+original but checks fewer conditions:
+    - A node whose condition is always True when it is reached (no_condition,
+      or a Threshold implied by an ancestor's) is never picked itself, so it
+      is replaced by its children.
+    - A node whose condition is always False when it is reached (a Threshold
+      contradicted by an ancestor's) is always picked over its children, so
+      its children are removed.
+    - A subtree whose priorities are all dominated, because the subtrees
+      beside it on its path always offer a higher priority skill, can never
+      be picked. It is removed, or collapsed into a leaf when its parent
+      needs at least one child.
+"""
+import random
+from typing import Callable, List, Tuple
+from skill_decision_tree import SkillDecisionTree, Threshold, \
+    CharacterStats, no_condition
+
+
+def optimize_tree(tree: SkillDecisionTree) -> SkillDecisionTree:
+    """
+    Return a new SkillDecisionTree that picks the same skills as tree. tree
+    is not changed.
+
+    >>> from skills import MageAttack, RogueAttack
+    >>> always = SkillDecisionTree(MageAttack(), no_condition, 2,
+    ...                            [SkillDecisionTree(RogueAttack(), None, 1),
+    ...                             SkillDecisionTree(RogueAttack(), None, 3)])
+    >>> root = SkillDecisionTree(MageAttack(), lambda c, t: True, 4, [always])
+    >>> optimized = optimize_tree(root)
+    >>> optimized, optimized.children
+    (SDT(4, MageAttack), [SDT(1, RogueAttack)])
+    """
+    return _optimize(tree, [], float('inf'), True)[0][0]
+
+
+def count_condition_calls(tree: SkillDecisionTree, caster: 'Character',
+                          target: 'Character') -> int:
+    """
+    Return the number of conditions tree.pick_skill calls for caster and
+    target.
+
+    >>> from skill_decision_tree import create_default_tree
+    >>> count_condition_calls(create_default_tree(),
+    ...                       CharacterStats(100, 100), CharacterStats(50, 50))
+    5
+    """
+    if not tree.children:
+        return 0
+    if not tree.condition(caster, target):
+        return 1
+    return 1 + sum(count_condition_calls(child, caster, target)
+                   for child in tree.children)
+
+
+def sample_states(number: int, seed: int = 0) \
+        -> List[Tuple[CharacterStats, CharacterStats]]:
+    """
+    Return number (caster, target) pairs with HP and SP drawn uniformly from
+    0 to 100, using the random seed seed.
+
+    >>> len(sample_states(10))
+    10
+    """
+    rng = random.Random(seed)
+    return [(CharacterStats(rng.randint(0, 100), rng.randint(0, 100)),
+             CharacterStats(rng.randint(0, 100), rng.randint(0, 100)))
+            for _ in range(number)]
+
+
+def report_savings(tree: SkillDecisionTree, optimized: SkillDecisionTree,
+                   states: List[Tuple['Character', 'Character']]) -> dict:
+    """
+    Return the number of nodes in tree and optimized and the number of
+    condition calls each makes over states.
+
+    >>> from skill_decision_tree import create_default_tree
+    >>> tree = create_default_tree()
+    >>> report = report_savings(tree, optimize_tree(tree), sample_states(100))
+    >>> report['saved_calls']
+    0
+    """
+    original_calls, optimized_calls = 0, 0
+    for caster, target in states:
+        original_calls += count_condition_calls(tree, caster, target)
+        optimized_calls += count_condition_calls(optimized, caster, target)
+
+    return {'original_nodes': _count_nodes(tree),
+            'optimized_nodes': _count_nodes(optimized),
+            'original_calls': original_calls,
+            'optimized_calls': optimized_calls,
+            'saved_calls': original_calls - optimized_calls}
+
+
+def _optimize(tree: SkillDecisionTree, path: List[Callable], bound: float,
+              is_root: bool = False) -> List[Tuple[SkillDecisionTree, bool]]:
+    """
+    Return the optimized nodes that replace tree, each paired with whether it
+    can never be picked.
+
+    path is the conditions known to be True when tree is reached, and bound
+    is a priority that some skill outside tree always beats or matches.
+    """
+    if not tree.children:
+        return [(_leaf(tree), tree.priority > bound)]
+
+    if _min_priority(tree) > bound:
+        return [(_leaf(tree), True)]
+
+    if any(_contradicts(known, tree.condition) for known in path):
+        return [(_leaf(tree), tree.priority > bound)]
+
+    always_true = tree.condition is no_condition or \
+        any(_implies(known, tree.condition) for known in path)
+    child_path = path if always_true else path + [tree.condition]
+
+    # A child can only be picked over the best skill each of its siblings
+    # is guaranteed to offer.
+    uppers = [_upper_priority(child) for child in tree.children]
+    children = []
+    for i, child in enumerate(tree.children):
+        child_bound = min([bound] + uppers[:i] + uppers[i + 1:])
+        children.extend(_optimize(child, child_path, child_bound))
+
+    kept = [(child, dominated) for child, dominated in children
+            if not dominated]
+    if not kept:
+        kept = children[:1]
+
+    if always_true and not is_root:
+        return kept
+    return [(SkillDecisionTree(tree.value, tree.condition, tree.priority,
+                               [child for child, _ in kept]), False)]
+
+
+def _leaf(tree: SkillDecisionTree) -> SkillDecisionTree:
+    """
+    Return a leaf with tree's skill, condition and priority.
+    """
+    return SkillDecisionTree(tree.value, tree.condition, tree.priority)
+
+
+def _implies(known: Callable, condition: Callable) -> bool:
+    """
+    Return whether condition is always True when known is True.
+    """
+    if known is condition:
+        return True
+    return isinstance(known, Threshold) and known.implies(condition)
+
+
+def _contradicts(known: Callable, condition: Callable) -> bool:
+    """
+    Return whether condition is always False when known is True.
+    """
+    return isinstance(known, Threshold) and known.contradicts(condition)
+
+
+def _upper_priority(tree: SkillDecisionTree) -> int:
+    """
+    Return a priority that the best skill tree picks always beats or matches,
+    whatever its conditions return.
+    """
+    if not tree.children:
+        return tree.priority
+
+    best_child = min(_upper_priority(child) for child in tree.children)
+    if tree.condition is no_condition:
+        return best_child
+    return max(tree.priority, best_child)
+
+
+def _min_priority(tree: SkillDecisionTree) -> int:
+    """
+    Return the lowest priority in tree.
+    """
+    return min([tree.priority] +
+               [_min_priority(child) for child in tree.children])
+
+
+def _count_nodes(tree: SkillDecisionTree) -> int:
+    """
+    Return the number of nodes in tree.
+    """
+    return 1 + sum(_count_nodes(child) for child in tree.children)
+
+
+if __name__ == '__main__':
+    from skill_decision_tree import create_default_tree
+    DEFAULT_TREE = create_default_tree()
+    print(report_savings(DEFAULT_TREE, optimize_tree(DEFAULT_TREE),
+                         sample_states(10000)))
@@ -0,0 +1,113 @@
+"""
+Basic Unittests for the SkillDecisionTree optimizer.
+
+"""
+import random
+import unittest
+
+from skill_decision_tree import SkillDecisionTree, Threshold, no_condition, \
+    create_default_tree
+from skill_decision_tree_optimizer import optimize_tree, report_savings, \
+    sample_states
+from skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial
+
+SKILLS = [MageAttack(), MageSpecial(), RogueAttack(), RogueSpecial()]
+
+
+class SkillDecisionTreeOptimizerUnitTests(unittest.TestCase):
+    def create_redundant_tree(self):
+        """
+        Creates a SkillDecisionTree with an implied condition, a contradicted
+        condition, a no_condition node and a dominated subtree.
+        """
+        caster_hp_gt_50 = Threshold('caster', 'hp', '>', 50)
+        caster_hp_gt_20 = Threshold('caster', 'hp', '>', 20)
+        caster_hp_lt_40 = Threshold('caster', 'hp', '<', 40)
+        target_sp_gt_40 = Threshold('target', 'sp', '>', 40)
+
+        priority_1 = SkillDecisionTree(RogueAttack(), target_sp_gt_40, 1,
+                                       [SkillDecisionTree(MageAttack(),
+                                                          no_condition, 9)])
+        implied = SkillDecisionTree(MageSpecial(), caster_hp_gt_20, 2,
+                                    [SkillDecisionTree(RogueSpecial(),
+                                                       no_condition, 3)])
+        contradicted = SkillDecisionTree(RogueAttack(), caster_hp_lt_40, 4,
+                                         [SkillDecisionTree(MageAttack(),
+                                                            no_condition, 5)])
+        dominated = SkillDecisionTree(MageAttack(), target_sp_gt_40, 10,
+                                      [SkillDecisionTree(RogueAttack(),
+                                                         no_condition, 11)])
+        always = SkillDecisionTree(MageSpecial(), no_condition, 6,
+                                   [contradicted, dominated])
+
+        return SkillDecisionTree(MageAttack(), caster_hp_gt_50, 7,
+                                 [priority_1, implied, always])
+
+    def create_random_tree(self, rng, priorities, depth):
+        """
+        Creates a random SkillDecisionTree of Thresholds using priorities
+        drawn from priorities.
+        """
+        if depth == 0 or rng.random() < 0.3:
+            condition = no_condition
+        else:
+            condition = Threshold(rng.choice(['caster', 'target']),
+                                  rng.choice(['hp', 'sp']),
+                                  rng.choice(['>', '<']),
+                                  rng.randrange(0, 101, 10))
+        tree = SkillDecisionTree(rng.choice(SKILLS), condition,
+                                 priorities.pop())
+        if depth > 0:
+            for _ in range(rng.randint(0, 3)):
+                tree.children.append(self.create_random_tree(rng, priorities,
+                                                             depth - 1))
+        return tree
+
+    def assert_same_picks(self, tree, optimized, states):
+        """
+        Assert that tree and optimized pick the same skill in every state.
+        """
+        for caster, target in states:
+            self.assertIs(tree.pick_skill(caster, target),
+                          optimized.pick_skill(caster, target),
+                          ("The optimized tree picked a different skill " +
+                           "for the caster {}/{} and target {}/{}").format(
+                               caster.get_hp(), caster.get_sp(),
+                               target.get_hp(), target.get_sp()))
+
+    def test_redundant_tree_saves_calls(self):
+        """
+        Test to make sure optimizing a tree with redundant nodes keeps its
+        picks and checks fewer conditions.
+        """
+        tree = self.create_redundant_tree()
+        optimized = optimize_tree(tree)
+        states = sample_states(2000)
+
+        self.assert_same_picks(tree, optimized, states)
+        report = report_savings(tree, optimized, states)
+        self.assertLess(report['optimized_nodes'], report['original_nodes'])
+        self.assertGreater(report['saved_calls'], 0)
+
+    def test_default_tree_keeps_picks(self):
+        """
+        Test to make sure optimizing the default tree keeps its picks.
+        """
+        tree = create_default_tree()
+        self.assert_same_picks(tree, optimize_tree(tree), sample_states(2000))
+
+    def test_random_trees_keep_picks(self):
+        """
+        Test to make sure optimizing random trees keeps their picks.
+        """
+        rng = random.Random(0)
+        states = sample_states(300, seed=1)
+        for _ in range(200):
+            priorities = list(range(1, 100))
+            rng.shuffle(priorities)
+            tree = self.create_random_tree(rng, priorities, 3)
+            self.assert_same_picks(tree, optimize_tree(tree), states)
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
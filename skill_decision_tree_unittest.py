@@ -8,7 +8,8 @@ import unittest
 from game import CHARACTER_CLASSES
 from playstyle import ManualPlaystyle
 from battle_queue import BattleQueue
-from skill_decision_tree import SkillDecisionTree, create_default_tree
+from skill_decision_tree import SkillDecisionTree, create_default_tree, \
+    CompiledSkillDecisionTree, ThresholdLookupTable
 from skills import MageAttack, RogueAttack, MageSpecial
 from characters import Rogue
 
@@ -260,5 +261,121 @@ class SkillDecisionTreeUnitTests(unittest.TestCase):
                                                 expected,
                                                 actual))
 
+    def test_compiled_tree_matches_pick_skill(self):
+        """
+        Test to make sure compiling the default and basic trees picks the same
+        skill as pick_skill for a range of HP and SP values.
+        """
+        for tree in [self.default_tree, self.basic_tree]:
+            compiled = tree.compile()
+            for caster_hp in range(0, 101, 5):
+                for caster_sp in range(0, 101, 5):
+                    for target_hp in range(0, 101, 5):
+                        for target_sp in range(0, 101, 10):
+                            self.caster.set_hp(caster_hp)
+                            self.caster.set_sp(caster_sp)
+                            self.target.set_hp(target_hp)
+                            self.target.set_sp(target_sp)
+                            expected = tree.pick_skill(self.caster,
+                                                       self.target)
+                            actual = compiled.pick_skill(self.caster,
+                                                         self.target)
+                            self.assertIs(expected, actual,
+                                          ("The compiled tree picked {} " +
+                                           "but pick_skill picked {} for " +
+                                           "the characters:\n{}\n{}").format(
+                                               actual, expected,
+                                               self.caster, self.target))
+
+    def test_default_tree_compiles_to_lookup_table(self):
+        """
+        Test to make sure the default tree compiles to a lookup table that
+        picks the same skill as pick_skill on either side of every threshold.
+        """
+        compiled = self.default_tree.compile()
+        self.assertIsInstance(compiled, ThresholdLookupTable)
+
+        for caster_hp in [49, 50, 51, 52, 89, 90, 91, 92, 200]:
+            for caster_sp in [-1, 19, 20, 21, 22]:
+                for target_hp in [0, 28, 29, 30, 31]:
+                    for target_sp in [39, 40, 41, 42]:
+                        self.caster.set_hp(caster_hp)
+                        self.caster.set_sp(caster_sp)
+                        self.target.set_hp(target_hp)
+                        self.target.set_sp(target_sp)
+                        self.assertIs(
+                            self.default_tree.pick_skill(self.caster,
+                                                         self.target),
+                            compiled.pick_skill(self.caster, self.target))
+
+    def test_custom_conditions_compile_to_rules(self):
+        """
+        Test to make sure a tree with arbitrary condition functions falls
+        back to a CompiledSkillDecisionTree.
+        """
+        self.assertIsInstance(self.basic_tree.compile(),
+                              CompiledSkillDecisionTree)
+
+    def test_sorcerer_state_includes_tree(self):
+        """
+        Test to make sure Sorcerers with the same stats only have equal
+        states (and so share cached search results) when their trees pick
+        the same skills.
+        """
+        sorcerers = [CHARACTER_CLASSES['s']("S", BattleQueue(),
+                                            ManualPlaystyle(None))
+                     for _ in range(3)]
+        sorcerers[1].set_skill_decision_tree(create_default_tree())
+        sorcerers[2].set_skill_decision_tree(self.basic_tree)
+
+        self.assertEqual(sorcerers[0].get_state(), sorcerers[1].get_state())
+        self.assertNotEqual(sorcerers[0].get_state(),
+                            sorcerers[2].get_state())
+
+    def test_sorcerer_uses_tree_snapshot(self):
+        """
+        Test to make sure a Sorcerer keeps picking skills with the tree as it
+        was set, until it is set again, and that copies share the tree.
+        """
+        bq = BattleQueue()
+        sorcerer = CHARACTER_CLASSES['s']("S", bq, ManualPlaystyle(bq))
+        tree = create_default_tree()
+        sorcerer.set_skill_decision_tree(tree)
+        copy = sorcerer.copy(BattleQueue())
+        self.assertIs(tree, copy.get_skill_decision_tree())
+
+        before = sorcerer.pick_skill(self.target)
+        tree.children = []
+        self.assertIs(before, sorcerer.pick_skill(self.target))
+        self.assertIs(before, copy.pick_skill(self.target))
+
+        sorcerer.set_skill_decision_tree(tree)
+        self.assertIs(tree.value, sorcerer.pick_skill(self.target))
+        self.assertIs(before, copy.pick_skill(self.target))
+
+    def test_pick_skill_indices_matches_pick_skill(self):
+        """
+        Test to make sure batch evaluation over a grid of states picks the
+        same skills as pick_skill, for both Thresholds and other conditions.
+        """
+        import numpy as np
+
+        values = np.arange(0, 101, 10)
+        grid = np.meshgrid(values, values, values, values, indexing='ij')
+        for tree in [self.default_tree, self.basic_tree]:
+            skills = tree.get_ranked_skills()
+            indices = tree.pick_skill_indices(*grid)
+            self.assertEqual(indices.shape, grid[0].shape)
+
+            for position in np.ndindex(indices.shape):
+                caster_hp, caster_sp, target_hp, target_sp = \
+                    [int(stat[position]) for stat in grid]
+                self.caster.set_hp(caster_hp)
+                self.caster.set_sp(caster_sp)
+                self.target.set_hp(target_hp)
+                self.target.set_sp(target_sp)
+                self.assertIs(tree.pick_skill(self.caster, self.target),
+                              skills[indices[position]])
+
 if __name__ == "__main__":
     unittest.main(exit = False)
\ No newline at end of file
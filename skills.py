@@ -2,6 +2,7 @@
 The Skill classes.
 
 """
+import events
 
 class Skill:
     """
@@ -21,6 +22,12 @@ class Skill:
         Return the SP cost of this Skill.
         """
         return self._cost
+
+    def get_damage(self) -> int:
+        """
+        Return the damage this Skill deals before the target's defense.
+        """
+        return self._damage
     
     def use(self, caster: 'Character', target: 'Character') -> None:
         """
@@ -268,8 +275,11 @@ class SorcererAttack(NormalAttack):
         >>> v.get_hp()
         83
         """
-        picked = caster.get_skill_decision_tree().pick_skill(caster, target)
-        picked.use(caster, target)
+        picked = caster.pick_skill(target)
+        if events.CONTEXT.turn is None:
+            picked.use(caster, target)
+        else:
+            events.log_skill(picked, caster, target, self)
         caster.set_sp(caster.get_sp() + picked.get_sp_cost() - 15)
 
 
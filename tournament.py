@@ -0,0 +1,345 @@
+"""
+A round-robin tournament between every computer-controlled character.
+
+The entrants are every pair of a key in CHARACTER_CLASSES and a non-manual key
+in PLAYSTYLE_CLASSES. Every ordered pairing of two different entrants plays
+the same number of games on each kind of battle queue in BATTLE_QUEUE_CLASSES,
+spread across worker processes. The results give a win/draw/loss matrix and
+Elo ratings for every entrant.
+
+Every pairing plays its games from its own seed (see get_pairing_seed), so
+the random moves of different pairings are independent of each other.
+
+Each finished pairing is appended to a checkpoint file as a JSON line, so a
+tournament that is interrupted and started again with the same checkpoint
+only plays the pairings that are left.
+
+Worker processes keep a Minimax cache (see Minimax.cache) for the matchup
+they last played, and are handed every unfinished pairing of a matchup as
+one task, so games between the same characters don't repeat the same
+searches.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+from typing import Dict, Iterator, List, Tuple
+from game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES, BATTLE_QUEUE_CLASSES
+from simulation import GameSpec, run_game
+
+# The cache of the matchup a worker process played last, as a
+# (matchup, cache) pair.
+_WORKER_CACHE = (None, {})
+
+
+def get_entrants() -> List[Tuple[str, str]]:
+    """
+    Return every (character, playstyle) pair of keys that can be simulated.
+
+    >>> len(get_entrants())
+    12
+    >>> get_entrants()[:3]
+    [('m', 'r'), ('m', 'mr'), ('m', 'mi')]
+    """
+    return [(character, playstyle)
+            for character in CHARACTER_CLASSES
+            for playstyle in PLAYSTYLE_CLASSES
+            if not PLAYSTYLE_CLASSES[playstyle](None).is_manual]
+
+
+def get_pairings(entrants: List[Tuple[str, str]] = None,
+                 queues: List[str] = None) -> List[tuple]:
+    """
+    Return every pairing of two different entrants (every entrant by
+    default) on each of queues (every key in BATTLE_QUEUE_CLASSES by
+    default), grouped by matchup.
+
+    A pairing is a (p1, p1_playstyle, p2, p2_playstyle, queue) tuple.
+
+    >>> get_pairings([('m', 'r'), ('v', 'mr')], ['n'])
+    [('m', 'r', 'v', 'mr', 'n'), ('v', 'mr', 'm', 'r', 'n')]
+    >>> len(get_pairings())
+    264
+    """
+    entrants = get_entrants() if entrants is None else entrants
+    queues = list(BATTLE_QUEUE_CLASSES) if queues is None else queues
+    pairings = [first + second + (queue,)
+                for first in entrants for second in entrants
+                for queue in queues if first != second]
+    return sorted(pairings, key=lambda pairing: (pairing[0], pairing[2],
+                                                 pairing[4]))
+
+
+def get_pairing(record: dict) -> tuple:
+    """
+    Return the pairing record was played for.
+
+    >>> get_pairing({'p1': 'm', 'p1_playstyle': 'r', 'p2': 'v',
+    ...              'p2_playstyle': 'mr', 'queue': 'n'})
+    ('m', 'r', 'v', 'mr', 'n')
+    """
+    return (record['p1'], record['p1_playstyle'], record['p2'],
+            record['p2_playstyle'], record['queue'])
+
+
+def get_matchup(pairing: tuple) -> tuple:
+    """
+    Return the (p1, p2, queue) matchup of pairing, whose games can share a
+    Minimax cache.
+
+    >>> get_matchup(('m', 'r', 'v', 'mr', 'n'))
+    ('m', 'v', 'n')
+    """
+    return pairing[0], pairing[2], pairing[4]
+
+
+def get_pairing_seed(seed: int, pairing: tuple) -> int:
+    """
+    Return the seed that the games of pairing are played from in a
+    tournament played from the root seed seed.
+
+    Game number index of pairing can be replayed on its own as the GameSpec
+    of pairing with this seed and index.
+
+    >>> get_pairing_seed(0, ('m', 'r', 'v', 'mr', 'n')) == \\
+    ...     get_pairing_seed(0, ('m', 'r', 'v', 'mr', 'n'))
+    True
+    >>> get_pairing_seed(0, ('m', 'r', 'v', 'mr', 'n')) == \\
+    ...     get_pairing_seed(0, ('v', 'mr', 'm', 'r', 'n'))
+    False
+    """
+    return random.Random("{}:{}".format(seed, ":".join(pairing))) \
+        .getrandbits(63)
+
+
+def play_pairing(task: Tuple[tuple, int, int]) -> dict:
+    """
+    Play the games of a (pairing, games, seed) task from the pairing's own
+    seed (see get_pairing_seed) and return its record.
+
+    The record has the keys p1, p1_playstyle, p2, p2_playstyle, queue, games,
+    seed, and the number of wins, draws and losses of p1.
+
+    >>> record = play_pairing((('m', 'r', 'r', 'r', 'n'), 10, 0))
+    >>> record['wins'] + record['draws'] + record['losses']
+    10
+    """
+    global _WORKER_CACHE
+    pairing, games, seed = task
+    p1, p1_playstyle, p2, p2_playstyle, queue = pairing
+
+    matchup = get_matchup(pairing)
+    if _WORKER_CACHE[0] != matchup:
+        _WORKER_CACHE = (matchup, {})
+
+    record = {'p1': p1, 'p1_playstyle': p1_playstyle, 'p2': p2,
+              'p2_playstyle': p2_playstyle, 'queue': queue, 'games': games,
+              'seed': seed, 'wins': 0, 'draws': 0, 'losses': 0}
+    pairing_seed = get_pairing_seed(seed, pairing)
+    for index in range(games):
+        result = run_game(GameSpec(p1, p2, p1_playstyle, p2_playstyle, queue,
+                                   pairing_seed, index), _WORKER_CACHE[1])
+        record[{1: 'wins', 2: 'losses', None: 'draws'}[result.winner]] += 1
+    return record
+
+
+def play_matchup(task: Tuple[List[tuple], int, int]) -> List[dict]:
+    """
+    Play the games of every pairing of a (pairings, games, seed) task, whose
+    pairings all share a matchup, and return their records in order.
+
+    >>> records = play_matchup(([('m', 'r', 'r', 'r', 'n'),
+    ...                          ('m', 'mr', 'r', 'r', 'n')], 2, 0))
+    >>> [record['p1_playstyle'] for record in records]
+    ['r', 'mr']
+    """
+    pairings, games, seed = task
+    return [play_pairing((pairing, games, seed)) for pairing in pairings]
+
+
+def load_checkpoint(path: str, games: int, seed: int) -> Dict[tuple, dict]:
+    """
+    Return the records in the checkpoint file at path that were played with
+    games games from seed, by pairing.
+
+    A missing file has no records, and so does an incomplete last line left
+    by an interrupted write.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+
+    with open(path) as checkpoint:
+        for line in checkpoint:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record['games'] == games and record['seed'] == seed:
+                records[get_pairing(record)] = record
+    return records
+
+
+def run_tournament(games: int, seed: int = 0, checkpoint: str = None,
+                   processes: int = None,
+                   entrants: List[Tuple[str, str]] = None,
+                   queues: List[str] = None) -> Iterator[dict]:
+    """
+    Play games games of every pairing (see get_pairings) across processes
+    worker processes (one per CPU by default) and yield their records,
+    starting with the ones already in checkpoint.
+
+    If checkpoint is given, every new record is appended to it as soon as its
+    matchup finishes. If processes is 1, the games are played in this process.
+    """
+    finished = {} if checkpoint is None else \
+        load_checkpoint(checkpoint, games, seed)
+    for record in finished.values():
+        yield record
+
+    pairings = [pairing for pairing in get_pairings(entrants, queues)
+                if pairing not in finished]
+    tasks = [(list(matchup_pairings), games, seed)
+             for _, matchup_pairings in itertools.groupby(pairings,
+                                                          get_matchup)]
+    if not tasks:
+        return
+
+    output = None if checkpoint is None else open(checkpoint, 'a+')
+    if output is not None and output.tell():
+        # Start on a new line after any incomplete last line.
+        output.seek(output.tell() - 1)
+        if output.read() != '\n':
+            output.write('\n')
+    pool = None
+    try:
+        if processes == 1:
+            batches = map(play_matchup, tasks)
+        else:
+            pool = multiprocessing.Pool(processes)
+            batches = pool.imap_unordered(play_matchup, tasks)
+
+        for records in batches:
+            for record in records:
+                if output is not None:
+                    output.write(json.dumps(record) + '\n')
+                    output.flush()
+                yield record
+    finally:
+        if output is not None:
+            output.close()
+        if pool is not None:
+            pool.terminate()
+
+
+def get_matrix(records: List[dict]) -> Dict[tuple, List[int]]:
+    """
+    Return the [wins, draws, losses] of every entrant against every other
+    entrant they played, summed over both seats and every queue.
+
+    >>> records = [{'p1': 'm', 'p1_playstyle': 'r', 'p2': 'v',
+    ...             'p2_playstyle': 'r', 'queue': 'n',
+    ...             'wins': 3, 'draws': 1, 'losses': 6},
+    ...            {'p1': 'v', 'p1_playstyle': 'r', 'p2': 'm',
+    ...             'p2_playstyle': 'r', 'queue': 'n',
+    ...             'wins': 5, 'draws': 0, 'losses': 5}]
+    >>> matrix = get_matrix(records)
+    >>> matrix[(('m', 'r'), ('v', 'r'))]
+    [8, 1, 11]
+    >>> matrix[(('v', 'r'), ('m', 'r'))]
+    [11, 1, 8]
+    """
+    matrix = {}
+    for record in records:
+        first = (record['p1'], record['p1_playstyle'])
+        second = (record['p2'], record['p2_playstyle'])
+        for key, outcome in [((first, second), ('wins', 'draws', 'losses')),
+                             ((second, first), ('losses', 'draws', 'wins'))]:
+            totals = matrix.setdefault(key, [0, 0, 0])
+            for i in range(3):
+                totals[i] += record[outcome[i]]
+    return matrix
+
+
+def compute_elo(records: List[dict], k: float = 16, passes: int = 200,
+                initial: float = 1500) -> Dict[tuple, float]:
+    """
+    Return the Elo rating of every entrant in records.
+
+    Every pass updates the ratings once per record, in a fixed order, by k
+    times the difference between p1's average score in the record (1 for a
+    win, 0.5 for a draw) and the score expected from the ratings, so the
+    ratings don't depend on the order records finished in.
+
+    >>> records = [{'p1': 'm', 'p1_playstyle': 'r', 'p2': 'v',
+    ...             'p2_playstyle': 'r', 'queue': 'n',
+    ...             'wins': 2, 'draws': 0, 'losses': 8}]
+    >>> ratings = compute_elo(records)
+    >>> ratings[('v', 'r')] > 1500 > ratings[('m', 'r')]
+    True
+    >>> round(sum(ratings.values()))
+    3000
+    """
+    ratings = {}
+    for record in records:
+        ratings[(record['p1'], record['p1_playstyle'])] = initial
+        ratings[(record['p2'], record['p2_playstyle'])] = initial
+
+    ordered = sorted(records, key=get_pairing)
+    for _ in range(passes):
+        for record in ordered:
+            first = (record['p1'], record['p1_playstyle'])
+            second = (record['p2'], record['p2_playstyle'])
+            played = record['wins'] + record['draws'] + record['losses']
+            if not played:
+                continue
+
+            score = (record['wins'] + record['draws'] / 2) / played
+            expected = 1 / (1 + 10 ** ((ratings[second] - ratings[first])
+                                       / 400))
+            ratings[first] += k * (score - expected)
+            ratings[second] -= k * (score - expected)
+    return ratings
+
+
+def format_entrant(entrant: Tuple[str, str]) -> str:
+    """
+    Return the name of entrant used in tables.
+
+    >>> format_entrant(('m', 'mr'))
+    'm/mr'
+    """
+    return '/'.join(entrant)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    PARSER.add_argument('--games', type=int, default=100,
+                        help="games per pairing and queue")
+    PARSER.add_argument('--seed', type=int, default=0)
+    PARSER.add_argument('--processes', type=int, default=None)
+    PARSER.add_argument('--checkpoint', default='tournament.jsonl',
+                        help="file of finished pairings to resume from")
+    ARGS = PARSER.parse_args()
+
+    RECORDS = list(run_tournament(ARGS.games, ARGS.seed, ARGS.checkpoint,
+                                  ARGS.processes))
+    MATRIX = get_matrix(RECORDS)
+    RATINGS = compute_elo(RECORDS)
+    ENTRANTS = sorted(RATINGS, key=RATINGS.get, reverse=True)
+
+    print("W/D/L of each row against each column:")
+    print(' ' * 6 + ''.join("{:>12}".format(format_entrant(ENTRANT))
+                            for ENTRANT in ENTRANTS))
+    for ROW in ENTRANTS:
+        print("{:<6}".format(format_entrant(ROW)) + ''.join(
+            "{:>12}".format('/'.join(map(str, MATRIX[(ROW, COLUMN)]))
+                            if (ROW, COLUMN) in MATRIX else '-')
+            for COLUMN in ENTRANTS))
+
+    print("\nElo ratings:")
+    for ENTRANT in ENTRANTS:
+        print("{:<6}{:>8.1f}".format(format_entrant(ENTRANT),
+                                     RATINGS[ENTRANT]))
@@ -0,0 +1,125 @@
+"""
+Basic Unittests for the round-robin tournament.
+
+"""
+import os
+import tempfile
+import unittest
+
+from simulation import GameSpec, run_game
+from tournament import compute_elo, get_matrix, get_pairing, \
+    get_pairing_seed, get_pairings, load_checkpoint, run_tournament
+
+
+class TournamentUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up a small tournament and a checkpoint file for it.
+        """
+        self.entrants = [('m', 'r'), ('r', 'r'), ('v', 'mr')]
+        self.queues = ['n', 'r']
+        directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(directory, 'tournament.jsonl')
+
+    def tearDown(self):
+        """
+        Delete the checkpoint file that was created.
+        """
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        os.rmdir(os.path.dirname(self.checkpoint))
+
+    def _run(self, checkpoint=None, processes=1):
+        """
+        Return the records of the small tournament by pairing.
+        """
+        return {get_pairing(record): record
+                for record in run_tournament(4, 0, checkpoint, processes,
+                                             self.entrants, self.queues)}
+
+    def test_every_pairing_played(self):
+        """
+        Test to make sure every ordered pairing of different entrants plays
+        every game on every queue.
+        """
+        records = self._run()
+        self.assertEqual(12, len(records))
+        for record in records.values():
+            self.assertEqual(4, record['wins'] + record['draws'] +
+                             record['losses'])
+
+    def test_resume_from_checkpoint(self):
+        """
+        Test to make sure an interrupted tournament only plays the pairings
+        missing from its checkpoint and ends with the same results.
+        """
+        expected = self._run(self.checkpoint)
+        with open(self.checkpoint) as checkpoint:
+            lines = checkpoint.readlines()
+        with open(self.checkpoint, 'w') as checkpoint:
+            checkpoint.writelines(lines[:5] + [lines[5][:10]])
+
+        self.assertEqual(expected, self._run(self.checkpoint, processes=2))
+        self.assertEqual(expected, load_checkpoint(self.checkpoint, 4, 0))
+
+    def test_worker_processes_match_local_games(self):
+        """
+        Test to make sure pairings played in worker processes give the same
+        results as pairings played in this process.
+        """
+        self.assertEqual(self._run(), self._run(processes=2))
+
+    def test_restricted_vampire_and_sorcerer(self):
+        """
+        Test to make sure Vampires and Sorcerers can play whole pairings
+        against each other in both seats on restricted queues.
+        """
+        records = list(run_tournament(20, processes=1,
+                                      entrants=[('v', 'r'), ('s', 'r')],
+                                      queues=['r']))
+        self.assertEqual(2, len(records))
+        for record in records:
+            self.assertEqual(20, record['wins'] + record['draws'] +
+                             record['losses'])
+
+    def test_pairings_play_their_own_streams(self):
+        """
+        Test to make sure every pairing plays its games from its own seed,
+        and each of its games can be replayed from that seed.
+        """
+        pairings = get_pairings(self.entrants, self.queues)
+        self.assertEqual(len(pairings),
+                         len({get_pairing_seed(0, pairing)
+                              for pairing in pairings}))
+
+        caches = {}
+        for pairing, record in self._run().items():
+            seed = get_pairing_seed(0, pairing)
+            cache = caches.setdefault((pairing[0], pairing[2], pairing[4]),
+                                      {})
+            winners = [run_game(GameSpec(pairing[0], pairing[2], pairing[1],
+                                         pairing[3], pairing[4], seed,
+                                         index), cache).winner
+                       for index in range(record['games'])]
+            self.assertEqual((record['wins'], record['draws'],
+                              record['losses']),
+                             (winners.count(1), winners.count(None),
+                              winners.count(2)))
+
+    def test_matrix_and_elo_agree(self):
+        """
+        Test to make sure the matrix is symmetric and that an entrant who
+        wins more of its games is rated higher.
+        """
+        records = list(self._run().values())
+        matrix = get_matrix(records)
+        ratings = compute_elo(records)
+        for (first, second), (wins, draws, losses) in matrix.items():
+            self.assertEqual([losses, draws, wins], matrix[(second, first)])
+
+        self.assertAlmostEqual(1500 * 3, sum(ratings.values()))
+        self.assertGreater(ratings[('v', 'mr')], ratings[('m', 'r')])
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
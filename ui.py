@@ -4,14 +4,28 @@ The UI.
 
 Run this file to play the game. 
 
-This file calls on pygame and the code from game.py.
+This file calls on pygame and the code from game.py. pygame is only imported
+and initialized once a window is opened or something is drawn (see
+init_pygame), so tools that import this file without drawing never load it.
 """
+import argparse
+import collections
 import game
-import pygame
+import json
+import math
+import os
+import random
 import sys
+import time
+from characters import SPRITE_TABLES
 
+# Milliseconds of game time per animation frame, and between moves by
+# computer-controlled players
 GAME_SPEED = 100
-pygame.init()
+AI_MOVE_TIME = 10 * GAME_SPEED
+
+# The pygame module once init_pygame has imported it, and None until then.
+pygame = None
 
 PYGAME_SCREEN = None
 CHARACTER_SIZE = 120
@@ -19,14 +33,153 @@ NUMBER_OF_CHARACTERS = 2
 PADDING = 40
 P1_POSITION = CHARACTER_SIZE // 4
 P2_POSITION = CHARACTER_SIZE - (CHARACTER_SIZE // 4)
-RANDOM_TIMER = 10
 FONT_SIZE = 18
 
+# Frames drawn per second, the most game time simulated after one slow frame
+# and the number of frame times the overlay takes percentiles of. Press H or
+# pass --hud to show the overlay.
+FRAME_RATE = 60
+MAX_FRAME_TIME = 250
+FRAME_TIME_SAMPLES = 120
+
+# Pass --spectate N to watch N games between random players in a grid
+# instead, each cell drawn at SPECTATOR_SCALE times the normal size. Finished
+# games start again after RESTART_TIME of game time.
+SPECTATOR_SCALE = 0.5
+REFRESH_BUDGET = 16
+RESTART_TIME = 3 * AI_MOVE_TIME
+
+ATLAS_IMAGE = 'sprites/atlas.png'
+ATLAS_INDEX = 'sprites/atlas.json'
+
+# Every sprite by name, as a (facing right, facing left) pair of surfaces,
+# and the background and font. Filled in by load_assets.
+SPRITES = {}
+BACKGROUND = None
+FONT = None
+
+# Rendered lines of text by string, and the layers (see get_layers) drawn by
+# the last update_game, or None to redraw the whole screen.
+TEXT_CACHE = {}
+PREVIOUS_LAYERS = None
+
+# The (sprites, background, font, text cache) of every scale other than 1
+# that get_assets has been asked for, by scale. Cleared by load_assets.
+SCALED_ASSETS = {}
+
+def init_pygame() -> 'module':
+    """
+    Import pygame and initialize the parts of it this file uses (the display
+    and fonts, but not audio or joysticks) the first time this is called,
+    and return it.
+    """
+    global pygame
+    
+    if pygame is None:
+        import pygame as module
+        module.display.init()
+        module.font.init()
+        pygame = module
+    return pygame
+
+def _convert(surface: 'pygame.Surface') -> 'pygame.Surface':
+    """
+    Return surface converted to the display's pixel format, keeping its
+    transparency if it has any.
+    """
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+def _load_atlas() -> dict:
+    """
+    Return every image in the sprite atlas built by build_atlas.py by name,
+    as a (facing right, facing left) pair of subsurfaces of the atlas and of
+    a flipped copy of it.
+    """
+    with open(ATLAS_INDEX) as index:
+        rectangles = json.load(index)
+    
+    atlas = _convert(pygame.image.load(ATLAS_IMAGE))
+    flipped = pygame.transform.flip(atlas, True, False)
+    width = atlas.get_width()
+    
+    return {name: (atlas.subsurface((x, y, w, h)),
+                   flipped.subsurface((width - x - w, y, w, h)))
+            for name, (x, y, w, h) in rectangles.items()}
+
+def _load_images() -> dict:
+    """
+    Return every sprite frame of every character type and the background
+    by name, loaded from their own files, as (facing right, facing left)
+    pairs of surfaces.
+    """
+    names = ['background'] + [name for table in SPRITE_TABLES.values()
+                              for frames in table for name in frames]
+    
+    images = {}
+    for name in names:
+        image = _convert(pygame.image.load('sprites/' + name + '.png'))
+        images[name] = (image, pygame.transform.flip(image, True, False))
+    return images
+
+def load_assets():
+    """
+    Load every sprite frame of every character type, the background and the
+    font once, so drawing a frame only needs blits.
+
+    The images come from the sprite atlas if it has been built, and from
+    their own files otherwise. The display mode must be set first. Player
+    2's sprites are flipped here so they face player 1.
+    """
+    global BACKGROUND, FONT, PREVIOUS_LAYERS
+    
+    init_pygame()
+    if os.path.exists(ATLAS_INDEX):
+        images = _load_atlas()
+    else:
+        images = _load_images()
+    
+    BACKGROUND = images.pop('background')[0]
+    SPRITES.update(images)
+    FONT = pygame.font.SysFont(pygame.font.get_default_font(), FONT_SIZE)
+    TEXT_CACHE.clear()
+    SCALED_ASSETS.clear()
+    PREVIOUS_LAYERS = None
+
+def get_assets(scale: float = 1) -> tuple:
+    """
+    Return the (sprites, background, font, text cache) to draw a game with
+    at scale times its normal size.
+
+    The sprites of every scale are scaled from SPRITES once, so any number
+    of games drawn at the same scale share them. load_assets must be called
+    first.
+    """
+    if scale == 1:
+        return SPRITES, BACKGROUND, FONT, TEXT_CACHE
+    
+    assets = SCALED_ASSETS.get(scale)
+    if assets is None:
+        def resize(surface):
+            return pygame.transform.smoothscale(
+                surface, (max(1, round(surface.get_width() * scale)),
+                          max(1, round(surface.get_height() * scale))))
+        
+        assets = ({name: (resize(right), resize(left))
+                   for name, (right, left) in SPRITES.items()},
+                  resize(BACKGROUND),
+                  pygame.font.SysFont(pygame.font.get_default_font(),
+                                      max(1, round(FONT_SIZE * scale))),
+                  {})
+        SCALED_ASSETS[scale] = assets
+    return assets
+
 def start_game():
     """
     Start and initialize the game
     """
-    global PYGAME_SCREEN, CHARACTER_SIZE, NUMBER_OF_CHARACTERS, FONT_SIZE
+    global CHARACTER_SIZE, NUMBER_OF_CHARACTERS, FONT_SIZE
     game.set_up_game()
     
     # Set up the width and height of the screen (proportional to the character
@@ -37,109 +190,468 @@ def start_game():
     pixel_size = width, height
     
     # set the screen to draw on
-    PYGAME_SCREEN = pygame.display.set_mode(pixel_size)
+    open_window(pixel_size)
 
-def update_game():
+def open_window(size: tuple) -> 'pygame.Surface':
     """
-    Update the game's UI.
+    Open a window of size (width, height) as PYGAME_SCREEN, initializing
+    pygame and loading the assets first, and return it.
     """
-    global PYGAME_SCREEN, CHARACTER_SIZE, P1_POSITION, P2_POSITION
+    global PYGAME_SCREEN
     
-    draw_parameters = game.update_ui()
+    init_pygame()
+    PYGAME_SCREEN = pygame.display.set_mode(size)
+    load_assets()
+    return PYGAME_SCREEN
+
+def render_text(line: str, scale: float = 1) -> 'pygame.Surface':
+    """
+    Return line rendered in the font of scale (see get_assets), rendering
+    each distinct line only once.
+    """
+    _, _, font, cache = get_assets(scale)
+    text = cache.get(line)
+    if text is None:
+        text = font.render(line, True, (0, 0, 0))
+        cache[line] = text
+    return text
+
+def get_layers(draw_parameters: dict, session: game.GameSession = None,
+               scale: float = 1) -> list:
+    """
+    Return the (surface, position) of everything drawn over the background
+    for draw_parameters (as returned by game.update_ui, or the ui_state of
+    session), in drawing order, at scale times the normal size.
+    """
+    sprites = get_assets(scale)[0]
     
-    p1_sprite = draw_parameters['p1_sprite']
-    p1_hp = draw_parameters['p1_hp']
-    p1_sp = draw_parameters['p1_sp']
-    p1_name = draw_parameters['p1_name']
+    def at(x, y):
+        return round(x * scale), round(y * scale)
     
-    p1_label = "{}\nHP: {}\nSP: {}".format(p1_name, p1_hp, p1_sp).split("\n")
+    p1_label = "{}\nHP: {}\nSP: {}".format(draw_parameters['p1_name'],
+                                           draw_parameters['p1_hp'],
+                                           draw_parameters['p1_sp'])
+    p2_label = "{}\nHP: {}\nSP: {}".format(draw_parameters['p2_name'],
+                                           draw_parameters['p2_hp'],
+                                           draw_parameters['p2_sp'])
     
-    p2_sprite = draw_parameters['p2_sprite']
-    p2_hp = draw_parameters['p2_hp']
-    p2_sp = draw_parameters['p2_sp']
-    p2_name = draw_parameters['p2_name']
+    # Draw the first character, then the second flipped so they face p1
+    layers = [(sprites[draw_parameters['p1_sprite']][0],
+               at(P1_POSITION, PADDING))]
+    for i, line in enumerate(p1_label.split("\n")):
+        layers.append((render_text(line, scale),
+                       at(P1_POSITION + PADDING, i * FONT_SIZE)))
     
-    p2_label = "{}\nHP: {}\nSP: {}".format(p2_name, p2_hp, p2_sp).split("\n")
+    layers.append((sprites[draw_parameters['p2_sprite']][1],
+                   at(P2_POSITION, PADDING)))
+    for i, line in enumerate(p2_label.split("\n")):
+        layers.append((render_text(line, scale),
+                       at(P2_POSITION + PADDING, i * FONT_SIZE)))
     
-    font_type = pygame.font.get_default_font()
-    font = pygame.font.SysFont(font_type, FONT_SIZE)
+    # Draw the current player and available actions
+    if session is None:
+        is_over, winner = game.GAME_IS_OVER, game.GAME_WINNER
+    else:
+        is_over, winner = session.is_over, session.winner
+    if not is_over:
+        actions = draw_parameters['actions']
+        current_player = draw_parameters['current_player']
+        bottom_label = ["Current Character: {}".format(current_player),
+                        "Available Actions: {}".format(", ".join(actions))]
+    else:
+        bottom_label = ["Game over!"]
+        if winner:
+            bottom_label.append("The winner is {}!".format(winner.get_name()))
+        else:
+            bottom_label.append("The game ended in a tie!")
     
-    p1_icon = pygame.image.load('sprites/' + p1_sprite + '.png')
-    p2_icon = pygame.image.load('sprites/' + p2_sprite + '.png')
+    for i, line in enumerate(bottom_label):
+        layers.append((render_text(line, scale),
+                       at(P1_POSITION + PADDING // 2,
+                          CHARACTER_SIZE + PADDING + i * FONT_SIZE)))
+    return layers
+
+def draw_layers(layers: list) -> None:
+    """
+    Draw layers (see get_layers) over the background.
 
-    PYGAME_SCREEN.fill((255, 255, 255)) # (255, 255, 255)=(r,g,b)=white
-    bg = pygame.image.load('sprites/background.png')
-    rect = pygame.Rect(0, 0, NUMBER_OF_CHARACTERS * CHARACTER_SIZE,
-                       CHARACTER_SIZE + PADDING * 2)
-    PYGAME_SCREEN.blit(bg, rect)
+    Only the parts of the screen whose sprite or text changed since the last
+    call are redrawn and sent to the display.
+    """
+    global PREVIOUS_LAYERS
     
-    # Draw the first character
-    (x, y) = P1_POSITION, PADDING
-    rect = pygame.Rect(x, y, CHARACTER_SIZE, CHARACTER_SIZE)
-    PYGAME_SCREEN.blit(p1_icon, rect)
+    if PREVIOUS_LAYERS is None or len(PREVIOUS_LAYERS) != len(layers):
+        dirty = [PYGAME_SCREEN.get_rect()]
+    else:
+        dirty = []
+        for old, new in zip(PREVIOUS_LAYERS, layers):
+            if old != new:
+                dirty.append(old[0].get_rect(topleft=old[1]))
+                dirty.append(new[0].get_rect(topleft=new[1]))
+    PREVIOUS_LAYERS = layers
     
-    y_coordinate = 0
-    for line in p1_label:
-        text = font.render(line, True, (0, 0, 0))
-        PYGAME_SCREEN.blit(text, (P1_POSITION + PADDING, y_coordinate))
-        y_coordinate += FONT_SIZE
+    if not dirty:
+        return
     
-    # Draw the HP bar
-    # Draw the SP bar
+    # Redraw everything under each changed part, since sprites and text
+    # overlap
+    for rect in dirty:
+        PYGAME_SCREEN.set_clip(rect)
+        PYGAME_SCREEN.fill((255, 255, 255)) # (255, 255, 255)=(r,g,b)=white
+        PYGAME_SCREEN.blit(BACKGROUND, (0, 0))
+        for surface, position in layers:
+            PYGAME_SCREEN.blit(surface, position)
+    PYGAME_SCREEN.set_clip(None)
     
-    # Draw the second character
-    # Flip p2 so they face p1
-    p2_icon = pygame.transform.flip(p2_icon, True, False)
-    (x, y) = P2_POSITION, PADDING
-    rect = pygame.Rect(x, y, CHARACTER_SIZE, CHARACTER_SIZE)
-    PYGAME_SCREEN.blit(p2_icon, rect)
+    pygame.display.update(dirty)
 
-    y_coordinate = 0
-    for line in p2_label:
-        text = font.render(line, True, (0, 0, 0))
-        PYGAME_SCREEN.blit(text, (P2_POSITION + PADDING, y_coordinate))
-        y_coordinate += FONT_SIZE    
-    
-    # Update the current player and available actions
-    if not game.GAME_IS_OVER:
-        actions = draw_parameters['actions']
-        current_player = draw_parameters['current_player']
-        action_label = ["Current Character: {}".format(current_player),
-                        "Available Actions: {}".format(", ".join(actions))]
-    
-        y_coordinate = CHARACTER_SIZE + PADDING
-        for line in action_label:
-            text = font.render(line, True, (0, 0, 0))
-            PYGAME_SCREEN.blit(text, (P1_POSITION + PADDING // 2, y_coordinate))
-            y_coordinate += FONT_SIZE
-    else:
-        game_label = ["Game over!"]
-        winner = game.GAME_WINNER
-        if winner:
-            game_label.append("The winner is {}!".format(winner.get_name()))
+def draw_frame(surface: 'pygame.Surface', layers: list,
+               scale: float = 1) -> None:
+    """
+    Draw the whole of layers (see get_layers) at scale over the background
+    on surface, which doesn't have to be the display.
+    """
+    surface.fill((255, 255, 255))
+    surface.blits([(get_assets(scale)[1], (0, 0))] + layers, doreturn=False)
+
+def update_game():
+    """
+    Update the game's UI.
+    """
+    draw_layers(get_layers(game.update_ui()))
+
+def get_percentile(values: list, percentile: float) -> float:
+    """
+    Return the value at percentile (0 to 100) of the sorted values, or 0 if
+    there are none.
+
+    >>> get_percentile([4, 1, 3, 2], 50)
+    3
+    >>> get_percentile(list(range(100)), 99)
+    99
+    >>> get_percentile([], 95)
+    0
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1,
+                       int(len(ordered) * percentile / 100))]
+
+def get_hud_lines(fps: float, frame_times: list, think_time: float) -> list:
+    """
+    Return the lines of the frame-time overlay for fps frames per second,
+    the recent frame_times and the think_time of the last AI move, in
+    milliseconds.
+
+    >>> get_hud_lines(59.6, [2, 3, 4, 9], 12.25)
+    ['FPS: 60', 'Frame p50/p95/p99: 4/9/9 ms', 'AI think: 12.2 ms']
+    """
+    return ["FPS: {:.0f}".format(fps),
+            "Frame p50/p95/p99: {}/{}/{} ms".format(
+                *[get_percentile(frame_times, percentile)
+                  for percentile in [50, 95, 99]]),
+            "AI think: {:.1f} ms".format(think_time)]
+
+def get_hud_layers(lines: list) -> list:
+    """
+    Return layers (see get_layers) drawing lines in the top left corner of
+    the character area.
+
+    The lines change every frame, so they are rendered directly rather than
+    cached.
+    """
+    return [(FONT.render(line, True, (200, 0, 0)),
+             (0, PADDING + i * FONT_SIZE))
+            for i, line in enumerate(lines)]
+
+class GameLoop:
+    """
+    A fixed-timestep loop running the game in game.DEFAULT_SESSION.
+
+    The game advances in steps of GAME_SPEED milliseconds of game time
+    however long frames take to draw, and computer-controlled players move
+    every AI_MOVE_TIME of game time, so the pace of the game doesn't drift
+    with drawing or AI search time.
+
+    layers - the layers (see get_layers) of the latest game step.
+    lag - milliseconds of game time not simulated yet.
+    game_time - milliseconds of game time simulated so far.
+    next_ai_move - the game time at which a computer-controlled player may
+                   move next.
+    think_time - milliseconds the last computer-controlled move took.
+    frame_times - milliseconds the last FRAME_TIME_SAMPLES frames took to
+                  simulate and draw, not counting the wait for the next one.
+    fast_forwarding - whether the game is being fast-forwarded, drawing one
+                      of the turns yielded by game.fast_forward every frame
+                      instead of stepping by game time.
+    show_hud - whether the frame-time overlay is drawn over the game.
+    """
+    layers: list
+    lag: int
+    game_time: int
+    next_ai_move: int
+    think_time: float
+    frame_times: collections.deque
+    fast_forwarding: bool
+    show_hud: bool
+
+    def __init__(self, fast_forward: int = None,
+                 show_hud: bool = False) -> None:
+        """
+        Initialize this GameLoop at the start of the game, fast-forwarding
+        it to draw only every fast_forward turns (see game.fast_forward) if
+        fast_forward is given and neither player is manual.
+        """
+        self.layers = get_layers(game.update_ui())
+        self.lag = 0
+        self.game_time = 0
+        self.next_ai_move = 0
+        self.think_time = 0.0
+        self.frame_times = collections.deque(maxlen=FRAME_TIME_SAMPLES)
+        self.fast_forwarding = (fast_forward is not None and
+                                game.DEFAULT_SESSION.can_fast_forward())
+        self._turns = game.fast_forward(fast_forward) \
+            if self.fast_forwarding else None
+        self.show_hud = show_hud
+
+    def advance(self, elapsed: int) -> int:
+        """
+        Simulate elapsed milliseconds of game time, but no more than
+        MAX_FRAME_TIME, and return the number of game steps taken.
+
+        Time left over from a step is kept for the next call. While
+        fast-forwarding, elapsed is ignored and one step plays the game up
+        to the next turn to draw.
+        """
+        if self.fast_forwarding:
+            start = time.perf_counter()
+            if next(self._turns, None) is None:
+                self.fast_forwarding = False
+                self._turns = None
+            else:
+                self.think_time = (time.perf_counter() - start) * 1000
+                self.layers = get_layers(game.update_ui())
+                return 1
+        
+        self.lag += min(elapsed, MAX_FRAME_TIME)
+        steps = 0
+        while self.lag >= GAME_SPEED:
+            self.lag -= GAME_SPEED
+            self.game_time += GAME_SPEED
+            steps += 1
+            
+            # If the current player isn't using a manual playstyle, pick a
+            # move once it's due
+            if (not game.GAME_IS_OVER and
+                not game.BATTLE_QUEUE.is_over() and 
+                not game.BATTLE_QUEUE.peek().playstyle.is_manual and
+                self.game_time >= self.next_ai_move):
+                start = time.perf_counter()
+                game.perform_attack()
+                self.think_time = (time.perf_counter() - start) * 1000
+                self.next_ai_move = self.game_time + AI_MOVE_TIME
+            
+            self.layers = get_layers(game.update_ui())
+        return steps
+
+    def draw(self, fps: float) -> None:
+        """
+        Draw the latest game step, with the frame-time overlay at fps frames
+        per second if show_hud.
+        """
+        if self.show_hud:
+            draw_layers(self.layers + get_hud_layers(get_hud_lines(
+                fps, self.frame_times, self.think_time)))
         else:
-            game_label.append("The game ended in a tie!")
+            draw_layers(self.layers)
+
+class SpectatorView:
+    """
+    A grid of games between computer-controlled players, each played in its
+    own GameSession, drawn in one window.
+
+    Every game advances on the same fixed timestep as GameLoop, with the
+    computer-controlled moves of different games spread evenly over
+    AI_MOVE_TIME so they don't all think in the same step. Each draw redraws
+    at most refresh_budget of the cells that changed, the ones that have
+    waited longest first, so drawing takes as long however many games there
+    are. All cells share the sprites of their scale (see get_assets), and
+    each cell is drawn with one batched blit onto its part of the screen.
+
+    sessions - the games, in grid order from left to right and top to bottom.
+    columns - the number of cells in a row of the grid.
+    scale - the size of each cell compared to the normal game screen.
+    refresh_budget - the most cells redrawn by each draw.
+    lag - milliseconds of game time not simulated yet.
+    game_time - milliseconds of game time simulated so far.
+    """
+    sessions: list
+    columns: int
+    scale: float
+    refresh_budget: int
+    lag: int
+    game_time: int
+
+    def __init__(self, sessions: list, columns: int = None,
+                 scale: float = SPECTATOR_SCALE,
+                 refresh_budget: int = REFRESH_BUDGET) -> None:
+        """
+        Initialize this SpectatorView of sessions, in a square grid unless
+        columns is given.
+        """
+        self.sessions = list(sessions)
+        self.columns = columns or math.ceil(math.sqrt(len(self.sessions)))
+        self.scale = scale
+        self.refresh_budget = refresh_budget
+        self.lag = 0
+        self.game_time = 0
+        self._next_moves = [i * AI_MOVE_TIME // len(self.sessions)
+                            for i in range(len(self.sessions))]
+        # The layers of every cell, or None until the game is first drawn
+        # or steps
+        self._layers = [None] * len(self.sessions)
+        # The cells waiting to be redrawn, in the order they changed
+        self._pending = collections.OrderedDict.fromkeys(
+            range(len(self.sessions)))
+        self._screen = None
+        self._cells = []
+
+    def get_size(self) -> tuple:
+        """
+        Return the (width, height) of the whole grid.
+        """
+        width, height = self._get_cell_size()
+        rows = math.ceil(len(self.sessions) / self.columns)
+        return self.columns * width, rows * height
+
+    def _get_cell_size(self) -> tuple:
+        """
+        Return the (width, height) of one cell.
+        """
+        return (round(NUMBER_OF_CHARACTERS * CHARACTER_SIZE * self.scale),
+                round((CHARACTER_SIZE + PADDING * 2) * self.scale))
+
+    def get_cell_rect(self, index: int) -> 'pygame.Rect':
+        """
+        Return the part of the screen the game at index in sessions is drawn
+        in.
+        """
+        width, height = self._get_cell_size()
+        row, column = divmod(index, self.columns)
+        return pygame.Rect(column * width, row * height, width, height)
+
+    def pending(self) -> int:
+        """
+        Return the number of cells waiting to be redrawn.
+        """
+        return len(self._pending)
+
+    def advance(self, elapsed: int) -> int:
+        """
+        Simulate elapsed milliseconds of game time in every game, but no
+        more than MAX_FRAME_TIME, and return the number of game steps taken.
+        """
+        self.lag += min(elapsed, MAX_FRAME_TIME)
+        steps = 0
+        while self.lag >= GAME_SPEED:
+            self.lag -= GAME_SPEED
+            self.game_time += GAME_SPEED
+            steps += 1
+            
+            for i, session in enumerate(self.sessions):
+                if self.game_time >= self._next_moves[i]:
+                    if session.is_over:
+                        session = game.create_session(**session.setup)
+                        self.sessions[i] = session
+                        self._next_moves[i] = self.game_time + AI_MOVE_TIME
+                    elif not session.battle_queue.peek().playstyle.is_manual:
+                        session.perform_attack()
+                        self._next_moves[i] = self.game_time + (
+                            RESTART_TIME if session.is_over else AI_MOVE_TIME)
+                
+                self._layers[i] = get_layers(session.ui_state(), session,
+                                             self.scale)
+                self._pending[i] = None
+        return steps
+
+    def draw(self) -> list:
+        """
+        Redraw up to refresh_budget of the cells waiting to be redrawn on
+        PYGAME_SCREEN and return the parts of the screen updated.
+        """
+        if self._screen is not PYGAME_SCREEN:
+            self._screen = PYGAME_SCREEN
+            self._cells = [PYGAME_SCREEN.subsurface(self.get_cell_rect(i))
+                           for i in range(len(self.sessions))]
+        
+        dirty = []
+        for _ in range(min(self.refresh_budget, len(self._pending))):
+            i = self._pending.popitem(last=False)[0]
+            if self._layers[i] is None:
+                self._layers[i] = get_layers(self.sessions[i].ui_state(),
+                                             self.sessions[i], self.scale)
+            draw_frame(self._cells[i], self._layers[i], self.scale)
+            dirty.append(self.get_cell_rect(i))
         
-        y_coordinate = CHARACTER_SIZE + PADDING
-        for line in game_label:
-            text = font.render(line, True, (0, 0, 0))
-            PYGAME_SCREEN.blit(text, (P1_POSITION + PADDING // 2, y_coordinate))
-            y_coordinate += FONT_SIZE 
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
+
+def spectate(games: int) -> None:
+    """
+    Open a window watching games games between random characters with random
+    playstyles, until it is closed.
+    """
+    characters = list(game.CHARACTER_CLASSES)
+    view = SpectatorView([game.create_session(
+        'n', p1, p1.upper(), 'r', p2, p2.upper(), 'r')
+        for p1, p2 in (random.sample(characters, 2) for _ in range(games))])
+    
+    open_window(view.get_size())
+    clock = pygame.time.Clock()
     
-    pygame.display.flip()
+    while True:
+        elapsed = clock.tick(FRAME_RATE)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit(0)
+        view.advance(elapsed)
+        view.draw()
 
 if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description="Play the game.")
+    PARSER.add_argument('--hud', action='store_true',
+                        help="show the frame-time overlay (toggle with H)")
+    PARSER.add_argument('--fast-forward', type=game.fast_forward_every,
+                        default=None, metavar='N',
+                        help="draw only every Nth turn of a game between "
+                             "computer players (0 for only the end)")
+    PARSER.add_argument('--spectate', type=int, default=None, metavar='N',
+                        help="watch N games between random players instead")
+    ARGS = PARSER.parse_args()
+    
+    if ARGS.spectate is not None:
+        spectate(ARGS.spectate)
+    
     start_game()
-    update_game()
+    
+    CLOCK = pygame.time.Clock()
+    LOOP = GameLoop(ARGS.fast_forward, ARGS.hud)
     
     while True:
-        pygame.time.wait(GAME_SPEED)
+        # Wait for the next frame
+        ELAPSED = CLOCK.tick(FRAME_RATE)
+        LOOP.frame_times.append(CLOCK.get_rawtime())
     
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit(0)
-            if event.type == pygame.KEYDOWN and not game.GAME_IS_OVER:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                LOOP.show_hud = not LOOP.show_hud
+            elif event.type == pygame.KEYDOWN and not game.GAME_IS_OVER:
                 # If the current player is using a manual playstyle, the
                 # pick a move when a key is pressed
                 if (not game.BATTLE_QUEUE.is_over() and 
@@ -152,21 +664,9 @@ if __name__ == '__main__':
                         
                     game.LAST_KEY_PRESSED = k
                     game.perform_attack()
-                
-        # If the current player isn't using a manual playstyle, pick a move
-        if (not game.GAME_IS_OVER and
-            not game.BATTLE_QUEUE.is_over() and 
-            not game.BATTLE_QUEUE.peek().playstyle.is_manual and
-            RANDOM_TIMER == 10):
-            game.perform_attack()
-    
-        # Redraw the game
-        update_game()
         
-        # Only let the random strategy make a decision every 10 ticks of time
-        RANDOM_TIMER -= 1
-        if RANDOM_TIMER == 0:
-            RANDOM_TIMER = 10
+        LOOP.advance(ELAPSED)
+        LOOP.draw(CLOCK.get_fps())
     
     pygame.quit()
-    sys.exit(0)        
+    sys.exit(0)
@@ -9,7 +9,12 @@ Run this file to play the game.
 
 This file simply calls on pygame and the code from game.py, which contains
 all of your client code.
+
+Pass --fast-forward N to play a game between computer-controlled players as
+fast as it can be simulated, printing only every Nth turn (or only the end of
+the game if N is 0).
 """
+import argparse
 import game
 
 def start_game():
@@ -71,9 +76,20 @@ def update_game():
         
 
 if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description="Play the game as text.")
+    PARSER.add_argument('--fast-forward', type=game.fast_forward_every,
+                        default=None, metavar='N',
+                        help="print only every Nth turn of a game between "
+                             "computer players (0 for only the end)")
+    FAST_FORWARD = PARSER.parse_args().fast_forward
+    
     start_game()
     update_game()
     
+    if FAST_FORWARD is not None and game.DEFAULT_SESSION.can_fast_forward():
+        for _ in game.fast_forward(FAST_FORWARD):
+            update_game()
+    
     while True:
         # If the current player isn't using a manual playstyle, pick a move
         if (not game.GAME_IS_OVER):
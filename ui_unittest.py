@@ -0,0 +1,232 @@
+"""
+Basic Unittests for the pygame UI, drawn off-screen.
+
+"""
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+# SDL would otherwise catch SIGTERM in the worker processes other tests fork.
+os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+
+import pygame
+
+import game
+import ui
+
+
+class UIUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up an off-screen display with the assets loaded and a game in
+        game.DEFAULT_SESSION.
+        """
+        ui.init_pygame()
+        ui.PYGAME_SCREEN = pygame.display.set_mode(
+            (ui.NUMBER_OF_CHARACTERS * ui.CHARACTER_SIZE,
+             ui.CHARACTER_SIZE + ui.PADDING * 2))
+        ui.load_assets()
+        game.DEFAULT_SESSION = game.create_session('n', 'v', 'V', 'm',
+                                                   's', 'S', 'm')
+        game._sync_globals()
+
+    def test_every_sprite_loaded_once(self):
+        """
+        Test to make sure every frame of every character is cached, with a
+        flipped copy for player 2.
+        """
+        self.assertEqual(4 * 3 * 10, len(ui.SPRITES))
+        sprite, flipped = ui.SPRITES['rogue_special_3']
+        expected = pygame.transform.flip(sprite, True, False)
+        for point in [(0, 0), (30, 60), (119, 119)]:
+            self.assertEqual(expected.get_at(point), flipped.get_at(point))
+
+    def test_atlas_matches_separate_images(self):
+        """
+        Test to make sure the sprites sliced from the atlas are the same as
+        the ones loaded from their own files.
+        """
+        atlas = ui._load_atlas()
+        images = ui._load_images()
+        for name in ['background', 'mage_idle_0', 'sorcerer_special_9']:
+            for side in [0, 1]:
+                expected, actual = images[name][side], atlas[name][side]
+                self.assertEqual(expected.get_size(), actual.get_size())
+                for point in [(0, 0), (37, 61), (119, 119)]:
+                    self.assertEqual(expected.get_at(point),
+                                     actual.get_at(point))
+
+    def test_dirty_rectangles_match_full_redraw(self):
+        """
+        Test to make sure redrawing only what changed leaves the screen as
+        drawing everything from scratch would, and that unchanged text is
+        only rendered once.
+        """
+        ui.update_game()
+        for key in 'SAASA':
+            game.LAST_KEY_PRESSED = key
+            game.perform_attack()
+            for _ in range(3):
+                ui.update_game()
+
+            expected = pygame.Surface(ui.PYGAME_SCREEN.get_size())
+            expected.fill((255, 255, 255))
+            expected.blit(ui.BACKGROUND, (0, 0))
+            for surface, position in ui.PREVIOUS_LAYERS:
+                expected.blit(surface, position)
+            self.assertEqual(pygame.image.tostring(expected, 'RGB'),
+                             pygame.image.tostring(ui.PYGAME_SCREEN, 'RGB'))
+
+        self.assertIs(ui.render_text('HP: 100'), ui.render_text('HP: 100'))
+
+    def test_update_game_draws_cached_sprites(self):
+        """
+        Test to make sure drawing a frame doesn't load any images.
+        """
+        with mock.patch('pygame.image.load', side_effect=AssertionError):
+            game.LAST_KEY_PRESSED = 'S'
+            game.perform_attack()
+            ui.update_game()
+            ui.update_game()
+
+    def test_ai_moves_scheduled_by_game_time(self):
+        """
+        Test to make sure computer-controlled players move every
+        AI_MOVE_TIME of game time, however the time is split into frames.
+        """
+        game.DEFAULT_SESSION = game.create_session('n', 'm', 'M', 'r',
+                                                   'r', 'R', 'r')
+        game._sync_globals()
+        loop = ui.GameLoop()
+
+        self.assertEqual(0, loop.advance(ui.GAME_SPEED - 1))
+        self.assertEqual(0, game.DEFAULT_SESSION.turns)
+        self.assertEqual(1, loop.advance(1))
+        self.assertEqual(1, game.DEFAULT_SESSION.turns)
+
+        for _ in range(ui.AI_MOVE_TIME // 7 + 1):
+            loop.advance(7)
+        self.assertEqual(2, game.DEFAULT_SESSION.turns)
+
+    def test_slow_frames_simulate_limited_time(self):
+        """
+        Test to make sure one slow frame only simulates MAX_FRAME_TIME of
+        game time.
+        """
+        loop = ui.GameLoop()
+        self.assertEqual(ui.MAX_FRAME_TIME // ui.GAME_SPEED,
+                         loop.advance(10 * ui.MAX_FRAME_TIME))
+        self.assertEqual(ui.MAX_FRAME_TIME % ui.GAME_SPEED, loop.lag)
+
+    def test_hud_drawn_over_game(self):
+        """
+        Test to make sure the overlay is drawn as extra layers and removed
+        when it's hidden.
+        """
+        loop = ui.GameLoop()
+        loop.frame_times.extend([3, 5, 4])
+        loop.show_hud = True
+        loop.draw(60)
+        self.assertEqual(len(loop.layers) + 3, len(ui.PREVIOUS_LAYERS))
+        loop.show_hud = False
+        loop.draw(60)
+        self.assertEqual(loop.layers, ui.PREVIOUS_LAYERS)
+
+    def test_spectator_games_use_own_sessions(self):
+        """
+        Test to make sure every game in a SpectatorView moves in its own
+        session, spread over AI_MOVE_TIME, without touching the game
+        globals.
+        """
+        sessions = [game.create_session('n', 'm', 'M', 'r', 'r', 'R', 'r')
+                    for _ in range(4)]
+        view = ui.SpectatorView(sessions)
+        default = game.DEFAULT_SESSION
+
+        view.advance(ui.GAME_SPEED)
+        self.assertEqual([1, 0, 0, 0], [s.turns for s in view.sessions])
+        for _ in range(ui.AI_MOVE_TIME // ui.GAME_SPEED - 1):
+            view.advance(ui.GAME_SPEED)
+        self.assertEqual([1, 1, 1, 1], [s.turns for s in view.sessions])
+        self.assertIs(default, game.DEFAULT_SESSION)
+        self.assertEqual(0, game.DEFAULT_SESSION.turns)
+
+    def test_spectator_refresh_budget(self):
+        """
+        Test to make sure each draw of 64 games redraws at most
+        refresh_budget cells, sharing one set of scaled sprites.
+        """
+        view = ui.SpectatorView(
+            [game.create_session('n', 'v', 'V', 'r', 's', 'S', 'r')
+             for _ in range(64)], refresh_budget=16)
+        ui.PYGAME_SCREEN = pygame.display.set_mode(view.get_size())
+        self.assertEqual((960, 800), view.get_size())
+
+        self.assertEqual(64, view.pending())
+        self.assertEqual(16, len(view.draw()))
+        self.assertEqual(48, view.pending())
+        view.advance(ui.GAME_SPEED)
+        self.assertEqual(64, view.pending())
+
+        sprites = ui.get_assets(view.scale)[0]
+        self.assertIs(ui.get_assets(view.scale)[0], sprites)
+        self.assertEqual((60, 60), sprites['vampire_idle_0'][0].get_size())
+        self.assertIs(view._layers[16][4][0], view._layers[63][4][0])
+
+    def test_fast_forward_draws_every_nth_turn(self):
+        """
+        Test to make sure a fast-forwarded GameLoop plays to the next turn
+        to draw on every step, whatever the time, and then stops.
+        """
+        game.DEFAULT_SESSION = game.create_session('n', 'm', 'M', 'r',
+                                                   'r', 'R', 'r')
+        game._sync_globals()
+        loop = ui.GameLoop(fast_forward=4)
+
+        self.assertEqual(1, loop.advance(0))
+        self.assertEqual(4, game.DEFAULT_SESSION.turns)
+        while loop.fast_forwarding:
+            loop.advance(0)
+        self.assertTrue(game.GAME_IS_OVER)
+        self.assertIn('Game over!', ui.TEXT_CACHE)
+
+    def test_import_does_not_load_pygame(self):
+        """
+        Test to make sure importing the UI and the game leaves pygame
+        unloaded until something is drawn.
+        """
+        output = subprocess.run(
+            [sys.executable, '-c',
+             "import sys, game, ui; print('pygame' in sys.modules)"],
+            check=True, stdout=subprocess.PIPE,
+            universal_newlines=True).stdout
+        self.assertEqual('False', output.strip())
+
+    def test_import_ignores_command_line(self):
+        """
+        Test to make sure importing the UI doesn't read the flags of the
+        process importing it.
+        """
+        subprocess.run([sys.executable, '-c', "import ui", '--fast-forward'],
+                       check=True)
+
+    def test_text_ui_rejects_bad_fast_forward(self):
+        """
+        Test to make sure the text UI reports a missing, non-numeric or
+        negative --fast-forward as a usage error.
+        """
+        for flags in [['--fast-forward'], ['--fast-forward', 'x'],
+                      ['--fast-forward', '-1']]:
+            result = subprocess.run(
+                [sys.executable, '-m', 'ui_nonpygame'] + flags,
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, universal_newlines=True)
+            self.assertEqual(2, result.returncode)
+            self.assertIn('argument --fast-forward', result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
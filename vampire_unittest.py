@@ -338,4 +338,4 @@ class VampireUnitTests(unittest.TestCase):
                               ", ".join(obtained_sprites)))
 
 if __name__ == "__main__":
-    unittest.main(exit = False)
\ No newline at end of file
+    unittest.main(exit = False)
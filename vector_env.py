@@ -0,0 +1,239 @@
+"""
+A Gym-style vectorized environment for training agents on the game.
+
+BattleVectorEnv runs many games between two character classes on normal
+BattleQueues at once on top of VectorBattle. Each call to step takes one
+action per game for whichever character is acting in it (0 to attack, 1 for
+a special attack) and returns:
+    - observations: an (envs, OBSERVATION_SIZE) int array of each game's
+      HP, SP and defense of both players, the acting player (0 or 1) and the
+      first QUEUE_PREFIX players in its queue (-1 past the end),
+    - rewards: 1 if the acting player won the game with this action, -1 if
+      they lost, and 0 otherwise,
+    - dones: whether the game ended; finished games are reset automatically
+      and their observation is the start of the next game,
+    - info: 'action_mask', an (envs, 2) bool array of the actions the next
+      acting player can take (as get_available_actions), and 'winner', the
+      winner (1 or 2, or 0 for a tie) of every game that ended.
+An action that the acting player can't afford is played as an attack.
+
+SubprocVectorEnv splits the games across worker processes.
+"""
+import multiprocessing
+import time
+from typing import Tuple
+import numpy as np
+from vector_simulation import VectorBattle
+
+QUEUE_PREFIX = 8
+OBSERVATION_SIZE = 7 + QUEUE_PREFIX
+
+
+class BattleVectorEnv:
+    """
+    A vectorized environment of envs games between the CHARACTER_CLASSES
+    keys p1 and p2.
+
+    num_envs - the number of games.
+    """
+    num_envs: int
+
+    def __init__(self, p1: str, p2: str, envs: int) -> None:
+        """
+        Initialize this BattleVectorEnv.
+        """
+        self.num_envs = envs
+        self._battle = VectorBattle(p1, p2, envs)
+        self._games = np.arange(envs)
+
+    def reset(self) -> Tuple['ndarray', dict]:
+        """
+        Start every game from the beginning and return the observations and
+        info.
+
+        >>> env = BattleVectorEnv('m', 'r', 2)
+        >>> observations, info = env.reset()
+        >>> observations[0]
+        array([100, 100, 100, 100,   8,  10,   0,   0,   1,  -1,  -1,  -1,  -1,
+                -1,  -1])
+        >>> info['action_mask'][0]
+        array([ True,  True])
+        """
+        self._battle.reset()
+        self._battle.update_active()
+        return self._observe(), {'action_mask': self._action_mask()}
+
+    def step(self, actions: 'ndarray') \
+            -> Tuple['ndarray', 'ndarray', 'ndarray', dict]:
+        """
+        Perform actions (one per game) and return the observations, rewards,
+        dones and info.
+
+        >>> env = BattleVectorEnv('m', 'r', 2)
+        >>> _ = env.reset()
+        >>> observations, rewards, dones, info = env.step(np.array([0, 1]))
+        >>> observations[:, :4]
+        array([[100,  90,  95, 100],
+               [100,  70,  70, 100]])
+        """
+        battle = self._battle
+        actors = battle.queue[self._games, battle.head].astype(np.intp)
+        battle.step(np.asarray(actions) == 1)
+        battle.update_active()
+
+        dones = ~battle.active
+        winner = np.where(battle.hp[:, 1] == 0, 1,
+                          np.where(battle.hp[:, 0] == 0, 2, 0))
+        rewards = np.where(winner == 0, 0,
+                           np.where(winner == actors + 1, 1, -1)) * dones
+
+        finished = np.flatnonzero(dones)
+        if finished.size:
+            battle.reset(finished)
+            battle.update_active()
+
+        return (self._observe(), rewards, dones,
+                {'action_mask': self._action_mask(),
+                 'winner': np.where(dones, winner, 0)})
+
+    def _observe(self) -> 'ndarray':
+        """
+        Return the observations of every game.
+        """
+        battle = self._battle
+        columns = battle.head[:, None] + np.arange(QUEUE_PREFIX)
+        in_queue = columns < battle.tail[:, None]
+        prefix = np.where(in_queue,
+                          np.take_along_axis(
+                              battle.queue,
+                              np.minimum(columns, battle.queue.shape[1] - 1),
+                              axis=1),
+                          -1)
+
+        observations = np.empty((self.num_envs, OBSERVATION_SIZE),
+                                dtype=np.intp)
+        observations[:, 0:2] = battle.hp
+        observations[:, 2:4] = battle.sp
+        observations[:, 4:6] = battle.get_defenses()
+        observations[:, 6] = prefix[:, 0]
+        observations[:, 7:] = prefix
+        return observations
+
+    def _action_mask(self) -> 'ndarray':
+        """
+        Return the actions the acting player in every game can take.
+        """
+        battle = self._battle
+        actors = battle.queue[self._games, battle.head].astype(np.intp)
+        return battle.get_action_mask(self._games, actors)
+
+
+def _worker(connection: 'Connection', p1: str, p2: str, envs: int) -> None:
+    """
+    Run a BattleVectorEnv in a worker process, answering the commands sent
+    over connection until it is sent None.
+    """
+    env = BattleVectorEnv(p1, p2, envs)
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+        name, argument = command
+        if name == 'reset':
+            connection.send(env.reset())
+        else:
+            connection.send(env.step(argument))
+    connection.close()
+
+
+class SubprocVectorEnv:
+    """
+    A BattleVectorEnv whose games are split across worker processes, with
+    the same reset and step methods.
+
+    num_envs - the total number of games.
+    """
+    num_envs: int
+
+    def __init__(self, p1: str, p2: str, envs: int, workers: int = None) \
+            -> None:
+        """
+        Initialize this SubprocVectorEnv with envs games split as evenly as
+        possible across workers processes (one per CPU by default).
+        """
+        workers = min(workers or multiprocessing.cpu_count(), envs)
+        self.num_envs = envs
+        self._splits = np.cumsum([envs // workers + (i < envs % workers)
+                                  for i in range(workers)])[:-1]
+        self._connections = []
+        self._processes = []
+        for size in np.split(np.arange(envs), self._splits):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker,
+                                              args=(child, p1, p2, len(size)),
+                                              daemon=True)
+            process.start()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def reset(self) -> Tuple['ndarray', dict]:
+        """
+        Start every game from the beginning and return the observations and
+        info.
+        """
+        for connection in self._connections:
+            connection.send(('reset', None))
+        return self._gather(2)
+
+    def step(self, actions: 'ndarray') \
+            -> Tuple['ndarray', 'ndarray', 'ndarray', dict]:
+        """
+        Perform actions (one per game) and return the observations, rewards,
+        dones and info.
+        """
+        for connection, part in zip(self._connections,
+                                    np.split(np.asarray(actions),
+                                             self._splits)):
+            connection.send(('step', part))
+        return self._gather(4)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        for connection in self._connections:
+            connection.send(None)
+        for process in self._processes:
+            process.join()
+
+    def _gather(self, size: int) -> tuple:
+        """
+        Return the replies of every worker, each a tuple of size arrays
+        followed by an info dict, joined together.
+        """
+        replies = [connection.recv() for connection in self._connections]
+        joined = [np.concatenate([reply[i] for reply in replies])
+                  for i in range(size - 1)]
+        info = {key: np.concatenate([reply[-1][key] for reply in replies])
+                for key in replies[0][-1]}
+        return tuple(joined) + (info,)
+
+
+def measure_steps_per_second(env: 'BattleVectorEnv', steps: int = 1000,
+                             seed: int = 0) -> float:
+    """
+    Return the number of game steps per second env runs with random valid
+    actions.
+    """
+    rng = np.random.default_rng(seed)
+    _, info = env.reset()
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = (rng.random(env.num_envs) < 0.5) & info['action_mask'][:, 1]
+        info = env.step(actions.astype(np.intp))[-1]
+    return steps * env.num_envs / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    print("{:,.0f} steps/s".format(
+        measure_steps_per_second(BattleVectorEnv('m', 's', 4096))))
@@ -0,0 +1,70 @@
+"""
+Basic Unittests for the vectorized environment.
+
+"""
+import unittest
+
+import numpy as np
+
+from vector_env import BattleVectorEnv, SubprocVectorEnv, OBSERVATION_SIZE
+
+
+class VectorEnvUnitTests(unittest.TestCase):
+    def play(self, env, steps, seed=0):
+        """
+        Play steps random valid actions in env and return every step's
+        results.
+        """
+        rng = np.random.default_rng(seed)
+        _, info = env.reset()
+        history = []
+        for _ in range(steps):
+            actions = (rng.random(env.num_envs) < 0.5) & \
+                info['action_mask'][:, 1]
+            result = env.step(actions.astype(np.intp))
+            info = result[-1]
+            history.append(result)
+        return history
+
+    def test_observation_shape(self):
+        """
+        Test to make sure observations and masks have one row per game.
+        """
+        env = BattleVectorEnv('v', 's', 5)
+        observations, info = env.reset()
+        self.assertEqual((5, OBSERVATION_SIZE), observations.shape)
+        self.assertEqual((5, 2), info['action_mask'].shape)
+
+    def test_games_auto_reset(self):
+        """
+        Test to make sure finished games report a winner and restart.
+        """
+        env = BattleVectorEnv('r', 'm', 64)
+        finished = 0
+        for observations, rewards, dones, info in self.play(env, 200):
+            finished += dones.sum()
+            self.assertTrue((info['winner'][~dones] == 0).all())
+            self.assertTrue((rewards[~dones] == 0).all())
+            restarted = observations[dones]
+            self.assertTrue((restarted[:, :4] == 100).all())
+        self.assertGreater(finished, 64)
+
+    def test_subprocess_workers_match(self):
+        """
+        Test to make sure splitting games across worker processes gives the
+        same results as one environment.
+        """
+        local = self.play(BattleVectorEnv('m', 'v', 10), 60)
+        env = SubprocVectorEnv('m', 'v', 10, workers=3)
+        try:
+            remote = self.play(env, 60)
+        finally:
+            env.close()
+
+        for expected, actual in zip(local, remote):
+            for i in range(3):
+                self.assertTrue((expected[i] == actual[i]).all())
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)
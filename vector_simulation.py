@@ -0,0 +1,340 @@
+"""
+A NumPy simulator that plays a batch of RandomPlaystyle vs RandomPlaystyle
+games in lockstep.
+
+Every game in a batch has the same two character classes and a normal
+BattleQueue. HP, SP and the battle queue of every game are stored in arrays,
+and each step performs one turn in every unfinished game using the skill
+effects from skills.py:
+    - the caster pays the skill's SP cost and the target takes its damage
+      minus their defense,
+    - Vampire skills heal the caster by the HP the target lost,
+    - skills add the caster and/or target to the end of the queue,
+    - SorcererSpecial rebuilds the queue as [target, caster] and
+      SorcererAttack uses the skill picked by the default SkillDecisionTree
+      for 15 SP.
+
+Each queue is stored as a row of character numbers (0 for player 1, 1 for
+player 2) between a head and a tail index. A BattleQueue skips characters who
+can't act whenever it is read, and since SP never goes up a character who
+can't act never can again, so the same skipping is done lazily at the head.
+
+validate compares this simulator with GameSession on the same random moves.
+"""
+from typing import Union
+import numpy as np
+from game import CHARACTER_CLASSES, create_session
+from skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial, \
+    VampireAttack, VampireSpecial, SorcererAttack, SorcererSpecial
+from skill_decision_tree import create_default_tree
+
+SKILL_KINDS = [MageAttack, MageSpecial, RogueAttack, RogueSpecial,
+               VampireAttack, VampireSpecial, SorcererAttack, SorcererSpecial]
+
+# The characters each skill adds to the queue, in order: 0 for the caster
+# and 1 for the target.
+QUEUE_ADDITIONS = {MageAttack: [0],
+                   MageSpecial: [1, 0],
+                   RogueAttack: [0],
+                   RogueSpecial: [0, 0],
+                   VampireAttack: [0],
+                   VampireSpecial: [0, 0, 1],
+                   SorcererAttack: [],
+                   SorcererSpecial: []}
+
+LIFESTEAL = [VampireAttack, VampireSpecial]
+
+
+def _skill_tables() -> dict:
+    """
+    Return arrays describing every skill in SKILL_KINDS, indexed by kind.
+    """
+    skills = [kind() for kind in SKILL_KINDS]
+    additions = np.full((len(SKILL_KINDS), 3), -1, dtype=np.int8)
+    for kind, skill_class in enumerate(SKILL_KINDS):
+        queue_additions = QUEUE_ADDITIONS[skill_class]
+        additions[kind, :len(queue_additions)] = queue_additions
+
+    return {'cost': np.array([skill.get_sp_cost() for skill in skills]),
+            'damage': np.array([skill.get_damage() for skill in skills]),
+            'lifesteal': np.array([kind in LIFESTEAL
+                                   for kind in SKILL_KINDS]),
+            'additions': additions}
+
+
+class VectorBattle:
+    """
+    A batch of games between the same two character classes, each played
+    with RandomPlaystyle on a normal BattleQueue.
+
+    hp, sp - (games, 2) arrays of each player's HP and SP.
+    queue - (games, capacity) array of the character numbers in each
+            game's queue; only the columns from head to tail are used.
+    head, tail - the bounds of each game's queue.
+    turns - the number of turns played in each game.
+    active - whether each game is still being played.
+    """
+    hp: 'ndarray'
+    sp: 'ndarray'
+    queue: 'ndarray'
+    head: 'ndarray'
+    tail: 'ndarray'
+    turns: 'ndarray'
+    active: 'ndarray'
+
+    def __init__(self, p1: str, p2: str, games: int) -> None:
+        """
+        Initialize this VectorBattle with games games between the
+        CHARACTER_CLASSES keys p1 and p2, with player 1 to move first.
+        """
+        characters = [CHARACTER_CLASSES[p1]("P1", None, None),
+                      CHARACTER_CLASSES[p2]("P2", None, None)]
+        self._skills = _skill_tables()
+        self._attack = np.array([SKILL_KINDS.index(type(c.get_skill('A')))
+                                 for c in characters])
+        self._special = np.array([SKILL_KINDS.index(type(c.get_skill('S')))
+                                  for c in characters])
+        self._min_cost = np.minimum(self._skills['cost'][self._attack],
+                                    self._skills['cost'][self._special])
+        self._defense = np.array([c.get_defense() for c in characters])
+
+        tree = create_default_tree()
+        self._tree = tree
+        self._tree_kinds = np.array([SKILL_KINDS.index(type(skill))
+                                     for skill in tree.get_ranked_skills()])
+
+        # Every turn costs the actor at least their cheapest skill, and adds
+        # at most 3 characters to the queue.
+        max_turns = int(sum(-(-characters[p].get_sp() //
+                              int(self._min_cost[p])) for p in range(2)))
+        self.max_turns = max_turns
+        capacity = 2 + 3 * (max_turns + 1)
+
+        self._start_hp = [c.get_hp() for c in characters]
+        self._start_sp = [c.get_sp() for c in characters]
+        self.hp = np.zeros((games, 2), dtype=np.intp)
+        self.sp = np.zeros((games, 2), dtype=np.intp)
+        self.queue = np.zeros((games, capacity), dtype=np.int8)
+        self.head = np.zeros(games, dtype=np.intp)
+        self.tail = np.zeros(games, dtype=np.intp)
+        self.turns = np.zeros(games, dtype=np.intp)
+        self.active = np.zeros(games, dtype=bool)
+        self.reset()
+
+    def reset(self, games: 'ndarray' = None) -> None:
+        """
+        Start the games with the indices in games (all games by default)
+        again from the beginning.
+        """
+        if games is None:
+            games = np.arange(len(self.active))
+        self.hp[games] = self._start_hp
+        self.sp[games] = self._start_sp
+        self.queue[games, 0] = 0
+        self.queue[games, 1] = 1
+        self.head[games] = 0
+        self.tail[games] = 2
+        self.turns[games] = 0
+        self.active[games] = True
+
+    def can_act(self, games: 'ndarray', players: 'ndarray') -> 'ndarray':
+        """
+        Return whether each of players in the corresponding games has a
+        skill they can afford.
+        """
+        return self.sp[games, players] >= self._min_cost[players]
+
+    def get_action_mask(self, games: 'ndarray', players: 'ndarray') \
+            -> 'ndarray':
+        """
+        Return a (len(games), 2) array of whether each of players in the
+        corresponding games can attack and special attack.
+        """
+        sp = self.sp[games, players]
+        return np.stack(
+            [sp >= self._skills['cost'][self._attack[players]],
+             sp >= self._skills['cost'][self._special[players]]], axis=1)
+
+    def get_defenses(self) -> 'ndarray':
+        """
+        Return the defense of player 1 and player 2.
+        """
+        return self._defense.copy()
+
+    def _skip_inactive(self, games: 'ndarray') -> None:
+        """
+        Move the head of each of games' queues past characters that can't
+        act.
+        """
+        while games.size:
+            players = self.queue[games, np.minimum(self.head[games],
+                                                   self.queue.shape[1] - 1)]
+            skip = (self.head[games] < self.tail[games]) & \
+                ~self.can_act(games, players)
+            games = games[skip]
+            self.head[games] += 1
+
+    def update_active(self) -> 'ndarray':
+        """
+        Mark games that are over as inactive and return the indices of the
+        rest.
+        """
+        games = np.flatnonzero(self.active)
+        self._skip_inactive(games)
+        over = (self.head[games] >= self.tail[games]) | \
+            (self.hp[games, 0] == 0) | (self.hp[games, 1] == 0)
+        self.active[games[over]] = False
+        return games[~over]
+
+    def _append(self, games: 'ndarray', players: 'ndarray') -> None:
+        """
+        Add players to the end of the queues of the corresponding games.
+        """
+        self.queue[games, self.tail[games]] = players
+        self.tail[games] += 1
+
+    def step(self, specials: 'ndarray') -> bool:
+        """
+        Play one turn in every active game. specials is a boolean array with
+        one entry per game, saying whether the game's actor uses their
+        special attack if they can afford it.
+
+        Return whether any game is still active afterwards.
+        """
+        games = self.update_active()
+        if not games.size:
+            return False
+
+        actor = self.queue[games, self.head[games]].astype(np.intp)
+        target = 1 - actor
+        affordable = self.sp[games, actor] >= \
+            self._skills['cost'][self._special[actor]]
+        kind = np.where(specials[games] & affordable, self._special[actor],
+                        self._attack[actor])
+
+        # SorcererAttack uses the skill picked by the tree, for its own cost.
+        effect = kind.copy()
+        picks = np.flatnonzero(kind == SKILL_KINDS.index(SorcererAttack))
+        if picks.size:
+            g, a, t = games[picks], actor[picks], target[picks]
+            ranked = self._tree.pick_skill_indices(
+                self.hp[g, a], self.sp[g, a], self.hp[g, t], self.sp[g, t])
+            effect[picks] = self._tree_kinds[ranked]
+
+        self.sp[games, actor] -= self._skills['cost'][kind]
+        before = self.hp[games, target]
+        after = np.maximum(before - (self._skills['damage'][effect] -
+                                     self._defense[target]), 0)
+        self.hp[games, target] = after
+        steal = self._skills['lifesteal'][effect]
+        self.hp[games[steal], actor[steal]] += (before - after)[steal]
+
+        # SorcererSpecial empties the queue and adds the target back (if they
+        # were in it) before the caster; every other skill removes the actor
+        # from the front and adds to the back.
+        reorder = kind == SKILL_KINDS.index(SorcererSpecial)
+        if reorder.any():
+            g, t = games[reorder], target[reorder]
+            columns = np.arange(self.queue.shape[1])
+            in_queue = (self.queue[g] == t[:, None]) & \
+                (columns >= self.head[g][:, None]) & \
+                (columns < self.tail[g][:, None])
+            readd = in_queue.any(axis=1) & self.can_act(g, t)
+            self.head[g] = self.tail[g]
+            self._append(g[readd], t[readd])
+            self._append(g, actor[reorder])
+
+        kept = ~reorder
+        g, a = games[kept], actor[kept]
+        self.head[g] += 1
+        additions = self._skills['additions'][effect[kept]]
+        for column in range(additions.shape[1]):
+            adding = additions[:, column] >= 0
+            players = np.where(additions[:, column] == 0, a, 1 - a)
+            self._append(g[adding], players[adding])
+
+        self.turns[games] += 1
+        return True
+
+    def run(self, rng: Union[np.random.Generator, None] = None) -> dict:
+        """
+        Play every game to completion, choosing between the actor's
+        affordable skills uniformly at random with rng, and return the
+        results as in get_results.
+        """
+        rng = rng or np.random.default_rng()
+        while self.step(rng.random(len(self.active)) < 0.5):
+            pass
+        return self.get_results()
+
+    def get_results(self) -> dict:
+        """
+        Return arrays of each game's winner (1 or 2, or 0 for a tie), final
+        HP and SP, and number of turns.
+        """
+        winner = np.where(self.hp[:, 1] == 0, 1,
+                          np.where(self.hp[:, 0] == 0, 2, 0))
+        return {'winner': winner,
+                'p1_hp': self.hp[:, 0].copy(), 'p1_sp': self.sp[:, 0].copy(),
+                'p2_hp': self.hp[:, 1].copy(), 'p2_sp': self.sp[:, 1].copy(),
+                'turns': self.turns.copy()}
+
+
+def simulate(p1: str, p2: str, games: int, seed: int = None) -> dict:
+    """
+    Return the results, as in VectorBattle.get_results, of games
+    RandomPlaystyle games between the CHARACTER_CLASSES keys p1 and p2.
+
+    >>> results = simulate('r', 's', 100, seed=0)
+    >>> bool((results['winner'] == 1).all())
+    True
+    """
+    return VectorBattle(p1, p2, games).run(np.random.default_rng(seed))
+
+
+def validate(p1: str, p2: str, games: int, seed: int = 0) -> int:
+    """
+    Play games games between the CHARACTER_CLASSES keys p1 and p2 with both
+    VectorBattle and GameSession, making the same random choices, and return
+    the number of games whose results differ.
+
+    >>> validate('v', 's', 50)
+    0
+    """
+    battle = VectorBattle(p1, p2, games)
+    specials = np.random.default_rng(seed).random(
+        (battle.max_turns + 1, games)) < 0.5
+    for turn in range(battle.max_turns + 1):
+        if not battle.step(specials[turn]):
+            break
+    results = battle.get_results()
+
+    mismatches = 0
+    for game in range(games):
+        session = create_session('n', p1, "P1", 'r', p2, "P2", 'r')
+        while not session.is_over:
+            actions = session.battle_queue.peek().get_available_actions()
+            move = 'S' if 'S' in actions and specials[session.turns, game] \
+                else 'A'
+            session.apply_move(move)
+
+        winner = 0
+        if session.winner is not None:
+            winner = 1 if session.winner is session.p1 else 2
+        expected = [winner, session.p1.get_hp(), session.p1.get_sp(),
+                    session.p2.get_hp(), session.p2.get_sp(), session.turns]
+        actual = [int(results[key][game])
+                  for key in ['winner', 'p1_hp', 'p1_sp', 'p2_hp', 'p2_sp',
+                              'turns']]
+        if expected != actual:
+            mismatches += 1
+    return mismatches
+
+
+if __name__ == '__main__':
+    for P1 in CHARACTER_CLASSES:
+        for P2 in CHARACTER_CLASSES:
+            RESULTS = simulate(P1, P2, 100000, seed=0)
+            COUNTS = np.bincount(RESULTS['winner'], minlength=3)
+            print("{} vs {}: {} wins, {} losses, {} ties".format(
+                P1, P2, COUNTS[1], COUNTS[2], COUNTS[0]))
@@ -0,0 +1,47 @@
+"""
+Basic Unittests for the vectorized simulator.
+
+"""
+import unittest
+
+from game import CHARACTER_CLASSES
+from vector_simulation import simulate, validate
+
+
+class VectorSimulationUnitTests(unittest.TestCase):
+    def test_matches_game_sessions(self):
+        """
+        Test to make sure every matchup gives the same results as playing
+        GameSessions with the same random choices.
+        """
+        for p1 in CHARACTER_CLASSES:
+            for p2 in CHARACTER_CLASSES:
+                mismatches = validate(p1, p2, 100, seed=7)
+                self.assertEqual(0, mismatches,
+                                 ("{} of 100 games of {} vs {} differ " +
+                                  "from GameSession.").format(mismatches,
+                                                              p1, p2))
+
+    def test_results_are_consistent(self):
+        """
+        Test to make sure every game ends with a consistent winner.
+        """
+        results = simulate('m', 'v', 1000, seed=3)
+        self.assertTrue(((results['winner'] != 1) |
+                         (results['p2_hp'] == 0)).all())
+        self.assertTrue(((results['winner'] != 2) |
+                         (results['p1_hp'] == 0)).all())
+        self.assertTrue((results['turns'] > 0).all())
+
+    def test_seed_reproduces_results(self):
+        """
+        Test to make sure the same seed gives the same results.
+        """
+        first = simulate('r', 'm', 500, seed=11)
+        second = simulate('r', 'm', 500, seed=11)
+        for key in first:
+            self.assertTrue((first[key] == second[key]).all())
+
+
+if __name__ == "__main__":
+    unittest.main(exit = False)